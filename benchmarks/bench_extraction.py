@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+
+"""Benchmark del motore di estrazione sulle pagine HTML salvate in fixtures/.
+
+Confronta il vecchio scraper degli agenti (html.parser, tutti i selettori) con
+news_agent.extraction, con html.parser e, se installato, con lxml.
+
+    python benchmarks/bench_extraction.py
+"""
+
+import sys
+import timeit
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from news_agent.extraction import extract
+from news_agent.textnorm import clean_scraped_text
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+def legacy_extract(html_content):
+    """Vecchio _extract_content di agents.py, riprodotto per confronto"""
+    soup = BeautifulSoup(html_content, 'html.parser')
+    for tag in soup(['script', 'style', 'nav', 'header', 'footer', 'aside']): tag.decompose()
+    content_selectors = ['article', '[class*="content"]', '[class*="article"]', '[class*="post"]', '.entry-content', '.post-content', '.article-content', 'main']
+    content = ""
+    for selector in content_selectors:
+        elements = soup.select(selector)
+        if elements:
+            content = ' '.join([elem.get_text(strip=True) for elem in elements])
+            if len(content) > 200: break
+    if not content or len(content) < 200:
+        body = soup.find('body')
+        if body: content = body.get_text(strip=True)
+    return clean_scraped_text(content, max_chars=5000)
+
+def best_ms(func, repeat=5, number=5):
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number * 1000
+
+def parsers():
+    available = ['html.parser']
+    try:
+        import lxml  # noqa: F401
+        available.append('lxml')
+    except ImportError:
+        pass
+    return available
+
+def main():
+    pages = sorted(FIXTURES.glob("*.html"))
+    if not pages:
+        print(f"Nessuna pagina in {FIXTURES}")
+        return
+    backends = parsers()
+    header = f"{'Pagina':<28}{'KB':>6}{'vecchio (ms)':>14}" + "".join(f"{p + ' (ms)':>18}" for p in backends)
+    print(header)
+    print("-" * len(header))
+    totals = [0.0] * (len(backends) + 1)
+    for page in pages:
+        data = page.read_bytes()
+        times = [best_ms(lambda: legacy_extract(data))]
+        times += [best_ms(lambda p=p: extract(data, max_chars=5000, parser=p)) for p in backends]
+        totals = [t + x for t, x in zip(totals, times)]
+        print(f"{page.name:<28}{len(data) / 1024:>6.0f}" + "".join(f"{t:>14.2f}" if i == 0 else f"{t:>18.2f}" for i, t in enumerate(times)))
+    print("-" * len(header))
+    print(f"{'Totale':<34}" + "".join(f"{t:>14.2f}" if i == 0 else f"{t:>18.2f}" for i, t in enumerate(totals)))
+
+    print("\nCampi estratti:")
+    for page in pages:
+        data = page.read_bytes()
+        result = extract(data, max_chars=5000)
+        legacy = legacy_extract(data)
+        print(f"- {page.name}: titolo={result['title'][:50]!r} autore={result['byline']!r}")
+        print(f"  canonical={result['canonical_url']!r} testo={len(result['text'])} caratteri"
+              f" (vecchio: {len(legacy)}) inizio={result['text'][:60]!r}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+
+"""Tempo al primo token della catena riassunto → implicazioni → teoria, con e senza prefisso condiviso.
+
+Il testo dell'articolo viene da fixtures/quotidiano_it.html. Con la disposizione
+"prima" ogni agente mette le sue istruzioni davanti alla notizia, come prima del
+prefisso condiviso; con "dopo" tutti i prompt iniziano con la stessa notizia e il
+provider può riusarla (cache_control per Claude, cache KV per Ollama con
+keep_alive, automatico per OpenAI). Ogni giro usa un titolo diverso, così il
+primo agente parte sempre a freddo. Serve un provider configurato in
+settings.ini; la cache delle risposte viene saltata.
+
+    python benchmarks/bench_prefix_ttft.py [provider] [giri]
+"""
+
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from news_agent.agents import prompt_riassunto, prompt_implicazioni, prompt_teoria
+from news_agent.ai_providers import _create_base_provider
+from news_agent.extraction import extract
+from news_agent.prompting import configure_prompting
+from news_agent.settings import load_settings
+
+FIXTURE = Path(__file__).resolve().parent / "fixtures" / "quotidiano_it.html"
+STAGES = ('riassunto', 'implicazioni', 'teoria')
+MAX_TOKENS = 64
+
+def instructions_first(prompt):
+    """Stesso testo con le istruzioni dell'agente prima della notizia, senza prefisso per la cache"""
+    prefix = getattr(prompt, 'prefix', '')
+    return str(prompt[len(prefix):] + "\n" + prefix)
+
+def first_token(provider, prompt):
+    """(secondi al primo token, testo generato)"""
+    start = time.perf_counter()
+    elapsed = None
+    parts = []
+    for token in provider.stream(prompt, MAX_TOKENS):
+        if elapsed is None:
+            elapsed = time.perf_counter() - start
+        parts.append(token)
+    return elapsed if elapsed is not None else time.perf_counter() - start, ''.join(parts)
+
+def run_chain(provider, article, content, layout):
+    outputs, times = {}, {}
+    builders = {
+        'riassunto': lambda: prompt_riassunto(article, content, provider),
+        'implicazioni': lambda: prompt_implicazioni(article, content, outputs['riassunto'], provider),
+        'teoria': lambda: prompt_teoria(article, content, outputs['riassunto'], outputs['implicazioni'], provider),
+    }
+    for stage in STAGES:
+        prompt = builders[stage]()
+        if layout == 'prima':
+            prompt = instructions_first(prompt)
+        times[stage], outputs[stage] = first_token(provider, prompt)
+    return times
+
+def main():
+    settings = load_settings()
+    configure_prompting(settings)
+    provider_name = sys.argv[1] if len(sys.argv) > 1 else settings.get('provider', 'ollama')
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    provider = _create_base_provider(provider_name, settings)
+    page = extract(FIXTURE.read_bytes(), max_chars=5000)
+    print(f"Provider: {provider_name}, {rounds} giri, testo di {len(page['text'])} caratteri\n")
+
+    results = {'prima': {stage: [] for stage in STAGES}, 'dopo': {stage: [] for stage in STAGES}}
+    for i in range(rounds):
+        for layout in ('prima', 'dopo'):
+            article = {'title': f"{page['title']} #{layout}-{i}", 'author': 'Quotidiano', 'date': '2026-10-18'}
+            for stage, elapsed in run_chain(provider, article, page['text'], layout).items():
+                results[layout][stage].append(elapsed)
+
+    header = f"{'Agente':<16}{'prima (s)':>12}{'dopo (s)':>12}{'variazione':>12}"
+    print(header)
+    print("-" * len(header))
+    for stage in STAGES:
+        before = statistics.median(results['prima'][stage])
+        after = statistics.median(results['dopo'][stage])
+        print(f"{stage:<16}{before:>12.2f}{after:>12.2f}{(after - before) / before:>12.0%}")
+    print("\nValori mediani del tempo al primo token; il riassunto apre la catena e resta a freddo in entrambi i casi.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+
+"""Micro-benchmark della normalizzazione dei campi del feed.
+
+Confronta la vecchia pulizia (quattro re.sub non compilate + html.unescape per
+campo) con news_agent.textnorm su un feed sintetico di 1000 articoli, e misura
+il costo per articolo di parse_feed completo.
+
+    python benchmarks/bench_textnorm.py [numero_articoli]
+"""
+
+import html
+import random
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from news_agent.fetcher import parse_feed
+from news_agent.textnorm import normalize_field
+
+WORDS = ["governo", "manovra", "l'economia", "città", "perché", "Roma", "Milano", "elezioni",
+         "&amp;", "&quot;citazione&quot;", "&#8217;", "&nbsp;", "<b>grassetto</b>", "\n\t", "  "]
+
+def legacy_item(title, description, author):
+    """Pulizia originale di fetch_articles, riprodotta per confronto"""
+    clean_descr = re.sub('<[^<]+?>', '', description)
+    clean_descr = html.unescape(clean_descr)
+    clean_descr = re.sub(r'&[a-zA-Z0-9#]+;', '', clean_descr)
+    clean_descr = re.sub(r'\s+', ' ', clean_descr)
+
+    clean_title = html.unescape(title)
+    clean_title = re.sub(r'&[a-zA-Z0-9#]+;', '', clean_title)
+    clean_title = re.sub(r'\s+', ' ', clean_title)
+
+    clean_author = html.unescape(author)
+    clean_author = re.sub(r'&[a-zA-Z0-9#]+;', '', clean_author)
+    clean_author = re.sub(r'\s+', ' ', clean_author)
+    return clean_title.strip(), clean_descr.strip(), clean_author.strip()
+
+def new_item(title, description, author):
+    return normalize_field(title), normalize_field(description, strip_tags=True), normalize_field(author)
+
+def synthetic_items(n, seed=42):
+    rng = random.Random(seed)
+    items = []
+    for i in range(n):
+        title = " ".join(rng.choice(WORDS[:8]) for _ in range(10)) + f" {i} - Testata"
+        description = "<p>" + " ".join(rng.choice(WORDS) for _ in range(40)) + "</p>"
+        author = rng.choice(["ANSA", "Il Sole 24 ORE", "Corriere &amp; Sera", "La Repubblica"])
+        items.append((title, description, author))
+    return items
+
+def synthetic_feed(items):
+    body = "".join(
+        f"<item><title>{html.escape(t)}</title><link>https://example.com/{i}</link>"
+        f"<pubDate>Mon, 01 Jan 2024 10:00:00 GMT</pubDate>"
+        f"<description>{html.escape(d)}</description><source>{html.escape(a)}</source></item>"
+        for i, (t, d, a) in enumerate(items)
+    )
+    return f'<?xml version="1.0" encoding="UTF-8"?><rss><channel>{body}</channel></rss>'.encode('utf-8')
+
+def best_per_item(func, n, repeat=5, number=3):
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number / n * 1e6
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    items = synthetic_items(n)
+    feed = synthetic_feed(items)
+
+    mismatches = sum(legacy_item(*item) != new_item(*item) for item in items)
+
+    legacy = best_per_item(lambda: [legacy_item(*item) for item in items], n)
+    new = best_per_item(lambda: [new_item(*item) for item in items], n)
+    parse = best_per_item(lambda: parse_feed(feed), n)
+
+    print(f"Feed sintetico: {n} articoli, {len(feed) / 1024:.0f} KB")
+    print(f"Pulizia originale:     {legacy:7.2f} µs/articolo")
+    print(f"textnorm:              {new:7.2f} µs/articolo  ({legacy / new:.1f}x)")
+    print(f"parse_feed completo:   {parse:7.2f} µs/articolo")
+    print(f"Risultati diversi:     {mismatches}")
+
+if __name__ == "__main__":
+    main()
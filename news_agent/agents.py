@@ -1,115 +1,155 @@
 #!/usr/bin/env python
 
-import requests
-from bs4 import BeautifulSoup
-import re
+import threading
+
+from .transport import transport
+from .extraction import extract_text, response_encoding
+from .cache import content_cache
+from .scrape_store import scrape_store
+from .resolver import google_resolver
+from .prompting import PromptBuilder
 
 def ollama_agent(prompt, ai_provider, max_tokens=2048):
     """Funzione wrapper per compatibilità con il vecchio sistema"""
     return ai_provider.generate(prompt, max_tokens)
 
+def _complete(ai_provider, prompt, max_tokens, stream):
+    """Con stream=True restituisce il generatore di token invece del testo completo"""
+    if stream:
+        return ai_provider.stream(prompt, max_tokens=max_tokens)
+    return ai_provider.generate(prompt, max_tokens=max_tokens)
+
+# Scaricamenti in corso per link: chi chiede lo stesso articolo aspetta quello già avviato
+_inflight = {}
+_inflight_lock = threading.Lock()
+
 def scrape_article_content(url):
+    """Restituisce il contenuto dell'articolo, usando la cache condivisa per link"""
+    content = content_cache.get(url)
+    if content is not None:
+        return content
+    with _inflight_lock:
+        done = _inflight.get(url)
+        owner = done is None
+        if owner:
+            done = _inflight[url] = threading.Event()
+    if not owner:
+        # Di solito è il prefetch in background: basta attenderne il risultato
+        done.wait(timeout=30)
+        content = content_cache.get(url)
+        if content is not None:
+            return content
+        return _scrape_into_cache(url)
+    try:
+        return _scrape_into_cache(url)
+    finally:
+        with _inflight_lock:
+            _inflight.pop(url, None)
+        done.set()
+
+def _scrape_into_cache(url):
+    content = _scrape_article_content(url)
+    if content:
+        content_cache.set(url, content)
+    return content
+
+def _scrape_article_content(url):
     try:
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
-        if 'news.google.com/rss/articles' in url:
-            response = requests.get(url, headers=headers, timeout=10, allow_redirects=True)
-            response.raise_for_status()
-            if 'consent.google.com' in response.url:
-                headers['Accept'] = 'application/rss+xml, application/xml, text/xml'
-                headers['Accept-Language'] = 'en-US,en;q=0.9'
-                response = requests.get(url, headers=headers, timeout=10, allow_redirects=False)
-            soup = BeautifulSoup(response.content, 'xml')
-            link_element = soup.find('link')
-            if link_element:
-                real_link = link_element.text.strip()
-                if real_link and real_link.startswith('http'):
-                    url = real_link
-                else: return None
-            else: return None
-        elif 'news.google.com' in url:
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-            selectors = [
-                'a[href*="http"]:not([href*="google.com"])', 'a[data-n-tid]', 'a[jslog]',
-                'article a[href*="http"]', '.VDXfz a[href*="http"]', 'a[href*="repubblica"]',
-                'a[href*="corriere"]', 'a[href*="ansa"]', 'a[href*="ilfatto"]',
-                'a[href*="lastampa"]', 'a[href*="ilsole24ore"]', 'a[href*="ilpost"]',
-                'a[href*="ilmanifesto"]'
-            ]
-            real_link = None
-            for selector in selectors:
-                links = soup.select(selector)
-                for link in links:
-                    href = link.get('href')
-                    if href and 'google.com' not in href and href.startswith('http'):
-                        real_link = href
-                        break
-                if real_link: break
-            if not real_link: return None
-            url = real_link
-
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
-        for tag in soup(['script', 'style', 'nav', 'header', 'footer', 'aside']): tag.decompose()
-        content_selectors = ['article', '[class*="content"]', '[class*="article"]', '[class*="post"]', '.entry-content', '.post-content', '.article-content', 'main']
-        content = ""
-        for selector in content_selectors:
-            elements = soup.select(selector)
-            if elements:
-                content = ' '.join([elem.get_text(strip=True) for elem in elements])
-                if len(content) > 200: break
-        if not content or len(content) < 200:
-            body = soup.find('body')
-            if body: content = body.get_text(strip=True)
-        content = re.sub(r'\s+', ' ', content)
-        content = re.sub(r'[^\w\s\.\,\!\?\:\;\-\(\)\[\]\'\"]', '', content)
-        if len(content) > 5000: content = content[:5000] + "..."
-        return content
+        # I redirect di Google News sono stabili: si risolvono una volta sola
+        url = google_resolver.resolve(url)
+        if not url: return None
+        return _fetch_page_content(url, headers)
     except Exception as e: return None
 
+def _fetch_page_content(url, headers):
+    """Scarica la pagina passando dall'archivio su disco e rivalidando con GET condizionali"""
+    stored = scrape_store.get_page(url)
+    if stored and stored['fresh']:
+        return stored['content']
+    request_headers = dict(headers)
+    if stored:
+        if stored['etag']:
+            request_headers['If-None-Match'] = stored['etag']
+        if stored['last_modified']:
+            request_headers['If-Modified-Since'] = stored['last_modified']
+    response = transport.get(url, headers=request_headers, timeout=10)
+    if response.status_code == 304 and stored:
+        scrape_store.revalidated(url)
+        return stored['content']
+    response.raise_for_status()
+    content = extract_text(response.content, max_chars=5000, encoding=response_encoding(response))
+    if content:
+        scrape_store.set_page(url, content, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+    return content
+
 def get_article_full_content(article):
     content = scrape_article_content(article['link'])
     if not content: return article['summary']
     return content
 
-def agent_riassunto(article, ai_provider):
-    content = get_article_full_content(article)
-    prompt = (
-        f"Leggi la seguente notizia e fornisci un riassunto breve, chiaro e oggettivo.\n\n"
-        f"TITOLO: {article['title']}\n\n"
-        f"TESTO COMPLETO: {content}\n"
-        f"(Autore/Fonte: {article['author']}, Data: {article['date']})"
+# Token minimi del testo dell'articolo, anche quando il budget è stretto
+CONTENT_MIN_TOKENS = 300
+# Token minimi di ogni risultato di ricerca: meglio più estratti brevi che una sola fonte intera
+EVIDENCE_MIN_TOKENS = 80
+
+def _add_article_prefix(builder, article, content):
+    """Prefisso comune agli agenti che lavorano sul testo dell'articolo"""
+    builder.fixed(
+        f"NOTIZIA\n"
+        f"TITOLO: {article['title']}\n"
+        f"FONTE: {article['author']}\n"
+        f"DATA: {article['date']}\n\n"
     )
-    return ai_provider.generate(prompt, max_tokens=500)
+    builder.add(content, priority=1, min_tokens=CONTENT_MIN_TOKENS, prefix="TESTO COMPLETO:\n", suffix="\n\n")
+    builder.end_prefix()
 
-def agent_implicazioni(article, riassunto, ai_provider):
-    content = get_article_full_content(article)
-    prompt = (
-        f"Hai letto questa notizia (riassunta):\n\n"
-        f"RIASSUNTO: {riassunto}\n\n"
-        f"TESTO COMPLETO: {content}\n\n"
-        f"Titolo: {article['title']}\n"
-        f"Analizza le possibili implicazioni, conseguenze sociali, economiche, tecniche e politiche che derivano da questa notizia."
+def prompt_riassunto(article, content, ai_provider=None):
+    builder = PromptBuilder(ai_provider, agent='riassunto')
+    _add_article_prefix(builder, article, content)
+    builder.fixed("Leggi la notizia riportata sopra e fornisci un riassunto breve, chiaro e oggettivo.")
+    return builder.build()
+
+def prompt_implicazioni(article, content, riassunto, ai_provider=None):
+    builder = PromptBuilder(ai_provider, agent='implicazioni')
+    _add_article_prefix(builder, article, content)
+    builder.add(riassunto, priority=3, prefix="RIASSUNTO DELLA NOTIZIA: ", suffix="\n\n")
+    builder.fixed(
+        f"Analizza le possibili implicazioni, conseguenze sociali, economiche, tecniche e politiche che derivano da questa notizia. "
         f"Sii concreto e ragionato, anche ipotizzando scenari realistici per il futuro."
     )
-    return ai_provider.generate(prompt, max_tokens=600)
+    return builder.build()
 
-def agent_teoria(article, riassunto, implicazioni, ai_provider):
-    content = get_article_full_content(article)
-    prompt = (
-        f"Considerando questa notizia:\n"
-        f"TITOLO: {article['title']}\n"
-        f"RIASSUNTO: {riassunto}\n"
-        f"IMPLICAZIONI: {implicazioni}\n\n"
-        f"TESTO COMPLETO: {content}\n\n"
+def prompt_teoria(article, content, riassunto, implicazioni, ai_provider=None):
+    builder = PromptBuilder(ai_provider, agent='teoria')
+    _add_article_prefix(builder, article, content)
+    builder.add(riassunto, priority=3, prefix="RIASSUNTO DELLA NOTIZIA: ", suffix="\n")
+    builder.add(implicazioni, priority=2, prefix="IMPLICAZIONI: ", suffix="\n\n")
+    builder.fixed(
         f"Costruisci una possibile teoria, spiegazione complessiva o scenario più ampio "
         f"che possa mettere insieme il significato della notizia e delle sue conseguenze, anche collegando ad altri fenomeni globali o a sviluppi futuri."
     )
-    return ai_provider.generate(prompt, max_tokens=700)
+    return builder.build()
+
+# Limite di token della risposta per ogni agente della catena
+AGENT_MAX_TOKENS = {'riassunto': 500, 'implicazioni': 600, 'teoria': 700}
+
+def agent_riassunto(article, ai_provider, stream=False, content=None):
+    if content is None:
+        content = get_article_full_content(article)
+    return _complete(ai_provider, prompt_riassunto(article, content, ai_provider), AGENT_MAX_TOKENS['riassunto'], stream)
+
+def agent_implicazioni(article, riassunto, ai_provider, stream=False, content=None):
+    if content is None:
+        content = get_article_full_content(article)
+    return _complete(ai_provider, prompt_implicazioni(article, content, riassunto, ai_provider), AGENT_MAX_TOKENS['implicazioni'], stream)
+
+def agent_teoria(article, riassunto, implicazioni, ai_provider, stream=False, content=None):
+    if content is None:
+        content = get_article_full_content(article)
+    return _complete(ai_provider, prompt_teoria(article, content, riassunto, implicazioni, ai_provider), AGENT_MAX_TOKENS['teoria'], stream)
 
 def summarize_with_ollama(articles, ai_provider):
     N = 15
@@ -123,85 +163,66 @@ def summarize_with_ollama(articles, ai_provider):
     )
     return ai_provider.generate(prompt, max_tokens=1024)
 
-def summarize_article(article, ai_provider):
+def summarize_article(article, ai_provider, stream=False):
     content = get_article_full_content(article)
-    prompt = (
-        f"Leggi questo articolo e fornisci un riassunto dettagliato e ben strutturato.\n\n"
-        f"TITOLO: {article['title']}\n"
-        f"FONTE: {article['author']}\n"
-        f"DATA: {article['date']}\n\n"
-        f"CONTENUTO COMPLETO:\n{content}\n\n"
+    builder = PromptBuilder(ai_provider, agent='sunto')
+    _add_article_prefix(builder, article, content)
+    builder.fixed(
+        f"Leggi l'articolo riportato sopra e fornisci un riassunto dettagliato e ben strutturato.\n\n"
         f"Fornisci un riassunto di 8-10 righe che includa:\n"
         f"- I fatti principali\n"
         f"- Il contesto\n"
         f"- Le implicazioni principali\n"
         f"Scrivi in italiano in modo chiaro e oggettivo."
     )
-    return ai_provider.generate(prompt, max_tokens=500)
+    return _complete(ai_provider, builder.build(), 500, stream)
 
-def agent_verifica(article, verification_data, ai_provider):
-    fact_check_results = verification_data.get('fact_check_results', [])
-    reliable_results = verification_data.get('reliable_sources_results', [])
-    
-    fact_check_content = ""
-    if fact_check_results and not fact_check_results[0].get('error'):
-        for result in fact_check_results[:5]:
-            title = result.get('title', '')
-            snippet = result.get('snippet', '')
-            full_content = result.get('full_content', '')
-            source = result.get('source', '')
-            search_query = result.get('search_query', '')
-            language = result.get('language', 'it')
-            
-            # Traduci automaticamente i contenuti in inglese
-            if language == 'en':
-                title = f"[TRADOTTO] {title}"
-                if full_content:
-                    full_content = f"[CONTENUTO IN INGLESE - TRADUCI AUTOMATICAMENTE] {full_content}"
-                else:
-                    snippet = f"[CONTENUTO IN INGLESE - TRADUCI AUTOMATICAMENTE] {snippet}"
-            
-            if full_content:
-                fact_check_content += f"\n--- FACT-CHECK: {title} ({source}) ---\nQuery: {search_query}\n{full_content}\n"
-            else:
-                fact_check_content += f"\n--- FACT-CHECK: {title} ({source}) ---\nQuery: {search_query}\n{snippet}\n"
-    
-    reliable_content = ""
-    if reliable_results and not reliable_results[0].get('error'):
-        for result in reliable_results[:5]:
-            title = result.get('title', '')
-            snippet = result.get('snippet', '')
-            full_content = result.get('full_content', '')
-            source = result.get('source', '')
-            search_query = result.get('search_query', '')
-            language = result.get('language', 'it')
-            
-            if language == 'en':
-                title = f"[TRADOTTO] {title}"
-                if full_content:
-                    full_content = f"[CONTENUTO IN INGLESE - TRADUCI AUTOMATICAMENTE] {full_content}"
-                else:
-                    snippet = f"[CONTENUTO IN INGLESE - TRADUCI AUTOMATICAMENTE] {snippet}"
-            
+def _add_results(builder, results, label):
+    """Una sezione per risultato di ricerca: i primi risultati restano più a lungo"""
+    if not results or results[0].get('error'):
+        return
+    for rank, result in enumerate(results[:5]):
+        title = result.get('title', '')
+        snippet = result.get('snippet', '')
+        full_content = result.get('full_content', '')
+        source = result.get('source', '')
+        search_query = result.get('search_query', '')
+        language = result.get('language', 'it')
+        
+        # Traduci automaticamente i contenuti in inglese
+        if language == 'en':
+            title = f"[TRADOTTO] {title}"
             if full_content:
-                reliable_content += f"\n--- FONTE AFFIDABILE: {title} ({source}) ---\nQuery: {search_query}\n{full_content}\n"
+                full_content = f"[CONTENUTO IN INGLESE - TRADUCI AUTOMATICAMENTE] {full_content}"
             else:
-                reliable_content += f"\n--- FONTE AFFIDABILE: {title} ({source}) ---\nQuery: {search_query}\n{snippet}\n"
-    
-    title = article.get('title', 'Testo personalizzato')
-    summary = article.get('summary', '')
-    author = article.get('author', 'Fonte sconosciuta')
-    date = article.get('date', 'Data non disponibile')
-    
-    prompt = (
-        f"Sei un analista di intelligence esperto. Analizza la veridicità della seguente notizia.\n\n"
-        f"🔍 NOTIZIA DA VERIFICARE:\n"
-        f"📰 Titolo: {title}\n"
-        f"📝 Riassunto: {summary}\n"
-        f"🏢 Fonte: {author}\n"
-        f"📅 Data: {date}\n\n"
-        f"🔎 FONTI DISPONIBILI:\n{fact_check_content}\n\n"
-        f"✅ FONTI AFFIDABILI:\n{reliable_content}\n\n"
+                snippet = f"[CONTENUTO IN INGLESE - TRADUCI AUTOMATICAMENTE] {snippet}"
+        
+        header = f"\n--- {label}: {title} ({source}) ---\nQuery: {search_query}\n"
+        builder.add(full_content or snippet, priority=2 - rank / 10, min_tokens=EVIDENCE_MIN_TOKENS, prefix=header, suffix="\n")
+
+def add_verification_prefix(builder, article, verification_data):
+    """Dati della notizia e fonti trovate: prefisso comune a tutti gli agenti di verifica, anche multi-agente"""
+    builder.fixed(
+        f"🔍 NOTIZIA:\n"
+        f"📰 Titolo: {article.get('title', 'Testo personalizzato')}\n"
+    )
+    builder.add(article.get('summary', ''), priority=4, prefix="📝 Riassunto: ", suffix="\n")
+    builder.fixed(
+        f"🏢 Fonte: {article.get('author', 'Fonte sconosciuta')}\n"
+        f"📅 Data: {article.get('date', 'Data non disponibile')}\n\n"
+        f"🔎 FONTI DISPONIBILI:\n"
+    )
+    _add_results(builder, verification_data.get('fact_check_results', []), "FACT-CHECK")
+    builder.fixed("\n\n✅ FONTI AFFIDABILI:\n")
+    _add_results(builder, verification_data.get('reliable_sources_results', []), "FONTE AFFIDABILE")
+    builder.fixed("\n\n")
+    builder.end_prefix()
+
+def agent_verifica(article, verification_data, ai_provider, stream=False):
+    builder = PromptBuilder(ai_provider, agent='verifica')
+    add_verification_prefix(builder, article, verification_data)
+    builder.fixed(f"Sei un analista di intelligence esperto. Analizza la veridicità della notizia riportata sopra.\n\n")
+    builder.fixed(
         f"🎯 ANALISI CRITICA E INTELLIGENTE:\n"
         f"1. **VERDETTO**: [VERA] / [FALSA] / [DUBBIA] / [INSUFFICIENTI DATI]\n"
         f"2. **LIVELLO DI CONFIDENZA**: [ALTO 90%+] / [MEDIO 70-90%] / [BASSO <70%]\n"
@@ -226,71 +247,13 @@ def agent_verifica(article, verification_data, ai_provider):
         f"🌐 Se trovi contenuti in inglese, traduci automaticamente le informazioni chiave.\n\n"
         f"Rispondi in modo diretto e critico, evidenziando il verdetto finale."
     )
-    
-    return ai_provider.generate(prompt, max_tokens=1000)
+    return _complete(ai_provider, builder.build(), 1000, stream)
 
-def agent_validazione_verita(article, verification_data, ai_provider):
-    fact_check_results = verification_data.get('fact_check_results', [])
-    reliable_results = verification_data.get('reliable_sources_results', [])
-    
-    fact_check_content = ""
-    if fact_check_results and not fact_check_results[0].get('error'):
-        for result in fact_check_results[:5]:
-            title = result.get('title', '')
-            snippet = result.get('snippet', '')
-            full_content = result.get('full_content', '')
-            source = result.get('source', '')
-            search_query = result.get('search_query', '')
-            language = result.get('language', 'it')
-            
-            if language == 'en':
-                title = f"[TRADOTTO] {title}"
-                if full_content:
-                    full_content = f"[CONTENUTO IN INGLESE - TRADUCI AUTOMATICAMENTE] {full_content}"
-                else:
-                    snippet = f"[CONTENUTO IN INGLESE - TRADUCI AUTOMATICAMENTE] {snippet}"
-            
-            if full_content:
-                fact_check_content += f"\n--- FACT-CHECK: {title} ({source}) ---\nQuery: {search_query}\n{full_content}\n"
-            else:
-                fact_check_content += f"\n--- FACT-CHECK: {title} ({source}) ---\nQuery: {search_query}\n{snippet}\n"
-    
-    reliable_content = ""
-    if reliable_results and not reliable_results[0].get('error'):
-        for result in reliable_results[:5]:
-            title = result.get('title', '')
-            snippet = result.get('snippet', '')
-            full_content = result.get('full_content', '')
-            source = result.get('source', '')
-            search_query = result.get('search_query', '')
-            language = result.get('language', 'it')
-            
-            if language == 'en':
-                title = f"[TRADOTTO] {title}"
-                if full_content:
-                    full_content = f"[CONTENUTO IN INGLESE - TRADUCI AUTOMATICAMENTE] {full_content}"
-                else:
-                    snippet = f"[CONTENUTO IN INGLESE - TRADUCI AUTOMATICAMENTE] {snippet}"
-            
-            if full_content:
-                reliable_content += f"\n--- FONTE AFFIDABILE: {title} ({source}) ---\nQuery: {search_query}\n{full_content}\n"
-            else:
-                reliable_content += f"\n--- FONTE AFFIDABILE: {title} ({source}) ---\nQuery: {search_query}\n{snippet}\n"
-    
-    title = article.get('title', 'Testo personalizzato')
-    summary = article.get('summary', '')
-    author = article.get('author', 'Fonte sconosciuta')
-    date = article.get('date', 'Data non disponibile')
-    
-    prompt = (
-        f"Sei un analista di intelligence esperto. Valuta la veridicità di questa notizia.\n\n"
-        f"🔍 NOTIZIA DA VALIDARE:\n"
-        f"📰 Titolo: {title}\n"
-        f"📝 Riassunto: {summary}\n"
-        f"🏢 Fonte: {author}\n"
-        f"📅 Data: {date}\n\n"
-        f"🔎 FONTI DISPONIBILI:\n{fact_check_content}\n\n"
-        f"✅ FONTI AFFIDABILI:\n{reliable_content}\n\n"
+def agent_validazione_verita(article, verification_data, ai_provider, stream=False):
+    builder = PromptBuilder(ai_provider, agent='validazione')
+    add_verification_prefix(builder, article, verification_data)
+    builder.fixed(f"Sei un analista di intelligence esperto. Valuta la veridicità della notizia riportata sopra.\n\n")
+    builder.fixed(
         f"🎯 VALUTAZIONE CRITICA:\n"
         f"1. **VERDETTO**: [VERA] / [FALSA] / [DUBBIA] / [INSUFFICIENTI DATI]\n"
         f"2. **LIVELLO DI CONFIDENZA**: [ALTO 90%+] / [MEDIO 70-90%] / [BASSO <70%]\n"
@@ -308,72 +271,14 @@ def agent_validazione_verita(article, verification_data, ai_provider):
         f"🌐 Se trovi contenuti in inglese, traduci automaticamente le informazioni chiave.\n\n"
         f"Rispondi in modo diretto e critico, evidenziando il verdetto finale."
     )
-    
-    return ai_provider.generate(prompt, max_tokens=800)
+    return _complete(ai_provider, builder.build(), 800, stream)
 
-def agent_verifica_advanced(article, verification_data, ai_provider):
+def agent_verifica_advanced(article, verification_data, ai_provider, stream=False):
     """Agente di verifica con ragionamento complesso step-by-step"""
-    fact_check_results = verification_data.get('fact_check_results', [])
-    reliable_results = verification_data.get('reliable_sources_results', [])
-    
-    fact_check_content = ""
-    if fact_check_results and not fact_check_results[0].get('error'):
-        for result in fact_check_results[:5]:
-            title = result.get('title', '')
-            snippet = result.get('snippet', '')
-            full_content = result.get('full_content', '')
-            source = result.get('source', '')
-            search_query = result.get('search_query', '')
-            language = result.get('language', 'it')
-            
-            if language == 'en':
-                title = f"[TRADOTTO] {title}"
-                if full_content:
-                    full_content = f"[CONTENUTO IN INGLESE - TRADUCI AUTOMATICAMENTE] {full_content}"
-                else:
-                    snippet = f"[CONTENUTO IN INGLESE - TRADUCI AUTOMATICAMENTE] {snippet}"
-            
-            if full_content:
-                fact_check_content += f"\n--- FACT-CHECK: {title} ({source}) ---\nQuery: {search_query}\n{full_content}\n"
-            else:
-                fact_check_content += f"\n--- FACT-CHECK: {title} ({source}) ---\nQuery: {search_query}\n{snippet}\n"
-    
-    reliable_content = ""
-    if reliable_results and not reliable_results[0].get('error'):
-        for result in reliable_results[:5]:
-            title = result.get('title', '')
-            snippet = result.get('snippet', '')
-            full_content = result.get('full_content', '')
-            source = result.get('source', '')
-            search_query = result.get('search_query', '')
-            language = result.get('language', 'it')
-            
-            if language == 'en':
-                title = f"[TRADOTTO] {title}"
-                if full_content:
-                    full_content = f"[CONTENUTO IN INGLESE - TRADUCI AUTOMATICAMENTE] {full_content}"
-                else:
-                    snippet = f"[CONTENUTO IN INGLESE - TRADUCI AUTOMATICAMENTE] {snippet}"
-            
-            if full_content:
-                reliable_content += f"\n--- FONTE AFFIDABILE: {title} ({source}) ---\nQuery: {search_query}\n{full_content}\n"
-            else:
-                reliable_content += f"\n--- FONTE AFFIDABILE: {title} ({source}) ---\nQuery: {search_query}\n{snippet}\n"
-    
-    title = article.get('title', 'Testo personalizzato')
-    summary = article.get('summary', '')
-    author = article.get('author', 'Fonte sconosciuta')
-    date = article.get('date', 'Data non disponibile')
-    
-    prompt = (
-        f"Sei un analista di intelligence esperto con capacità di ragionamento complesso. Analizza la veridicità della seguente notizia usando un approccio step-by-step.\n\n"
-        f"🔍 NOTIZIA DA VERIFICARE:\n"
-        f"📰 Titolo: {title}\n"
-        f"📝 Riassunto: {summary}\n"
-        f"🏢 Fonte: {author}\n"
-        f"📅 Data: {date}\n\n"
-        f"🔎 FONTI DISPONIBILI:\n{fact_check_content}\n\n"
-        f"✅ FONTI AFFIDABILI:\n{reliable_content}\n\n"
+    builder = PromptBuilder(ai_provider, agent='verifica_avanzata')
+    add_verification_prefix(builder, article, verification_data)
+    builder.fixed(f"Sei un analista di intelligence esperto con capacità di ragionamento complesso. Analizza la veridicità della notizia riportata sopra usando un approccio step-by-step.\n\n")
+    builder.fixed(
         f"🧠 RAGIONAMENTO STEP-BY-STEP:\n\n"
         f"**STEP 1: ANALISI INIZIALE**\n"
         f"Pensa ad alta voce:\n"
@@ -432,72 +337,14 @@ def agent_verifica_advanced(article, verification_data, ai_provider):
         f"🌐 Se trovi contenuti in inglese, traduci automaticamente le informazioni chiave.\n\n"
         f"Rispondi in italiano con un ragionamento strutturato e dettagliato."
     )
-    
-    return ai_provider.generate(prompt, max_tokens=1500)
+    return _complete(ai_provider, builder.build(), 1500, stream)
 
-def agent_validazione_verita_advanced(article, verification_data, ai_provider):
+def agent_validazione_verita_advanced(article, verification_data, ai_provider, stream=False):
     """Agente di validazione verità con ragionamento complesso step-by-step"""
-    fact_check_results = verification_data.get('fact_check_results', [])
-    reliable_results = verification_data.get('reliable_sources_results', [])
-    
-    fact_check_content = ""
-    if fact_check_results and not fact_check_results[0].get('error'):
-        for result in fact_check_results[:5]:
-            title = result.get('title', '')
-            snippet = result.get('snippet', '')
-            full_content = result.get('full_content', '')
-            source = result.get('source', '')
-            search_query = result.get('search_query', '')
-            language = result.get('language', 'it')
-            
-            if language == 'en':
-                title = f"[TRADOTTO] {title}"
-                if full_content:
-                    full_content = f"[CONTENUTO IN INGLESE - TRADUCI AUTOMATICAMENTE] {full_content}"
-                else:
-                    snippet = f"[CONTENUTO IN INGLESE - TRADUCI AUTOMATICAMENTE] {snippet}"
-            
-            if full_content:
-                fact_check_content += f"\n--- FACT-CHECK: {title} ({source}) ---\nQuery: {search_query}\n{full_content}\n"
-            else:
-                fact_check_content += f"\n--- FACT-CHECK: {title} ({source}) ---\nQuery: {search_query}\n{snippet}\n"
-    
-    reliable_content = ""
-    if reliable_results and not reliable_results[0].get('error'):
-        for result in reliable_results[:5]:
-            title = result.get('title', '')
-            snippet = result.get('snippet', '')
-            full_content = result.get('full_content', '')
-            source = result.get('source', '')
-            search_query = result.get('search_query', '')
-            language = result.get('language', 'it')
-            
-            if language == 'en':
-                title = f"[TRADOTTO] {title}"
-                if full_content:
-                    full_content = f"[CONTENUTO IN INGLESE - TRADUCI AUTOMATICAMENTE] {full_content}"
-                else:
-                    snippet = f"[CONTENUTO IN INGLESE - TRADUCI AUTOMATICAMENTE] {snippet}"
-            
-            if full_content:
-                reliable_content += f"\n--- FONTE AFFIDABILE: {title} ({source}) ---\nQuery: {search_query}\n{full_content}\n"
-            else:
-                reliable_content += f"\n--- FONTE AFFIDABILE: {title} ({source}) ---\nQuery: {search_query}\n{snippet}\n"
-    
-    title = article.get('title', 'Testo personalizzato')
-    summary = article.get('summary', '')
-    author = article.get('author', 'Fonte sconosciuta')
-    date = article.get('date', 'Data non disponibile')
-    
-    prompt = (
-        f"Sei un analista di intelligence esperto. Valuta la veridicità di questa notizia usando un ragionamento step-by-step approfondito.\n\n"
-        f"🔍 NOTIZIA DA VALIDARE:\n"
-        f"📰 Titolo: {title}\n"
-        f"📝 Riassunto: {summary}\n"
-        f"🏢 Fonte: {author}\n"
-        f"📅 Data: {date}\n\n"
-        f"🔎 FONTI DISPONIBILI:\n{fact_check_content}\n\n"
-        f"✅ FONTI AFFIDABILI:\n{reliable_content}\n\n"
+    builder = PromptBuilder(ai_provider, agent='validazione_avanzata')
+    add_verification_prefix(builder, article, verification_data)
+    builder.fixed(f"Sei un analista di intelligence esperto. Valuta la veridicità della notizia riportata sopra usando un ragionamento step-by-step approfondito.\n\n")
+    builder.fixed(
         f"🧠 RAGIONAMENTO STRUTTURATO:\n\n"
         f"**STEP 1: DECOMPOSIZIONE DEL PROBLEMA**\n"
         f"Pensa ad alta voce:\n"
@@ -558,5 +405,4 @@ def agent_validazione_verita_advanced(article, verification_data, ai_provider):
         f"🌐 Se trovi contenuti in inglese, traduci automaticamente.\n\n"
         f"Rispondi in italiano con un ragionamento strutturato e dettagliato."
     )
-    
-    return ai_provider.generate(prompt, max_tokens=1200)
+    return _complete(ai_provider, builder.build(), 1200, stream)
@@ -1,41 +1,179 @@
 #!/usr/bin/env python
 
-import requests
+import asyncio
 import json
+import queue
+import statistics
+import threading
+import time
+from collections import deque
 from abc import ABC, abstractmethod
+from .transport import transport, async_transport
+from .cache import ResponseCache, prompt_cache
+from .settings import get_bool
 
 class AIProvider(ABC):
     @abstractmethod
     def generate(self, prompt: str, max_tokens: int = 2048) -> str:
         pass
+    
+    async def agenerate(self, prompt: str, max_tokens: int = 2048) -> str:
+        """Versione asincrona di generate; di default esegue generate in un thread"""
+        return await asyncio.to_thread(self.generate, prompt, max_tokens)
+    
+    def stream(self, prompt: str, max_tokens: int = 2048, cancel: threading.Event = None):
+        """Genera la risposta un pezzo alla volta; di default in un unico blocco.
+        
+        cancel, se indicato, chiede di fermare lo stream prima della fine: i
+        provider che ricevono la risposta a pezzi lo controllano a ogni pezzo.
+        """
+        yield self.generate(prompt, max_tokens)
+    
+    async def astream(self, prompt: str, max_tokens: int = 2048):
+        """Versione asincrona di stream.
+        
+        Lo stream sincrono gira in un thread e passa i token all'event loop, così
+        fallback, duplicazione delle richieste e cache valgono anche qui. Chiudere
+        il generatore ferma lo stream al token successivo.
+        """
+        loop = asyncio.get_running_loop()
+        tokens = asyncio.Queue()
+        stop = threading.Event()
+        
+        def put(item) -> bool:
+            try:
+                loop.call_soon_threadsafe(tokens.put_nowait, item)
+                return True
+            except RuntimeError:
+                # Event loop già chiuso
+                return False
+        
+        def pump():
+            generator = self.stream(prompt, max_tokens)
+            try:
+                for token in generator:
+                    if stop.is_set() or not put(('token', token)):
+                        return
+                put(('end', None))
+            except Exception as e:
+                put(('error', e))
+            finally:
+                generator.close()
+        
+        threading.Thread(target=pump, daemon=True).start()
+        try:
+            while True:
+                kind, value = await tokens.get()
+                if kind == 'end':
+                    return
+                if kind == 'error':
+                    raise value
+                yield value
+        finally:
+            stop.set()
+
+class HTTPAIProvider(AIProvider):
+    """Base per i provider HTTP: generate e agenerate condividono costruzione
+    della richiesta e parsing della risposta, cambia solo il trasporto."""
+    
+    name = "AI"
+    timeout = 60
+    
+    @abstractmethod
+    def _build_request(self, prompt: str, max_tokens: int, stream: bool = False):
+        """Restituisce (payload, headers) per la richiesta"""
+    
+    @abstractmethod
+    def _parse_response(self, data: dict) -> str:
+        pass
+    
+    @abstractmethod
+    def _parse_stream_line(self, line: str):
+        """Estrae il testo da una riga dello stream, None se la riga non ne contiene"""
+    
+    def generate(self, prompt: str, max_tokens: int = 2048) -> str:
+        payload, headers = self._build_request(prompt, max_tokens)
+        try:
+            response = transport.post(self.url, json=payload, headers=headers, timeout=self.timeout)
+            response.raise_for_status()
+            return self._parse_response(response.json())
+        except Exception as e:
+            raise Exception(f"Errore chiamando {self.name}: {e}")
+    
+    async def agenerate(self, prompt: str, max_tokens: int = 2048) -> str:
+        payload, headers = self._build_request(prompt, max_tokens)
+        try:
+            response = await async_transport.post(self.url, json=payload, headers=headers, timeout=self.timeout)
+            response.raise_for_status()
+            return self._parse_response(response.json())
+        except Exception as e:
+            raise Exception(f"Errore chiamando {self.name}: {e}")
+    
+    def stream(self, prompt: str, max_tokens: int = 2048, cancel: threading.Event = None):
+        """Restituisce i token man mano che arrivano; chiudere il generatore annulla la richiesta.
+        
+        cancel viene controllato a ogni riga ricevuta, anche quelle senza testo,
+        così una richiesta che ha perso la gara si ferma prima del primo token.
+        """
+        payload, headers = self._build_request(prompt, max_tokens, stream=True)
+        try:
+            response = transport.post(self.url, json=payload, headers=headers, timeout=self.timeout, stream=True)
+            response.raise_for_status()
+        except Exception as e:
+            raise Exception(f"Errore chiamando {self.name}: {e}")
+        try:
+            for raw_line in response.iter_lines():
+                if cancel is not None and cancel.is_set():
+                    return
+                if not raw_line:
+                    continue
+                token = self._parse_stream_line(raw_line.decode('utf-8', errors='replace'))
+                if token:
+                    yield token
+        finally:
+            response.close()
 
-class OllamaProvider(AIProvider):
-    def __init__(self, model: str, url: str):
+class OllamaProvider(HTTPAIProvider):
+    name = "Ollama"
+    timeout = 120
+    
+    def __init__(self, model: str, url: str, keep_alive: str = None):
         self.model = model
         self.url = url
+        # Tiene il modello caricato tra una chiamata e l'altra: Ollama riusa
+        # così la cache KV del prefisso comune ai prompt degli agenti
+        self.keep_alive = keep_alive
     
-    def generate(self, prompt: str, max_tokens: int = 2048) -> str:
+    def _build_request(self, prompt: str, max_tokens: int, stream: bool = False):
         payload = {
             "model": self.model,
             "prompt": prompt,
-            "stream": False,
+            "stream": stream,
             "options": {"num_predict": max_tokens}
         }
-        try:
-            response = requests.post(self.url, json=payload, timeout=120)
-            response.raise_for_status()
-            data = response.json()
-            return data.get("response", "[Nessuna risposta da Ollama]")
-        except Exception as e:
-            raise Exception(f"Errore chiamando Ollama: {e}")
+        if self.keep_alive:
+            payload["keep_alive"] = self.keep_alive
+        return payload, {}
+    
+    def _parse_response(self, data: dict) -> str:
+        return data.get("response", "[Nessuna risposta da Ollama]")
+    
+    def _parse_stream_line(self, line: str):
+        # Ollama invia un oggetto JSON per riga; gli errori a stream iniziato arrivano come {"error": ...}
+        data = json.loads(line)
+        if data.get("error"):
+            raise Exception(data["error"])
+        return data.get("response")
 
-class OpenAIProvider(AIProvider):
+class OpenAIProvider(HTTPAIProvider):
+    name = "OpenAI"
+    
     def __init__(self, api_key: str, model: str):
         self.api_key = api_key
         self.model = model
         self.url = "https://api.openai.com/v1/chat/completions"
     
-    def generate(self, prompt: str, max_tokens: int = 2048) -> str:
+    def _build_request(self, prompt: str, max_tokens: int, stream: bool = False):
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
@@ -45,21 +183,32 @@ class OpenAIProvider(AIProvider):
             "messages": [{"role": "user", "content": prompt}],
             "max_tokens": max_tokens
         }
-        try:
-            response = requests.post(self.url, json=payload, headers=headers, timeout=60)
-            response.raise_for_status()
-            data = response.json()
-            return data["choices"][0]["message"]["content"]
-        except Exception as e:
-            raise Exception(f"Errore chiamando OpenAI: {e}")
+        if stream:
+            payload["stream"] = True
+        return payload, headers
+    
+    def _parse_response(self, data: dict) -> str:
+        return data["choices"][0]["message"]["content"]
+    
+    def _parse_stream_line(self, line: str):
+        # Server-sent events: "data: {...}", chiuso da "data: [DONE]"
+        if not line.startswith("data:"):
+            return None
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return None
+        choices = json.loads(data).get("choices") or [{}]
+        return choices[0].get("delta", {}).get("content")
 
-class ClaudeProvider(AIProvider):
+class ClaudeProvider(HTTPAIProvider):
+    name = "Claude"
+    
     def __init__(self, api_key: str, model: str):
         self.api_key = api_key
         self.model = model
         self.url = "https://api.anthropic.com/v1/messages"
     
-    def generate(self, prompt: str, max_tokens: int = 2048) -> str:
+    def _build_request(self, prompt: str, max_tokens: int, stream: bool = False):
         headers = {
             "x-api-key": self.api_key,
             "Content-Type": "application/json",
@@ -68,50 +217,616 @@ class ClaudeProvider(AIProvider):
         payload = {
             "model": self.model,
             "max_tokens": max_tokens,
-            "messages": [{"role": "user", "content": prompt}]
+            "messages": [{"role": "user", "content": self._content(prompt)}]
         }
-        try:
-            response = requests.post(self.url, json=payload, headers=headers, timeout=60)
-            response.raise_for_status()
-            data = response.json()
-            return data["content"][0]["text"]
-        except Exception as e:
-            raise Exception(f"Errore chiamando Claude: {e}")
+        if stream:
+            payload["stream"] = True
+        return payload, headers
+    
+    @staticmethod
+    def _content(prompt: str):
+        """Con un prefisso condiviso (PrefixedPrompt) lo marca per la cache del prompt di Anthropic"""
+        prefix = getattr(prompt, 'prefix', '')
+        if not prefix:
+            return prompt
+        return [
+            {"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": prompt[len(prefix):]},
+        ]
+    
+    def _parse_response(self, data: dict) -> str:
+        return data["content"][0]["text"]
+    
+    def _parse_stream_line(self, line: str):
+        # Server-sent events: il testo arriva negli eventi content_block_delta
+        if not line.startswith("data:"):
+            return None
+        event = json.loads(line[5:].strip())
+        if event.get("type") == "error":
+            raise Exception(event.get("error", {}).get("message", "errore nello stream"))
+        if event.get("type") == "content_block_delta":
+            return event.get("delta", {}).get("text")
+        return None
+
+class ProviderHealth:
+    """Circuit breaker e statistiche recenti di un provider.
+    
+    Dopo `failure_threshold` errori consecutivi il circuito si apre e il provider
+    viene saltato; passato `cooldown` secondi una sola richiesta di prova
+    (half-open) decide se richiuderlo o riaprirlo. Le statistiche usate per
+    l'ordinamento scadono dopo `horizon` secondi, così un provider retrocesso
+    torna al suo posto quando non ci sono dati recenti.
+    """
+    
+    CLOSED = "chiuso"
+    OPEN = "aperto"
+    HALF_OPEN = "in prova"
+    
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 60,
+                 window: int = 20, horizon: float = 600):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.horizon = horizon
+        self._probing = False
+        # (istante, esito, latenza) delle ultime chiamate
+        self._history = deque(maxlen=window)
+        self._lock = threading.Lock()
+    
+    def allow(self) -> bool:
+        """True se il provider può ricevere una richiesta adesso"""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.cooldown:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN:
+                # Una sola richiesta di prova alla volta
+                if self._probing:
+                    return False
+                self._probing = True
+            return True
+    
+    def record_success(self, latency: float):
+        with self._lock:
+            self._history.append((time.monotonic(), True, latency))
+            self.failures = 0
+            self.state = self.CLOSED
+            self._probing = False
+    
+    def record_failure(self):
+        with self._lock:
+            self._history.append((time.monotonic(), False, None))
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+            self._probing = False
+    
+    def _recent(self):
+        """Chiamate entro horizon; va chiamata tenendo il lock"""
+        cutoff = time.monotonic() - self.horizon
+        while self._history and self._history[0][0] < cutoff:
+            self._history.popleft()
+        return list(self._history)
+    
+    def _success_rate(self) -> float:
+        # Senza storico recente il provider è considerato sano
+        recent = self._recent()
+        return sum(ok for _, ok, _ in recent) / len(recent) if recent else 1.0
+    
+    @property
+    def success_rate(self) -> float:
+        with self._lock:
+            return self._success_rate()
+    
+    def release(self):
+        """Libera la richiesta di prova di una chiamata annullata senza esito"""
+        with self._lock:
+            self._probing = False
+    
+    def _latencies(self):
+        return sorted(latency for _, ok, latency in self._recent() if ok)
+    
+    def _p50(self):
+        latencies = self._latencies()
+        return statistics.median(latencies) if latencies else None
+    
+    @property
+    def p50(self):
+        with self._lock:
+            return self._p50()
+    
+    def percentile(self, q: float, min_samples: int = 1):
+        """Percentile q (0-100) delle latenze recenti, None con meno di min_samples campioni"""
+        with self._lock:
+            latencies = self._latencies()
+        if len(latencies) < max(min_samples, 1):
+            return None
+        index = min(len(latencies) - 1, int(round(q / 100 * (len(latencies) - 1))))
+        return latencies[index]
+    
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'state': self.state,
+                'failures': self.failures,
+                'success_rate': self._success_rate(),
+                'p50': self._p50(),
+                'calls': len(self._recent()),
+            }
 
 class FallbackAIProvider(AIProvider):
-    """Provider con fallback automatico tra diversi servizi AI"""
+    """Provider con fallback automatico tra diversi servizi AI.
+    
+    I provider vengono provati in ordine di salute (tasso di successo recente,
+    poi latenza mediana, poi ordine configurato); quelli con circuito aperto
+    vengono saltati finché non scade il cooldown.
+    
+    Con hedge=True, se il provider scelto non risponde entro il percentile
+    `hedge_percentile` delle sue latenze recenti la stessa richiesta parte anche
+    verso il successivo: vince il primo che risponde e l'altro viene annullato.
+    `hedge_max_rate` limita la quota di chiamate duplicate (e quindi il costo).
+    Nelle chiamate sincrone i tentativi duplicati girano in thread separati e
+    la risposta del vincitore torna subito, senza aspettare il perdente.
+    """
     
-    def __init__(self, providers: list):
+    HEDGE_MIN_SAMPLES = 5  # Latenze necessarie prima di stimare il percentile
+    
+    def __init__(self, providers: list, failure_threshold: int = 3, cooldown: float = 60,
+                 hedge: bool = False, hedge_percentile: float = 90, hedge_max_rate: float = 0.2):
         self.providers = providers
+        self.health = [ProviderHealth(failure_threshold, cooldown) for _ in providers]
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_max_rate = hedge_max_rate
+        self.hedge_counts = {'calls': 0, 'hedged': 0, 'hedge_wins': 0}
+        self._hedge_lock = threading.Lock()
+    
+    def _candidates(self):
+        """Indici dei provider nell'ordine in cui provarli"""
+        def rank(i):
+            health = self.health[i]
+            p50 = health.p50
+            # Il tasso di successo è arrotondato per non rimescolare l'ordine a ogni chiamata
+            return (-round(health.success_rate, 1), p50 if p50 is not None else float('inf'), i)
+        return sorted(range(len(self.providers)), key=rank)
+    
+    def _name(self, i: int) -> str:
+        cls = self.providers[i].__class__
+        # Più provider della stessa classe (per esempio due endpoint OpenAI) si distinguono per posizione
+        if sum(provider.__class__ is cls for provider in self.providers) > 1:
+            return f"{cls.__name__} #{i + 1}"
+        return cls.__name__
+    
+    def _skip(self, i: int) -> bool:
+        if self.health[i].allow():
+            return False
+        print(f"⏭️ {self._name(i)} saltato: circuito aperto")
+        return True
+    
+    def _succeeded(self, i: int, start: float):
+        self.health[i].record_success(time.perf_counter() - start)
+        print(f"✅ Successo con {self._name(i)}")
+    
+    def _check(self, i: int, start: float, result: str):
+        """Registra l'esito di una risposta; restituisce il testo o None se è un errore"""
+        if not result.startswith("[Errore"):
+            self._succeeded(i, start)
+            return result
+        self.health[i].record_failure()
+        print(f"❌ Fallito con {self._name(i)}: {result}")
+        return None
+    
+    def _failed(self, i: int, error: Exception):
+        self.health[i].record_failure()
+        print(f"❌ Errore con {self._name(i)}: {error}")
+    
+    def _count(self, key: str):
+        with self._hedge_lock:
+            self.hedge_counts[key] += 1
+    
+    def _hedge_delay(self, i: int):
+        """Secondi da attendere prima di duplicare la richiesta, None se non va duplicata"""
+        if not self.hedge:
+            return None
+        with self._hedge_lock:
+            counts = self.hedge_counts
+            if counts['hedged'] + 1 > self.hedge_max_rate * counts['calls']:
+                return None
+        return self.health[i].percentile(self.hedge_percentile, self.HEDGE_MIN_SAMPLES)
+    
+    def _take_backup(self, order: list):
+        """Toglie da order il primo provider disponibile per la richiesta duplicata"""
+        for j in order:
+            if self.health[j].allow():
+                order.remove(j)
+                return j
+        return None
+    
+    def _start_hedge(self, i: int, j: int, delay: float):
+        self._count('hedged')
+        print(f"⏱️ {self._name(i)} oltre {delay:.1f}s: richiesta duplicata su {self._name(j)}")
     
     def generate(self, prompt: str, max_tokens: int = 2048) -> str:
-        for i, provider in enumerate(self.providers):
+        self._count('calls')
+        order = self._candidates()
+        total = len(order)
+        while order:
+            i = order.pop(0)
+            if self._skip(i):
+                continue
+            print(f"Tentativo {total - len(order)}/{total} con {self._name(i)}...")
+            result = self._race(i, order, prompt, max_tokens)
+            if result is not None:
+                return result
+        
+        # Se tutti i provider falliscono
+        return "[Errore: Tutti i provider AI sono non disponibili. Riprova più tardi.]"
+    
+    def _attempt(self, i: int, prompt: str, max_tokens: int, lost: threading.Event = None):
+        """Chiama il provider i e ne registra l'esito; None se fallisce.
+        
+        Nella gara (lost indicato) la risposta arriva con stream(cancel=lost): se
+        nel frattempo ha vinto un'altra richiesta, quella HTTP si ferma alla riga
+        successiva e chiude la connessione. L'esito del perdente non conta: viene
+        solo liberata l'eventuale richiesta di prova.
+        """
+        start = time.perf_counter()
+        settled = False
+        try:
             try:
-                print(f"Tentativo {i+1}/{len(self.providers)} con {provider.__class__.__name__}...")
-                result = provider.generate(prompt, max_tokens)
-                
-                # Se non c'è errore, restituisci il risultato
-                if not result.startswith("[Errore"):
-                    print(f"✅ Successo con {provider.__class__.__name__}")
-                    return result
+                if lost is None:
+                    result = self.providers[i].generate(prompt, max_tokens)
                 else:
-                    print(f"❌ Fallito con {provider.__class__.__name__}: {result}")
-                    
+                    result = ''.join(self.providers[i].stream(prompt, max_tokens, cancel=lost))
             except Exception as e:
-                print(f"❌ Errore con {provider.__class__.__name__}: {e}")
+                if lost is not None and lost.is_set():
+                    return None
+                settled = True
+                self._failed(i, e)
+                return None
+            if lost is not None and lost.is_set():
+                return None
+            settled = True
+            return self._check(i, start, result)
+        finally:
+            # Interruzioni (Ctrl+C) e richieste perdenti non decidono la prova half-open
+            if not settled:
+                self.health[i].release()
+    
+    def _race(self, i: int, order: list, prompt: str, max_tokens: int):
+        """Versione sincrona di _arace.
+        
+        I tentativi girano in thread daemon che consegnano l'esito a una coda:
+        un perdente bloccato sulla rete non ritarda né la risposta né l'uscita
+        del programma, e si ferma appena la sua risposta manda un'altra riga.
+        """
+        delay = self._hedge_delay(i)
+        if delay is None:
+            return self._attempt(i, prompt, max_tokens)
+        results = queue.Queue()
+        lost = {}
+        
+        def launch(k: int):
+            lost[k] = threading.Event()
+            threading.Thread(
+                target=lambda: results.put((k, self._attempt(k, prompt, max_tokens, lost[k]))),
+                daemon=True
+            ).start()
+        
+        launch(i)
+        running = 1
+        backup = None
+        try:
+            while running:
+                try:
+                    k, result = results.get(timeout=delay if backup is None else None)
+                except queue.Empty:
+                    backup = self._take_backup(order)
+                    if backup is None:
+                        # Nessun provider per la duplicazione: si attende solo il primo
+                        backup = -1
+                        continue
+                    self._start_hedge(i, backup, delay)
+                    launch(backup)
+                    running += 1
+                    continue
+                running -= 1
+                if result is not None:
+                    if k == backup:
+                        self._count('hedge_wins')
+                    return result
+            return None
+        finally:
+            for event in lost.values():
+                event.set()
+    
+    async def agenerate(self, prompt: str, max_tokens: int = 2048) -> str:
+        self._count('calls')
+        order = self._candidates()
+        total = len(order)
+        while order:
+            i = order.pop(0)
+            if self._skip(i):
                 continue
+            print(f"Tentativo {total - len(order)}/{total} con {self._name(i)}...")
+            result = await self._arace(i, order, prompt, max_tokens)
+            if result is not None:
+                return result
         
-        # Se tutti i provider falliscono
         return "[Errore: Tutti i provider AI sono non disponibili. Riprova più tardi.]"
+    
+    async def _aattempt(self, i: int, prompt: str, max_tokens: int):
+        start = time.perf_counter()
+        settled = False
+        try:
+            try:
+                result = await self.providers[i].agenerate(prompt, max_tokens)
+            except Exception as e:
+                settled = True
+                self._failed(i, e)
+                return None
+            settled = True
+            return self._check(i, start, result)
+        finally:
+            # Annullamento (CancelledError) e interruzioni liberano la richiesta di prova
+            if not settled:
+                self.health[i].release()
+    
+    async def _arace(self, i: int, order: list, prompt: str, max_tokens: int):
+        """Chiama il provider i, duplicando la richiesta sul successivo se tarda"""
+        primary = asyncio.ensure_future(self._aattempt(i, prompt, max_tokens))
+        delay = self._hedge_delay(i)
+        if delay is None:
+            return await primary
+        try:
+            return await asyncio.wait_for(asyncio.shield(primary), delay)
+        except asyncio.TimeoutError:
+            pass
+        j = self._take_backup(order)
+        if j is None:
+            return await primary
+        self._start_hedge(i, j, delay)
+        tasks = {primary: i, asyncio.ensure_future(self._aattempt(j, prompt, max_tokens)): j}
+        while tasks:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                winner = tasks.pop(task)
+                result = task.result()
+                if result is not None:
+                    for loser in tasks:
+                        loser.cancel()
+                    if winner == j:
+                        self._count('hedge_wins')
+                    return result
+        return None
+    
+    def stream(self, prompt: str, max_tokens: int = 2048, cancel: threading.Event = None):
+        self._count('calls')
+        order = self._candidates()
+        total = len(order)
+        while order:
+            i = order.pop(0)
+            if self._skip(i):
+                continue
+            print(f"Tentativo {total - len(order)}/{total} con {self._name(i)}...")
+            delay = self._hedge_delay(i)
+            if delay is not None:
+                if (yield from self._stream_race(i, order, prompt, max_tokens, delay, cancel)):
+                    return
+                continue
+            started = False
+            failed = False
+            start = time.perf_counter()
+            try:
+                for token in self.providers[i].stream(prompt, max_tokens, cancel=cancel):
+                    if not started:
+                        # Per lo stream conta il tempo al primo token
+                        self._succeeded(i, start)
+                        started = True
+                    yield token
+                return
+            except Exception as e:
+                failed = True
+                self._failed(i, e)
+                # Dopo il primo token non si può più ripartire con un altro provider
+                if started:
+                    raise
+                continue
+            finally:
+                # Stream chiuso o interrotto prima del primo token: nessun esito
+                if not started and not failed:
+                    self.health[i].release()
+        
+        yield "[Errore: Tutti i provider AI sono non disponibili. Riprova più tardi.]"
+    
+    def _stream_race(self, i: int, order: list, prompt: str, max_tokens: int, delay: float,
+                     cancel: threading.Event = None):
+        """Stream del provider i, duplicato sul successivo se il primo token tarda.
+        
+        Ogni stream gira in un thread che passa i token a una coda; vince il primo
+        che produce un token e gli altri si fermano alla riga successiva. cancel
+        ferma la gara al token successivo. Restituisce True se uno dei provider
+        ha risposto.
+        """
+        events = queue.Queue()
+        stop = {}
+        
+        def pump(k: int):
+            start = time.perf_counter()
+            # stop[k] ferma anche uno stream che non ha ancora prodotto token
+            tokens = self.providers[k].stream(prompt, max_tokens, cancel=stop[k])
+            try:
+                for token in tokens:
+                    if stop[k].is_set():
+                        return
+                    events.put((k, 'token', token, start))
+                events.put((k, 'end', None, start))
+            except Exception as e:
+                events.put((k, 'error', e, start))
+            finally:
+                tokens.close()
+        
+        def launch(k: int):
+            stop[k] = threading.Event()
+            threading.Thread(target=pump, args=(k,), daemon=True).start()
+        
+        launch(i)
+        running = {i}
+        backup = None
+        winner = None
+        try:
+            while running:
+                try:
+                    wait = delay if backup is None and winner is None else None
+                    k, kind, value, start = events.get(timeout=wait)
+                except queue.Empty:
+                    backup = self._take_backup(order)
+                    if backup is None:
+                        # Nessun provider per la duplicazione: si attende solo il primo
+                        backup = -1
+                        continue
+                    self._start_hedge(i, backup, delay)
+                    launch(backup)
+                    running.add(backup)
+                    continue
+                if winner is None and kind != 'error':
+                    winner = k
+                    self._succeeded(k, start)
+                    if k == backup:
+                        self._count('hedge_wins')
+                    for other in running - {k}:
+                        stop[other].set()
+                        self.health[other].release()
+                    running = {k}
+                if kind == 'error':
+                    if k == winner:
+                        self._failed(k, value)
+                        raise value
+                    if k in running:
+                        running.discard(k)
+                        self._failed(k, value)
+                    continue
+                if k != winner:
+                    continue
+                if kind == 'end' or (cancel is not None and cancel.is_set()):
+                    return True
+                yield value
+            return False
+        finally:
+            for event in stop.values():
+                event.set()
+            # Stream ancora in corso senza esito (generatore chiuso, Ctrl+C)
+            for k in running - {winner}:
+                self.health[k].release()
+    
+    def health_stats(self) -> dict:
+        """Stato del circuit breaker e statistiche recenti per provider"""
+        return {self._name(i): health.stats() for i, health in enumerate(self.health)}
+    
+    def hedge_stats(self) -> dict:
+        """Chiamate totali, chiamate duplicate e vittorie del provider di riserva"""
+        with self._hedge_lock:
+            counts = dict(self.hedge_counts)
+        counts['hedge_rate'] = counts['hedged'] / counts['calls'] if counts['calls'] else 0.0
+        counts['enabled'] = self.hedge
+        return counts
+
+class CachingAIProvider(AIProvider):
+    """Provider che memorizza le risposte di un altro provider.
+    
+    La chiave è l'hash di (classe del provider, modello, prompt, max_tokens); avvolgendo
+    un FallbackAIProvider una risposta in cache evita l'intera catena di fallback.
+    Le risposte di errore non vengono memorizzate.
+    """
+    
+    def __init__(self, provider: AIProvider, cache: ResponseCache = None, bypass: bool = False):
+        self.provider = provider
+        self.cache = cache if cache is not None else prompt_cache
+        # Con bypass=True le chiamate vanno sempre al provider e la cache non viene aggiornata
+        self.bypass = bypass
+        if hasattr(provider, 'model'):
+            self.model = provider.model
+    
+    @staticmethod
+    def _identity(provider):
+        if isinstance(provider, CachingAIProvider):
+            return CachingAIProvider._identity(provider.provider)
+        if isinstance(provider, FallbackAIProvider):
+            return [CachingAIProvider._identity(p) for p in provider.providers]
+        return [provider.__class__.__name__, getattr(provider, 'model', None), getattr(provider, 'url', None)]
+    
+    def _key(self, prompt: str, max_tokens: int) -> str:
+        return ResponseCache.make_key(self._identity(self.provider), prompt, max_tokens)
+    
+    def _lookup(self, key: str, prompt: str):
+        result = self.cache.get(key)
+        if result is not None:
+            self.cache.record_saved(len(prompt.encode('utf-8')) + len(result.encode('utf-8')))
+        return result
+    
+    def _store(self, key: str, result: str):
+        if result and not result.startswith("[Errore"):
+            self.cache.set(key, result)
+    
+    def generate(self, prompt: str, max_tokens: int = 2048) -> str:
+        if self.bypass:
+            return self.provider.generate(prompt, max_tokens)
+        key = self._key(prompt, max_tokens)
+        result = self._lookup(key, prompt)
+        if result is None:
+            result = self.provider.generate(prompt, max_tokens)
+            self._store(key, result)
+        return result
+    
+    async def agenerate(self, prompt: str, max_tokens: int = 2048) -> str:
+        if self.bypass:
+            return await self.provider.agenerate(prompt, max_tokens)
+        key = self._key(prompt, max_tokens)
+        result = self._lookup(key, prompt)
+        if result is None:
+            result = await self.provider.agenerate(prompt, max_tokens)
+            self._store(key, result)
+        return result
+    
+    def stream(self, prompt: str, max_tokens: int = 2048, cancel: threading.Event = None):
+        if self.bypass:
+            yield from self.provider.stream(prompt, max_tokens, cancel=cancel)
+            return
+        key = self._key(prompt, max_tokens)
+        result = self._lookup(key, prompt)
+        if result is not None:
+            yield result
+            return
+        # Si memorizza solo uno stream arrivato fino in fondo, non uno annullato
+        tokens = []
+        for token in self.provider.stream(prompt, max_tokens, cancel=cancel):
+            tokens.append(token)
+            yield token
+        if cancel is None or not cancel.is_set():
+            self._store(key, ''.join(tokens))
+    
+    def stats(self) -> dict:
+        return self.cache.stats()
 
 def create_ai_provider(provider: str, settings: dict) -> AIProvider:
-    """Factory per creare il provider AI appropriato con fallback automatico"""
+    """Factory per creare il provider AI appropriato con fallback automatico e cache delle risposte"""
+    ai_provider = _create_base_provider(provider, settings)
+    if get_bool(settings, 'ai_cache_enabled', True):
+        return CachingAIProvider(ai_provider, bypass=get_bool(settings, 'ai_cache_bypass', False))
+    return ai_provider
+
+def _create_base_provider(provider: str, settings: dict) -> AIProvider:
     
     # Se è specificato un provider specifico, usa solo quello
     if provider == "ollama":
         model = settings.get("model", "qwen2:7b-instruct")
         url = settings.get("ollama_url", "http://localhost:11434/api/generate")
-        return OllamaProvider(model, url)
+        return OllamaProvider(model, url, settings.get("ollama_keep_alive"))
     
     elif provider == "openai":
         api_key = settings.get("openai_api_key")
@@ -134,7 +849,7 @@ def create_ai_provider(provider: str, settings: dict) -> AIProvider:
             if settings.get("ollama_url"):
                 model = settings.get("model", "qwen2:7b-instruct")
                 url = settings.get("ollama_url", "http://localhost:11434/api/generate")
-                available_providers.append(OllamaProvider(model, url))
+                available_providers.append(OllamaProvider(model, url, settings.get("ollama_keep_alive")))
         except:
             pass
         
@@ -161,4 +876,11 @@ def create_ai_provider(provider: str, settings: dict) -> AIProvider:
             return available_providers[0]
         
         print(f"🔄 Configurato fallback automatico tra {len(available_providers)} provider AI")
-        return FallbackAIProvider(available_providers) 
\ No newline at end of file
+        return FallbackAIProvider(
+            available_providers,
+            failure_threshold=int(settings.get("ai_breaker_failures", 3)),
+            cooldown=float(settings.get("ai_breaker_cooldown", 60)),
+            hedge=get_bool(settings, "ai_hedge", False),
+            hedge_percentile=float(settings.get("ai_hedge_percentile", 90)),
+            hedge_max_rate=float(settings.get("ai_hedge_max_rate", 0.2)),
+        )
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+
+import sys
+from collections.abc import Mapping
+
+class Article(Mapping):
+    """Record compatto di un articolo.
+
+    Usa __slots__ invece di un dict per istanza, ma si comporta come un dict in
+    lettura (article['title'], article.get('content', ''), dict(article)) e
+    accetta article['campo'] = valore per i campi noti. Il nome della testata
+    viene internato: in un feed le stesse fonti si ripetono per migliaia di articoli.
+    """
+
+    __slots__ = ('title', 'date', 'author', 'summary', 'link', 'guid', 'content')
+    FIELDS = __slots__
+    _FIELD_SET = frozenset(__slots__)
+
+    def __init__(self, title: str = '', date: str = '', author: str = '', summary: str = '',
+                 link: str = '', guid: str = '', content: str = ''):
+        self.title = title
+        self.date = date
+        self.author = sys.intern(author)
+        self.summary = summary
+        self.link = link
+        self.guid = guid
+        self.content = content
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> 'Article':
+        if isinstance(data, cls):
+            return data
+        return cls(**{key: data[key] for key in cls.FIELDS if key in data})
+
+    def __getitem__(self, key: str):
+        if key in self._FIELD_SET:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value):
+        if key not in self._FIELD_SET:
+            raise KeyError(f"Campo articolo sconosciuto: {key}")
+        setattr(self, key, sys.intern(value) if key == 'author' else value)
+
+    def get(self, key: str, default=None):
+        if key in self._FIELD_SET:
+            return getattr(self, key)
+        return default
+
+    def __contains__(self, key) -> bool:
+        return key in self._FIELD_SET
+
+    def __iter__(self):
+        return iter(self.FIELDS)
+
+    def __len__(self) -> int:
+        return len(self.FIELDS)
+
+    def to_dict(self) -> dict:
+        return {key: getattr(self, key) for key in self.FIELDS}
+
+    def __getstate__(self):
+        return self.to_dict()
+
+    def __setstate__(self, state):
+        for key in self.FIELDS:
+            setattr(self, key, state.get(key, ''))
+
+    def __repr__(self) -> str:
+        return f"Article(title={self.title!r}, link={self.link!r})"
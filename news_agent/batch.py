@@ -0,0 +1,330 @@
+#!/usr/bin/env python
+
+"""Analisi batch non interattiva di un intero feed.
+
+Esempio:
+    news-agent-batch --topic https://www.ansa.it/sito/ansait_rss.xml \\
+        --stages sunto,agenti,verifica --workers 4 --output risultati.jsonl
+
+Ogni articolo elaborato diventa una riga JSON nel file di output; rilanciando
+lo stesso comando gli articoli già completati senza errori vengono saltati.
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+from rich.console import Console
+from rich.progress import Progress, BarColumn, MofNCompleteColumn, TimeElapsedColumn, TimeRemainingColumn
+from rich.table import Table
+
+from .settings import load_settings
+from .fetcher import fetch_many, build_feed_url, feed_urls_from_settings
+from .agents import summarize_article, agent_verifica
+from .pipeline import AgentPipeline
+from .multi_agents import run_multi_agent_verification
+from .ai_providers import create_ai_provider
+from .verifier import create_verifier
+from .poller import FeedPoller, poll_intervals_from_settings
+from .cache import configure_caches
+from .prompting import configure_prompting
+from .resolver import google_resolver
+from .transport import configure_transport
+
+STAGES = ('sunto', 'agenti', 'verifica', 'multi')
+
+class StageStats:
+    """Contatori per fase: articoli, errori e tempo speso, thread-safe"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, stage: str, elapsed: float, error: bool):
+        with self._lock:
+            entry = self._stats.setdefault(stage, {'count': 0, 'errors': 0, 'total_time': 0.0})
+            entry['count'] += 1
+            entry['errors'] += int(error)
+            entry['total_time'] += elapsed
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {stage: dict(entry) for stage, entry in self._stats.items()}
+
+class BatchRunner:
+    """Esegue le fasi richieste su ogni articolo con un pool di worker"""
+
+    def __init__(self, ai_provider, stages, verifier=None, mode="media", agent_concurrency=3):
+        self.ai_provider = ai_provider
+        self.stages = stages
+        self.verifier = verifier
+        self.mode = mode
+        self.agent_concurrency = agent_concurrency
+        self.stage_stats = StageStats()
+
+    def process(self, article: dict) -> dict:
+        """Elabora un articolo; gli errori di una fase non fermano le successive"""
+        record = {
+            'link': article.get('link', ''),
+            'title': article.get('title', ''),
+            'date': article.get('date', ''),
+            'author': article.get('author', ''),
+            'results': {},
+            'errors': {},
+            'timings': {},
+        }
+        verification_data = None
+        for stage in self.stages:
+            start = time.perf_counter()
+            try:
+                if stage in ('verifica', 'multi') and verification_data is None:
+                    verification_data = self.verifier.verify_article(article, self.mode)
+                    # L'articolo è già nei campi del record
+                    record['verification'] = {k: v for k, v in verification_data.items() if k != 'article'}
+                result = self._run_stage(stage, article, verification_data)
+                record['results'][stage] = result
+                failed = _first_error(result)
+                if failed:
+                    record['errors'][stage] = failed
+            except Exception as e:
+                record['errors'][stage] = str(e)
+            elapsed = time.perf_counter() - start
+            record['timings'][stage] = round(elapsed, 3)
+            self.stage_stats.record(stage, elapsed, stage in record['errors'])
+        record['processed_at'] = datetime.now().isoformat(timespec='seconds')
+        return record
+
+    def _run_stage(self, stage, article, verification_data):
+        if stage == 'sunto':
+            return summarize_article(article, self.ai_provider)
+        if stage == 'agenti':
+            # Il contenuto viene scaricato una volta per tutta la catena
+            return AgentPipeline(self.ai_provider).run(article)
+        if stage == 'verifica':
+            return agent_verifica(article, verification_data, self.ai_provider)
+        if stage == 'multi':
+            return run_multi_agent_verification(article, verification_data, self.ai_provider, self.agent_concurrency)
+        raise ValueError(f"Fase sconosciuta: {stage}")
+
+def _first_error(result):
+    """Messaggio del primo "[Errore ...]" restituito da un provider, None se non ce ne sono"""
+    values = result.values() if isinstance(result, dict) else [result]
+    for value in values:
+        if isinstance(value, str) and value.startswith("[Errore"):
+            return value
+    return None
+
+def load_processed(path: Path) -> set:
+    """Link già elaborati senza errori in un file di output precedente"""
+    processed = set()
+    if not path.exists():
+        return processed
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # Riga troncata da un'interruzione: l'articolo verrà rielaborato
+                continue
+            if record.get('link') and not record.get('errors'):
+                processed.add(record['link'])
+    return processed
+
+def parse_stages(value: str):
+    stages = [s.strip() for s in value.split(',') if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown or not stages:
+        raise argparse.ArgumentTypeError(f"fasi valide: {', '.join(STAGES)}")
+    return stages
+
+def build_parser(settings) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='news-agent-batch',
+        description="Analizza tutti gli articoli di un feed senza interfaccia interattiva",
+    )
+    parser.add_argument('--feed', action='append',
+                        help="URL del feed RSS, ripetibile (ha la precedenza su --topic)")
+    parser.add_argument('--topic', help="Topic Google News o URL del feed (default: feeds/topic di settings.ini)")
+    parser.add_argument('--lang', default=settings.get('lang', 'it'), help="Lingua del feed Google News")
+    parser.add_argument('--stages', type=parse_stages, default=['sunto'],
+                        help=f"Fasi separate da virgola tra: {', '.join(STAGES)} (default: sunto)")
+    parser.add_argument('--mode', default='media', choices=['veloce', 'media', 'grande'],
+                        help="Modalità di ricerca per verifica e multi")
+    parser.add_argument('--workers', type=int, default=int(settings.get('batch_workers', 4)),
+                        help="Articoli elaborati in parallelo")
+    parser.add_argument('--output', default='news_agent_batch.jsonl', help="File JSONL dei risultati")
+    parser.add_argument('--limit', type=int, help="Numero massimo di articoli da elaborare")
+    parser.add_argument('--no-resume', action='store_true',
+                        help="Rielabora anche gli articoli già presenti nel file di output")
+    parser.add_argument('--poll', action='store_true',
+                        help="Resta in ascolto ed elabora solo gli articoli nuovi (Ctrl+C per fermare)")
+    parser.add_argument('--interval', type=float, default=float(settings.get('poll_interval', 300)),
+                        help="Secondi tra due controlli dello stesso feed in modalità --poll")
+    return parser
+
+def process_all(runner, articles, workers):
+    """Elabora gli articoli con un pool di worker e restituisce i record man mano che finiscono"""
+    # I link di Google News del lotto si risolvono tutti insieme prima dello scraping
+    google_resolver.resolve_many(article.get('link') for article in articles)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [executor.submit(runner.process, article) for article in articles]
+        for future in as_completed(futures):
+            yield future.result()
+
+def write_record(out, record):
+    # Le righe vengono scritte e salvate una alla volta: un'interruzione
+    # perde al massimo gli articoli in corso
+    out.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+    out.flush()
+
+def show_stage_stats(console, stage_stats: dict, wall_time: float):
+    table = Table(title="📊 Throughput per fase", border_style="cyan")
+    table.add_column("Fase", style="cyan")
+    table.add_column("Articoli", justify="right")
+    table.add_column("Errori", justify="right", style="red")
+    table.add_column("Media (s)", justify="right")
+    table.add_column("Articoli/min", justify="right", style="yellow")
+    for stage, entry in stage_stats.items():
+        table.add_row(
+            stage, str(entry['count']), str(entry['errors']),
+            f"{entry['total_time'] / entry['count']:.2f}",
+            f"{entry['count'] / wall_time * 60:.1f}" if wall_time else "-"
+        )
+    console.print(table)
+
+def main(argv=None):
+    settings = load_settings()
+    args = build_parser(settings).parse_args(argv)
+    console = Console(stderr=True)
+
+    configure_caches(settings)
+    configure_transport(settings)
+    configure_prompting(settings)
+    google_resolver.configure(max_workers=int(settings.get("resolver_workers", 8)))
+
+    try:
+        ai_provider = create_ai_provider(settings.get("provider", "ollama"), settings)
+        verifier = None
+        if 'verifica' in args.stages or 'multi' in args.stages:
+            verifier = create_verifier(settings, ai_provider)
+    except ValueError as e:
+        console.print(f"[red]Errore configurazione: {e}[/red]")
+        return 2
+
+    if args.feed:
+        feeds = args.feed
+    elif args.topic:
+        feeds = [build_feed_url(args.lang, args.topic)]
+    else:
+        feeds = feed_urls_from_settings(settings)
+    runner = BatchRunner(
+        ai_provider, args.stages, verifier=verifier, mode=args.mode,
+        agent_concurrency=int(settings.get("multi_agent_concurrency", 3)),
+    )
+    output = Path(args.output)
+    if args.poll:
+        return run_poll(args, settings, runner, feeds, output, console)
+
+    console.print(f"[bold yellow]📰 Caricamento feed: {', '.join(feeds)}[/bold yellow]")
+    try:
+        articles = fetch_many(feeds, max_workers=int(settings.get("feed_workers", 8)))
+    except Exception as e:
+        console.print(f"[red]❌ Errore caricamento feed: {e}[/red]")
+        return 1
+
+    processed = set() if args.no_resume else load_processed(output)
+    pending = [a for a in articles if a.get('link') not in processed]
+    skipped = len(articles) - len(pending)
+    if args.limit is not None:
+        pending = pending[:args.limit]
+    console.print(
+        f"[green]{len(articles)} articoli nel feed, {len(pending)} da elaborare"
+        + (f", {skipped} saltati" if skipped else "") + "[/green]"
+    )
+    if not pending:
+        return 0
+
+    errors = 0
+    start = time.perf_counter()
+    with open(output, 'a', encoding='utf-8') as out, Progress(
+        "[progress.description]{task.description}", BarColumn(), MofNCompleteColumn(),
+        TimeElapsedColumn(), TimeRemainingColumn(), console=console,
+    ) as progress:
+        task = progress.add_task(f"Fasi: {', '.join(args.stages)}", total=len(pending))
+        for record in process_all(runner, pending, args.workers):
+            if record['errors']:
+                errors += 1
+            write_record(out, record)
+            progress.advance(task)
+
+    wall_time = time.perf_counter() - start
+    console.print(f"\n[bold green]✅ {len(pending)} articoli elaborati in {wall_time:.1f}s → {output}[/bold green]")
+    if errors:
+        console.print(f"[yellow]⚠️ {errors} articoli con errori: verranno ripresi al prossimo avvio[/yellow]")
+    show_stage_stats(console, runner.stage_stats.stats(), wall_time)
+    return 0
+
+def run_poll(args, settings, runner, feeds, output, console):
+    """Controlla i feed a intervalli ed elabora solo gli articoli mai visti"""
+    poller = FeedPoller(
+        settings.get('poll_store_path', '').strip() or None,
+        default_interval=args.interval,
+    )
+    intervals = poll_intervals_from_settings(settings)
+    for feed in feeds:
+        poller.add(feed, intervals.get(feed))
+    processed = set() if args.no_resume else load_processed(output)
+    console.print(f"[bold yellow]🔁 Polling di {len(feeds)} feed → {output} (Ctrl+C per fermare)[/bold yellow]")
+
+    total = 0
+    errors = 0
+    start = time.perf_counter()
+    try:
+        with open(output, 'a', encoding='utf-8') as out:
+            while True:
+                due = poller.due()
+                with ThreadPoolExecutor(max_workers=max(1, min(len(due), int(settings.get("feed_workers", 8))))) as executor:
+                    polled = list(executor.map(lambda feed: (feed, poller.poll(feed, mark=False)), due))
+                for feed, new in polled:
+                    pending = [a for a in new if a.get('link') not in processed]
+                    if pending:
+                        console.print(f"[green]🆕 {len(pending)} nuovi articoli da {feed}[/green]")
+                    failed = set()
+                    for record in process_all(runner, pending, args.workers):
+                        total += 1
+                        write_record(out, record)
+                        if record['errors']:
+                            errors += 1
+                            failed.add(record['link'])
+                            console.print(f"[red]✗ {record['title']} (riprovato al prossimo controllo)[/red]")
+                        else:
+                            processed.add(record['link'])
+                            console.print(f"[dim]✓ {record['title']}[/dim]")
+                    # Segnati come visti solo gli articoli elaborati senza errori;
+                    # gli altri tornano al prossimo controllo del feed
+                    done = [a for a in new if a.get('link') not in failed]
+                    poller.mark_seen(feed, done, complete=not failed)
+                time.sleep(max(1.0, poller.seconds_to_next()))
+    except KeyboardInterrupt:
+        console.print("\n[yellow]⏹️ Polling interrotto[/yellow]")
+    finally:
+        poller.close()
+
+    wall_time = time.perf_counter() - start
+    stats = poller.stats
+    console.print(
+        f"[bold green]✅ {total} articoli elaborati, {errors} con errori. "
+        f"Controlli: {stats['polls']}, non modificati (304): {stats['not_modified']}, "
+        f"errori di rete: {stats['errors']}[/bold green]"
+    )
+    if total:
+        show_stage_stats(console, runner.stage_stats.stats(), wall_time)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from .settings import get_bool
+from .scrape_store import scrape_store
+
+CACHE_DIR = Path.home() / ".news_agent"
+
+class TTLCache:
+    """Cache LRU in memoria con scadenza (TTL) delle voci, thread-safe"""
+
+    def __init__(self, max_entries: int = 256, ttl: float = 1800):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, max_entries: int = None, ttl: float = None):
+        """Aggiorna limiti e TTL senza perdere le voci ancora valide"""
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if ttl is not None:
+                self.ttl = ttl
+            self._evict()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            self._evict()
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return entry[1] if entry is not None else default
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and entry[0] >= time.monotonic()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {
+            'entries': len(self._data),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def _evict(self):
+        # Prima le voci scadute, poi le meno usate di recente
+        now = time.monotonic()
+        for key in [k for k, (expires_at, _) in self._data.items() if expires_at < now]:
+            del self._data[key]
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+class DiskCache:
+    """Cache chiave/valore su disco (SQLite) con TTL e numero massimo di voci.
+
+    I valori devono essere serializzabili in JSON. Se il database non è
+    accessibile la cache si disattiva da sola invece di interrompere il programma.
+    """
+
+    def __init__(self, path, ttl: float = 86400, max_entries: int = 5000):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._conn = None
+        self._lock = threading.Lock()
+        self._disabled = False
+        self._writes = 0
+
+    def _connect(self):
+        if self._conn is not None or self._disabled:
+            return self._conn
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("DELETE FROM entries WHERE expires_at < ?", (time.time(),))
+            conn.commit()
+            self._conn = conn
+        except (sqlite3.Error, OSError) as e:
+            print(f"⚠️ Cache su disco non disponibile ({self.path}): {e}")
+            self._disabled = True
+        return self._conn
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return default
+            now = time.time()
+            row = conn.execute(
+                "SELECT value FROM entries WHERE key = ? AND expires_at >= ?", (key, now)
+            ).fetchone()
+            if row is None:
+                return default
+            conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+            return json.loads(row[0])
+
+    def set(self, key: str, value):
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            now = time.time()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + self.ttl, now)
+            )
+            self._writes += 1
+            if self._writes >= 100:
+                self._writes = 0
+                conn.execute("DELETE FROM entries WHERE expires_at < ?", (now,))
+                conn.execute(
+                    "DELETE FROM entries WHERE key NOT IN"
+                    " (SELECT key FROM entries ORDER BY accessed_at DESC LIMIT ?)",
+                    (self.max_entries,)
+                )
+            conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+class ResponseCache:
+    """Cache a due livelli (memoria LRU + disco opzionale) per risposte di servizi esterni.
+
+    Le chiavi sono hash dei parametri normalizzati; tiene i contatori di hit/miss
+    per livello.
+    """
+
+    def __init__(self, name: str, max_entries: int = 512, ttl: float = 21600, persist: bool = False):
+        self.name = name
+        self.memory = TTLCache(max_entries=max_entries, ttl=ttl)
+        self.disk = DiskCache(CACHE_DIR / f"{name}.sqlite", ttl=ttl) if persist else None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+
+    def configure(self, max_entries: int = None, ttl: float = None, persist: bool = None, path=None):
+        self.memory.configure(max_entries=max_entries, ttl=ttl)
+        if persist is not None:
+            if self.disk is not None:
+                self.disk.close()
+            self.disk = None
+            if persist:
+                self.disk = DiskCache(path or CACHE_DIR / f"{self.name}.sqlite", ttl=self.memory.ttl)
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Hash stabile di una lista di parti serializzabili in JSON"""
+        raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key: str, default=None):
+        value = self.memory.get(key)
+        if value is not None:
+            with self._lock:
+                self.memory_hits += 1
+            return value
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+                with self._lock:
+                    self.disk_hits += 1
+                return value
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def set(self, key: str, value):
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def record_saved(self, nbytes: int):
+        """Aggiunge i byte non trasferiti grazie a un hit"""
+        with self._lock:
+            self.bytes_saved += nbytes
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            'entries': len(self.memory),
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            'bytes_saved': self.bytes_saved,
+            'persistent': self.disk is not None,
+        }
+
+# Cache condivisa dei contenuti degli articoli, indicizzata per link
+content_cache = TTLCache(max_entries=256, ttl=1800)
+
+# Cache delle risposte SerpAPI, indicizzata per parametri di ricerca normalizzati
+search_cache = ResponseCache('serpapi_cache', max_entries=512, ttl=21600)
+
+# Cache delle risposte dei modelli, indicizzata per (provider, modello, prompt, max_tokens)
+prompt_cache = ResponseCache('prompt_cache', max_entries=256, ttl=86400)
+
+def configure_caches(settings):
+    """Applica i limiti delle cache definiti in settings.ini"""
+    content_cache.configure(
+        max_entries=int(settings.get('content_cache_size', 256)),
+        ttl=float(settings.get('content_cache_ttl', 1800)),
+    )
+    scrape_store.configure(
+        path=settings.get('scrape_store_path', '').strip() or None,
+        max_bytes=int(float(settings.get('scrape_store_max_mb', 50)) * 1024 * 1024),
+        fresh_for=float(settings.get('scrape_store_fresh', 3600)),
+        enabled=get_bool(settings, 'scrape_store_enabled', True),
+    )
+    search_cache.configure(
+        max_entries=int(settings.get('serpapi_cache_size', 512)),
+        ttl=float(settings.get('serpapi_cache_ttl', 21600)),
+        persist=get_bool(settings, 'serpapi_cache_persist', False),
+    )
+    prompt_cache.configure(
+        max_entries=int(settings.get('ai_cache_size', 256)),
+        ttl=float(settings.get('ai_cache_ttl', 86400)),
+        persist=get_bool(settings, 'ai_cache_persist', False),
+    )
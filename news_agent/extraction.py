@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+
+"""Estrazione del contenuto principale da una pagina HTML.
+
+Unico motore usato sia dagli agenti sia dal verificatore. Usa lxml come parser
+quando è installato (pip install lxml, molto più veloce), altrimenti html.parser.
+"""
+
+import re
+
+from bs4 import BeautifulSoup, Tag
+
+from .textnorm import clean_scraped_text, collapse_spaces
+
+try:
+    import lxml  # noqa: F401
+    PARSER = 'lxml'
+except ImportError:
+    PARSER = 'html.parser'
+
+# Tag che non contengono mai il testo dell'articolo
+STRIP_TAGS = ['script', 'style', 'nav', 'header', 'footer', 'aside', 'noscript', 'form']
+
+# Selettori del contenuto, dal più specifico al più generico
+CONTENT_SELECTORS = [
+    'article',
+    '.entry-content',
+    '.post-content',
+    '.article-content',
+    '[class*="article"]',
+    '[class*="content"]',
+    '[class*="post"]',
+    'main',
+]
+
+# Valori di class/rel/itemprop che indicano l'autore
+BYLINE_HINTS = ('byline', 'author')
+
+MIN_CONTENT_CHARS = 200
+
+_CHARSET = re.compile(r'charset=["\']?([\w.:-]+)', re.I)
+
+# Blocchi <script>/<style> con il loro contenuto: tolti prima dell'analisi, che
+# altrimenti li attraversa solo per poi scartarli
+_BLOCKS = re.compile(r'<(script|style)\b[^>]*>.*?</\1\s*>', re.I | re.S)
+_BLOCKS_BYTES = re.compile(_BLOCKS.pattern.encode(), re.I | re.S)
+
+def _strip_blocks(html_content):
+    if isinstance(html_content, bytes):
+        return _BLOCKS_BYTES.sub(b'', html_content)
+    return _BLOCKS.sub('', html_content)
+
+def response_encoding(response):
+    """Codifica dichiarata nell'header Content-Type, None se assente.
+
+    requests ripiega su ISO-8859-1 quando manca il charset: in quel caso è meglio
+    lasciare che il parser legga il <meta charset> della pagina.
+    """
+    match = _CHARSET.search(response.headers.get('Content-Type', ''))
+    return match.group(1) if match else None
+
+def _head_metadata(soup):
+    """Legge una sola volta <meta> e <link rel=canonical> dall'intestazione"""
+    container = soup.head or soup
+    meta = {}
+    for tag in container.find_all('meta'):
+        key = tag.get('property') or tag.get('name')
+        content = tag.get('content', '').strip()
+        if key and content:
+            meta.setdefault(key.lower(), collapse_spaces(content))
+    canonical = ''
+    link = container.find('link', rel='canonical')
+    if link and link.get('href', '').startswith('http'):
+        canonical = link['href'].strip()
+    return meta, canonical
+
+def _first(meta, *names):
+    for name in names:
+        if meta.get(name):
+            return meta[name]
+    return ''
+
+def _title(soup, meta):
+    title = _first(meta, 'og:title', 'twitter:title')
+    if not title and soup.title and soup.title.string:
+        title = collapse_spaces(soup.title.string)
+    if not title:
+        h1 = soup.find('h1')
+        title = collapse_spaces(h1.get_text(' ')) if h1 else ''
+    return title
+
+def _is_byline(tag):
+    for attr in ('rel', 'itemprop', 'class'):
+        value = tag.get(attr)
+        if value:
+            value = ' '.join(value) if isinstance(value, list) else value
+            value = value.lower()
+            if any(hint in value for hint in BYLINE_HINTS):
+                return True
+    return False
+
+def _index_selectors(selectors):
+    """Divide i selettori semplici usati qui ('tag', '.classe', '[class*="x"]') per tipo di test"""
+    by_tag, by_class, by_part = {}, {}, []
+    for i, selector in enumerate(selectors):
+        if selector.startswith('.'):
+            by_class[selector[1:]] = i
+        elif selector.startswith('[class*='):
+            by_part.append((selector[len('[class*='):-1].strip('"\''), i))
+        else:
+            by_tag[selector] = i
+    return by_tag, by_class, tuple(by_part)
+
+_BY_TAG, _BY_CLASS, _BY_PART = _index_selectors(CONTENT_SELECTORS)
+_STRIP_SET = frozenset(STRIP_TAGS)
+MAX_BYLINE_CANDIDATES = 5
+
+def _walk(soup, want_byline: bool):
+    """Una sola visita dell'albero in ordine di documento.
+    
+    Raccoglie gli elementi di ciascun selettore di CONTENT_SELECTORS e, se
+    want_byline, i primi candidati per l'autore; poi rimuove i tag di
+    STRIP_TAGS, i cui sottoalberi vengono esplorati solo per l'autore.
+    Restituisce (gruppi per selettore, autore).
+    """
+    groups = [[] for _ in CONTENT_SELECTORS]
+    stripped = []
+    bylines = []
+    stack = list(reversed(soup.contents))
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, Tag):
+            continue
+        if want_byline and len(bylines) < MAX_BYLINE_CANDIDATES and _is_byline(node):
+            bylines.append(node)
+        if node.name in _STRIP_SET:
+            stripped.append(node)
+            if want_byline and len(bylines) < MAX_BYLINE_CANDIDATES:
+                bylines.extend(node.find_all(_is_byline, limit=MAX_BYLINE_CANDIDATES - len(bylines)))
+            continue
+        index = _BY_TAG.get(node.name)
+        if index is not None:
+            groups[index].append(node)
+        classes = node.get('class')
+        if classes:
+            matched = set()
+            for name in classes:
+                index = _BY_CLASS.get(name)
+                if index is not None:
+                    matched.add(index)
+                for part, index in _BY_PART:
+                    if part in name:
+                        matched.add(index)
+            for index in matched:
+                groups[index].append(node)
+        stack.extend(reversed(node.contents))
+    byline = ''
+    # Il primo candidato plausibile, letto prima di rimuovere header e simili
+    for element in bylines:
+        text = collapse_spaces(element.get_text(' '))
+        if 0 < len(text) <= 100:
+            byline = text
+            break
+    for tag in stripped:
+        tag.decompose()
+    return groups, byline
+
+def _main_text(soup, groups):
+    """Testo del primo selettore che raccoglie abbastanza testo, altrimenti del <body>"""
+    for elements in groups:
+        if elements:
+            text = ' '.join(elem.get_text(strip=True) for elem in elements)
+            # Il primo selettore con abbastanza testo vince
+            if len(text) > MIN_CONTENT_CHARS:
+                return text
+    body = soup.body
+    return body.get_text(strip=True) if body else ''
+
+def extract(html_content, max_chars: int = None, encoding: str = None, parser: str = None) -> dict:
+    """Analizza la pagina una sola volta e restituisce testo, titolo, autore e URL canonico.
+
+    html_content può essere bytes (preferibile: la codifica viene letta dalla
+    pagina o da `encoding`) o str. Il testo è pulito con clean_scraped_text e
+    troncato a max_chars caratteri.
+    """
+    if isinstance(html_content, str):
+        encoding = None
+    soup = BeautifulSoup(_strip_blocks(html_content), parser or PARSER, from_encoding=encoding)
+    # Metadati prima di rimuovere <header> e simili, dove spesso si trovano
+    meta, canonical_url = _head_metadata(soup)
+    title = _title(soup, meta)
+    byline = _first(meta, 'author', 'article:author')
+    groups, walked_byline = _walk(soup, want_byline=not byline)
+    canonical_url = canonical_url or _first(meta, 'og:url')
+    return {
+        'text': clean_scraped_text(_main_text(soup, groups), max_chars=max_chars),
+        'title': title,
+        'byline': byline or walked_byline,
+        'canonical_url': canonical_url,
+    }
+
+def extract_text(html_content, max_chars: int = None, encoding: str = None) -> str:
+    return extract(html_content, max_chars=max_chars, encoding=encoding)['text']
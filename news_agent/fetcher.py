@@ -1,41 +1,218 @@
 #!/usr/bin/env python
 
-import requests
 from xml.etree import ElementTree as ET
 import re
-import html
+import io
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qsl, urlencode
+from .transport import transport
+from .textnorm import normalize_field
+from .article import Article
+
+# Parametri di tracciamento ignorati nel confronto tra link
+TRACKING_PARAMS = re.compile(r'^(utm_\w+|oc|fbclid|gclid|ref|cmpid)$')
+# Suffisso " - Testata" che Google News aggiunge ai titoli
+TITLE_SOURCE_SUFFIX = re.compile(r'\s+[-–—|]\s+[^-–—|]{1,60}$')
+TITLE_WORD = re.compile(r'\w{3,}')
+
+def build_feed_url(lang, topic):
+    """URL del feed: il topic stesso se è un URL, altrimenti il feed Google News"""
+    if topic and topic.startswith('http'):
+        return topic
+    return f"https://news.google.com/rss?hl={lang}&gl={lang.upper()}&ceid={topic or ''}"
 
 def fetch_articles(feed_url, user_agent="Mozilla/5.0"):
-    res = requests.get(feed_url, timeout=10, headers={"User-Agent": user_agent})
-    res.raise_for_status()
-    root = ET.fromstring(res.text)
+    return list(iter_articles(feed_url, user_agent))
+
+def iter_articles(feed_url, user_agent="Mozilla/5.0"):
+    """Restituisce gli articoli del feed man mano che arrivano dalla rete.
+    
+    Il parser legge direttamente i byte della risposta (rispettando la codifica
+    dichiarata nell'XML), quindi i primi articoli sono disponibili prima della
+    fine del download e la memoria usata non dipende dalla dimensione del feed.
+    """
+    res = transport.get(feed_url, timeout=10, headers={"User-Agent": user_agent}, stream=True)
+    try:
+        res.raise_for_status()
+        res.raw.decode_content = True  # Decompressione gzip/deflate trasparente
+        yield from iter_feed(res.raw)
+    finally:
+        res.close()
+
+def parse_feed(data):
+    """Estrae gli articoli da un feed RSS già scaricato (str o bytes)"""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+        # La codifica dichiarata nel prologo non vale più per il testo ricodificato
+        data = re.sub(rb'^\s*<\?xml[^>]*\?>', b'', data, count=1)
+    return list(iter_feed(io.BytesIO(data)))
+
+def _local_name(tag):
+    return tag.rpartition('}')[2]
+
+def iter_feed(stream):
+    """Analizza un feed RSS da un flusso di byte, un <item> alla volta.
+    
+    Ogni item viene staccato dal padre dopo l'uso, così l'albero in memoria
+    non cresce con il numero di articoli.
+    """
+    parents = []
+    for event, elem in ET.iterparse(stream, events=('start', 'end')):
+        if event == 'start':
+            parents.append(elem)
+            continue
+        parents.pop()
+        if _local_name(elem.tag) != 'item':
+            continue
+        yield _item_to_article(elem)
+        if parents:
+            parents[-1].remove(elem)
+        elem.clear()
+
+def _item_to_article(item):
+    title = item.findtext('title', '')
+    link = item.findtext('link', '')
+    pubDate = item.findtext('pubDate', '')
+    description = item.findtext('description', '')
+    guid = item.findtext('guid', '')
+    source_el = item.find('source')
+    author = (source_el.text or "") if source_el is not None else ""
+    
+    return Article(
+        title=normalize_field(title),
+        date=pubDate.strip(),
+        author=normalize_field(author),
+        summary=normalize_field(description, strip_tags=True),
+        link=link.strip(),
+        guid=guid.strip(),
+    )
+
+def iter_opml(source, user_agent="Mozilla/5.0"):
+    """Restituisce gli URL dei feed (attributo xmlUrl) di un file OPML, locale o remoto"""
+    if source.startswith('http'):
+        res = transport.get(source, timeout=10, headers={"User-Agent": user_agent}, stream=True)
+        try:
+            res.raise_for_status()
+            res.raw.decode_content = True
+            yield from _iter_outlines(res.raw)
+        finally:
+            res.close()
+    else:
+        with open(Path(source).expanduser(), 'rb') as f:
+            yield from _iter_outlines(f)
+
+def _iter_outlines(stream):
+    for _, elem in ET.iterparse(stream, events=('end',)):
+        if _local_name(elem.tag) == 'outline':
+            url = elem.get('xmlUrl')
+            if url:
+                yield url.strip()
+            elem.clear()
+
+def feed_urls_from_settings(settings):
+    """Feed configurati: la lista `feeds` (separata da virgole, anche file OPML) oppure il solo `topic`"""
+    lang = settings.get("lang", "it")
+    feeds = []
+    for feed in settings.get("feeds", "").split(','):
+        feed = feed.strip()
+        if feed.lower().endswith('.opml'):
+            # Un file OPML si espande nei feed che contiene
+            try:
+                feeds.extend(iter_opml(feed))
+            except Exception as e:
+                print(f"⚠️ OPML non leggibile ({feed}): {e}")
+        elif feed:
+            feeds.append(feed)
+    if not feeds:
+        feeds = [settings.get("topic")]
+    return [build_feed_url(lang, feed) for feed in feeds]
+
+def canonical_link(link):
+    """Forma canonica di un link: senza schema, www, frammento e parametri di tracciamento"""
+    parts = urlsplit(link.strip())
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query) if not TRACKING_PARAMS.match(k)])
+    return host + parts.path.rstrip('/') + ('?' + query if query else '')
+
+def title_words(title):
+    """Parole significative del titolo, senza il nome della testata in coda"""
+    title = TITLE_SOURCE_SUFFIX.sub('', title)
+    return frozenset(TITLE_WORD.findall(title.lower()))
+
+def article_timestamp(article):
+    """Data di pubblicazione come timestamp, 0 se assente o non leggibile"""
+    try:
+        date = parsedate_to_datetime(article.get('date', ''))
+    except (TypeError, ValueError, IndexError):
+        return 0
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return date.timestamp()
+
+def dedupe_articles(articles, similarity=0.8):
+    """Elimina i duplicati tenendo la prima occorrenza.
+    
+    Due articoli sono duplicati se hanno lo stesso link canonico o se i titoli
+    hanno una similarità di Jaccard (sulle parole) almeno pari a `similarity`.
+    Un indice parola → titoli limita i confronti ai titoli con parole in comune.
+    """
+    seen_links = set()
+    kept_words = []
+    index = {}
+    unique = []
+    for article in articles:
+        link = canonical_link(article.get('link', ''))
+        if link and link in seen_links:
+            continue
+        words = title_words(article.get('title', ''))
+        candidates = set()
+        for word in words:
+            candidates.update(index.get(word, ()))
+        if any(len(words & kept_words[c]) / len(words | kept_words[c]) >= similarity for c in candidates):
+            continue
+        seen_links.add(link)
+        for word in words:
+            index.setdefault(word, []).append(len(kept_words))
+        kept_words.append(words)
+        unique.append(article)
+    return unique
+
+def _fetch_feed(feed_url, user_agent, on_article):
+    if on_article is None:
+        return fetch_articles(feed_url, user_agent)
     articles = []
-    for item in root.findall('.//item'):
-        title = item.findtext('title', '')
-        link = item.findtext('link', '')
-        pubDate = item.findtext('pubDate', '')
-        description = item.findtext('description', '')
-        source_el = item.find('source')
-        author = source_el.text if source_el is not None else ""
-        
-        clean_descr = re.sub('<[^<]+?>', '', description)
-        clean_descr = html.unescape(clean_descr)
-        clean_descr = re.sub(r'&[a-zA-Z0-9#]+;', '', clean_descr)
-        clean_descr = re.sub(r'\s+', ' ', clean_descr)
-        
-        clean_title = html.unescape(title)
-        clean_title = re.sub(r'&[a-zA-Z0-9#]+;', '', clean_title)
-        clean_title = re.sub(r'\s+', ' ', clean_title)
-        
-        clean_author = html.unescape(author)
-        clean_author = re.sub(r'&[a-zA-Z0-9#]+;', '', clean_author)
-        clean_author = re.sub(r'\s+', ' ', clean_author)
-        
-        articles.append({
-            "title": clean_title.strip(),
-            "date": pubDate.strip(),
-            "author": clean_author.strip(),
-            "summary": clean_descr.strip(),
-            "link": link.strip(),
-        })
+    for article in iter_articles(feed_url, user_agent):
+        articles.append(article)
+        on_article(article)
+    return articles
+
+def fetch_many(feed_urls, max_workers=8, similarity=0.8, user_agent="Mozilla/5.0", on_article=None):
+    """Scarica più feed in parallelo e restituisce un'unica lista senza duplicati,
+    dalla notizia più recente. I feed che non rispondono vengono saltati.
+    
+    on_article(articolo), se indicata, riceve ogni articolo appena letto dal
+    feed, prima di deduplicazione e ordinamento, anche da più thread insieme:
+    serve a mostrare i primi risultati mentre il download è in corso.
+    """
+    feed_urls = list(dict.fromkeys(feed_urls))
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(feed_urls)))) as executor:
+        futures = {executor.submit(_fetch_feed, url, user_agent, on_article): i for i, url in enumerate(feed_urls)}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                print(f"⚠️ Feed non disponibile ({feed_urls[i]}): {e}")
+    
+    # L'ordine dei feed in configurazione decide quale copia di un duplicato resta
+    merged = [article for i in sorted(results) for article in results[i]]
+    articles = dedupe_articles(merged, similarity)
+    articles.sort(key=article_timestamp, reverse=True)
     return articles
+
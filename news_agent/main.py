@@ -1,24 +1,35 @@
 #!/usr/bin/env python
 
-from .settings import load_settings
-from .fetcher import fetch_articles
-from .agents import agent_riassunto, agent_implicazioni, agent_teoria, summarize_article, agent_verifica, agent_validazione_verita, agent_verifica_advanced, agent_validazione_verita_advanced
+from .settings import load_settings, get_bool
+from .fetcher import fetch_many, feed_urls_from_settings
+from .agents import get_article_full_content, agent_riassunto, agent_implicazioni, agent_teoria, summarize_article, agent_verifica, agent_validazione_verita, agent_verifica_advanced, agent_validazione_verita_advanced
 from .multi_agents import run_multi_agent_verification
-from .ui import show_table, show_article, get_arrow_input, show_verification_menu, show_verification_results, show_settings_menu, edit_ai_provider, edit_ai_model, edit_api_keys, edit_serpapi, edit_general_settings, show_current_settings, save_settings_change
-from .ai_providers import create_ai_provider
-from .verifier import NewsVerifier
-from rich.panel import Panel
+from .ui import show_table, show_article, get_arrow_input, show_verification_menu, show_verification_results, show_settings_menu, edit_ai_provider, edit_ai_model, edit_api_keys, edit_serpapi, edit_general_settings, show_current_settings, show_performance_stats, save_settings_change, stream_to_panel, LoadingTable
+from .ai_providers import create_ai_provider, CachingAIProvider
+from .verifier import create_verifier
+from .prefetch import create_prefetcher, Prefetcher
+from .pipeline import AgentPipeline
+from .cache import configure_caches
+from .prompting import configure_prompting
+from .transport import configure_transport
 from rich.console import Console
 import webbrowser
 import sys
 
+# Numero, titolo e colore del pannello di ogni agente della catena 'a'
+AGENT_PANELS = {
+    'riassunto': (1, "Riassunto", "yellow"),
+    'implicazioni': (2, "Implicazioni", "cyan"),
+    'teoria': (3, "Teoria/Scenario", "magenta"),
+}
+
 def get_model_name(ai_provider):
     """Ottiene il nome del modello dall'AI provider"""
     if hasattr(ai_provider, 'model'):
         return ai_provider.model
     return "Modello sconosciuto"
 
-def handle_settings_menu(console):
+def handle_settings_menu(console, ai_provider=None, prefetcher=None):
     """Gestisce il menu delle impostazioni"""
     while True:
         choice = show_settings_menu()
@@ -64,6 +75,20 @@ def handle_settings_menu(console):
                     console.input("\nPremi invio per continuare...")
         elif choice == '6':
             show_current_settings()
+        elif choice == '7':
+            show_performance_stats(ai_provider, prefetcher)
+        elif choice == '8':
+            if not isinstance(ai_provider, CachingAIProvider):
+                console.print("[yellow]⚠️ Cache delle risposte AI disattivata (ai_cache_enabled = false)[/yellow]")
+            else:
+                # Vale subito per la sessione corrente e viene salvato per le prossime
+                ai_provider.bypass = not ai_provider.bypass
+                save_settings_change('ai_cache_bypass', str(ai_provider.bypass).lower())
+                if ai_provider.bypass:
+                    console.print("[green]✅ Cache risposte AI ignorata: ogni analisi viene rigenerata[/green]")
+                else:
+                    console.print("[green]✅ Cache risposte AI in uso[/green]")
+            console.input("\nPremi invio per continuare...")
         else:
             console.print("[red]Opzione non valida[/red]")
             console.input("\nPremi invio per continuare...")
@@ -71,15 +96,16 @@ def handle_settings_menu(console):
 def main():
     settings = load_settings()
     
-    lang = settings.get("lang", "it")
-    topic = settings.get("topic")
     per_page = int(settings.get("articles_per_page", 15))
     provider = settings.get("provider", "ollama")
     serpapi_key = settings.get("serpapi_key")
+    agent_concurrency = int(settings.get("multi_agent_concurrency", 3))
     
     console = Console()
     
-
+    configure_caches(settings)
+    configure_transport(settings)
+    configure_prompting(settings)
     
     try:
         ai_provider = create_ai_provider(provider, settings)
@@ -91,7 +117,7 @@ def main():
     verifier = None
     if serpapi_key and serpapi_key.strip():
         try:
-            verifier = NewsVerifier(serpapi_key)
+            verifier = create_verifier(settings, ai_provider)
             console.print(f"[green]✅ SerpAPI configurata correttamente[/green]")
         except Exception as e:
             console.print(f"[red]❌ Errore inizializzazione SerpAPI: {e}[/red]")
@@ -104,25 +130,40 @@ def main():
     
     console.print("\n[bold yellow]📰 Caricamento notizie...[/bold yellow]")
     
-    if topic.startswith('http'):
-        feed = topic
-    else:
-        feed = f"https://news.google.com/rss?hl={lang}&gl={lang.upper()}&ceid={topic or ''}"
-    
-    articles = fetch_articles(feed)
+    # Le prime righe compaiono mentre i feed sono ancora in download
+    with LoadingTable(per_page) as loading:
+        articles = fetch_many(feed_urls_from_settings(settings), max_workers=int(settings.get("feed_workers", 8)),
+                              on_article=loading.add)
     if not articles:
         print("Nessun articolo trovato!")
         return
     
+    analysis_title = f"🤖 Analisi Agente LLM - {model_name}"
+    
     current_page = 1
     total_pages = (len(articles) + per_page - 1) // per_page
     selected_idx = 0
+    
+    # Scarica in background gli articoli della pagina visibile e della successiva
+    prefetcher = create_prefetcher(settings)
+    prefetched_page = None
+    
+    # Catena degli agenti asincrona: contenuto scaricato una volta, articolo successivo in background
+    agent_pipeline = None
+    if get_bool(settings, 'agents_async', True):
+        agent_pipeline = AgentPipeline(ai_provider, prefetcher or Prefetcher(max_workers=1))
 
     while True:
         show_table(articles, current_page, per_page, selected_idx, has_serpapi=bool(verifier))
+        if prefetcher and prefetched_page != current_page:
+            start = (current_page - 1) * per_page
+            prefetcher.schedule(articles[start:start + 2 * per_page])
+            prefetched_page = current_page
         user_input = get_arrow_input()
 
         if user_input == 'q':
+            if prefetcher:
+                prefetcher.close()
             break
         elif user_input in ['n', 'avanti'] and current_page < total_pages:
             current_page += 1
@@ -144,8 +185,7 @@ def main():
             idx = selected_idx
             article = articles[idx]
             console.print(f"\n[bold yellow]📰 Scaricando e analizzando: {article['title']}[/bold yellow]")
-            summary = summarize_article(article, ai_provider)
-            console.print(Panel(summary, title=f"Sunto dell'articolo - {model_name}", border_style="cyan"))
+            stream_to_panel(summarize_article(article, ai_provider, stream=True), f"Sunto dell'articolo - {model_name}", "cyan")
             console.input("\nPremi invio per tornare alla lista")
         elif user_input == 'o':
             idx = selected_idx
@@ -155,15 +195,32 @@ def main():
             idx = selected_idx
             article = articles[idx]
             show_article(article)
-            console.print("\n[bold yellow]1. Riassunto (Agente 1)...[/bold yellow]")
-            riassunto = agent_riassunto(article, ai_provider)
-            console.print(Panel(riassunto, title=f"Riassunto - {model_name}", border_style="yellow"))
-            console.print("\n[bold cyan]2. Implicazioni (Agente 2)...[/bold cyan]")
-            implicazioni = agent_implicazioni(article, riassunto, ai_provider)
-            console.print(Panel(implicazioni, title=f"Implicazioni - {model_name}", border_style="cyan"))
-            console.print("\n[bold magenta]3. Teoria/Scenario (Agente 3)...[/bold magenta]")
-            teoria = agent_teoria(article, riassunto, implicazioni, ai_provider)
-            console.print(Panel(teoria, title=f"Teoria/Scenario - {model_name}", border_style="magenta"))
+            if agent_pipeline:
+                next_article = articles[idx + 1] if idx + 1 < len(articles) else None
+                for stage, tokens in agent_pipeline.stream_stages(article, next_article):
+                    number, label, style = AGENT_PANELS[stage]
+                    console.print(f"\n[bold {style}]{number}. {label} (Agente {number})...[/bold {style}]")
+                    _, status = stream_to_panel(tokens, f"{label} - {model_name}", style)
+                    if status != 'completo':
+                        console.print(f"[yellow]⏹️ Analisi fermata ({label}: {status})[/yellow]")
+                        break
+                console.input("\nPremi invio per tornare alla lista")
+                continue
+            content = get_article_full_content(article)
+            outputs = {}
+            chain = (
+                ('riassunto', lambda: agent_riassunto(article, ai_provider, stream=True, content=content)),
+                ('implicazioni', lambda: agent_implicazioni(article, outputs['riassunto'], ai_provider, stream=True, content=content)),
+                ('teoria', lambda: agent_teoria(article, outputs['riassunto'], outputs['implicazioni'], ai_provider, stream=True, content=content)),
+            )
+            for stage, agent in chain:
+                number, label, style = AGENT_PANELS[stage]
+                console.print(f"\n[bold {style}]{number}. {label} (Agente {number})...[/bold {style}]")
+                outputs[stage], status = stream_to_panel(agent(), f"{label} - {model_name}", style)
+                # Gli agenti successivi partono solo da un testo completo
+                if status != 'completo':
+                    console.print(f"[yellow]⏹️ Analisi fermata ({label}: {status})[/yellow]")
+                    break
             console.input("\nPremi invio per tornare alla lista")
         elif user_input == 'v' and verifier:
             idx = selected_idx
@@ -178,22 +235,22 @@ def main():
             if verification_type == '1':
                 console.print(f"\n[bold yellow]🔍 Verificando articolo: {article['title']} (modalità: {mode})[/bold yellow]")
                 verification_data = verifier.verify_article(article, mode)
-                agent_analysis = agent_verifica(article, verification_data, ai_provider)
+                agent_analysis, _ = stream_to_panel(agent_verifica(article, verification_data, ai_provider, stream=True), analysis_title, "yellow")
                 show_verification_results(verification_data, agent_analysis, model_name)
             elif verification_type == '2':
                 console.print(f"\n[bold yellow]🔍 Validazione verità articolo: {article['title']} (modalità: {mode})[/bold yellow]")
                 verification_data = verifier.verify_article(article, mode)
-                agent_analysis = agent_validazione_verita(article, verification_data, ai_provider)
+                agent_analysis, _ = stream_to_panel(agent_validazione_verita(article, verification_data, ai_provider, stream=True), analysis_title, "yellow")
                 show_verification_results(verification_data, agent_analysis, model_name)
             elif verification_type == '3':
                 console.print(f"\n[bold magenta]🤖 Sistema multi-agente articolo: {article['title']} (modalità: {mode})...[/bold magenta]")
                 verification_data = verifier.verify_article(article, mode)
-                agent_analysis = run_multi_agent_verification(article, verification_data, ai_provider)
+                agent_analysis = run_multi_agent_verification(article, verification_data, ai_provider, agent_concurrency)
                 show_verification_results(verification_data, agent_analysis, model_name)
             elif verification_type == '4':
                 console.print(f"\n[bold green]🎯 Sistema multi-agente AUTOMATICO articolo: {article['title']} (modalità: {mode})...[/bold green]")
                 verification_data = verifier.verify_article(article, mode)
-                agent_analysis = run_multi_agent_verification(article, verification_data, ai_provider)
+                agent_analysis = run_multi_agent_verification(article, verification_data, ai_provider, agent_concurrency)
                 show_verification_results(verification_data, agent_analysis, model_name)
             
             # Testo personalizzato
@@ -202,40 +259,40 @@ def main():
                 if custom_text.strip():
                     console.print(f"\n[bold yellow]🔍 Verificando testo personalizzato (modalità: {mode})...[/bold yellow]")
                     verification_data = verifier.verify_text(custom_text, mode)
-                    agent_analysis = agent_verifica({'title': 'Testo personalizzato', 'summary': custom_text}, verification_data, ai_provider)
+                    agent_analysis, _ = stream_to_panel(agent_verifica({'title': 'Testo personalizzato', 'summary': custom_text}, verification_data, ai_provider, stream=True), analysis_title, "yellow")
                     show_verification_results(verification_data, agent_analysis, model_name)
             elif verification_type == '5':
                 custom_text = console.input("\nInserisci il testo da verificare: ")
                 if custom_text.strip():
                     console.print(f"\n[bold yellow]🔍 Verificando testo personalizzato (modalità: {mode})...[/bold yellow]")
                     verification_data = verifier.verify_text(custom_text, mode)
-                    agent_analysis = agent_verifica({'title': 'Testo personalizzato', 'summary': custom_text}, verification_data, ai_provider)
+                    agent_analysis, _ = stream_to_panel(agent_verifica({'title': 'Testo personalizzato', 'summary': custom_text}, verification_data, ai_provider, stream=True), analysis_title, "yellow")
                     show_verification_results(verification_data, agent_analysis, model_name)
             elif verification_type == '6':
                 custom_text = console.input("\nInserisci il testo da verificare: ")
                 if custom_text.strip():
                     console.print(f"\n[bold blue]🧠 Verifica avanzata testo (step-by-step) (modalità: {mode})...[/bold blue]")
                     verification_data = verifier.verify_text(custom_text, mode)
-                    agent_analysis = agent_verifica_advanced({'title': 'Testo personalizzato', 'summary': custom_text}, verification_data, ai_provider)
+                    agent_analysis, _ = stream_to_panel(agent_verifica_advanced({'title': 'Testo personalizzato', 'summary': custom_text}, verification_data, ai_provider, stream=True), analysis_title, "yellow")
                     show_verification_results(verification_data, agent_analysis, model_name)
             elif verification_type == '7':
                 custom_text = console.input("\nInserisci il testo da verificare: ")
                 if custom_text.strip():
                     console.print(f"\n[bold blue]🧠 Validazione avanzata testo (modalità: {mode})...[/bold blue]")
                     verification_data = verifier.verify_text(custom_text, mode)
-                    agent_analysis = agent_validazione_verita_advanced({'title': 'Testo personalizzato', 'summary': custom_text}, verification_data, ai_provider)
+                    agent_analysis, _ = stream_to_panel(agent_validazione_verita_advanced({'title': 'Testo personalizzato', 'summary': custom_text}, verification_data, ai_provider, stream=True), analysis_title, "yellow")
                     show_verification_results(verification_data, agent_analysis, model_name)
             elif verification_type == '8':
                 custom_text = console.input("\nInserisci il testo da verificare: ")
                 if custom_text.strip():
                     console.print(f"\n[bold green]🎯 Sistema multi-agente AUTOMATICO testo (modalità: {mode})...[/bold green]")
                     verification_data = verifier.verify_text(custom_text, mode)
-                    agent_analysis = run_multi_agent_verification({'title': 'Testo personalizzato', 'summary': custom_text}, verification_data, ai_provider)
+                    agent_analysis = run_multi_agent_verification({'title': 'Testo personalizzato', 'summary': custom_text}, verification_data, ai_provider, agent_concurrency)
                     show_verification_results(verification_data, agent_analysis, model_name)
             
             console.input("\nPremi invio per tornare alla lista")
         elif user_input == 'c':
-            handle_settings_menu(console)
+            handle_settings_menu(console, ai_provider, prefetcher)
         elif user_input == '\r' or user_input == '\n':
             show_article(articles[selected_idx])
             console.input("Premi invio per tornare alla lista: ")
@@ -1,27 +1,86 @@
 #!/usr/bin/env python
 
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from .agents import add_verification_prefix
+from .prompting import PromptBuilder
+
+# Grafo delle dipendenze tra agenti: (nome, metodo, dipendenze, etichetta per i log, risultato di fallback).
+# Un fallback None significa "usa create_simple_synthesis".
+AGENT_GRAPH = [
+    ('router', 'agent_router', (), "Agente Router",
+     "TIPO: NARRATIVA\nMOTIVAZIONE: Fallback\nAPPROCCIO: Analisi generale"),
+    ('investigator', 'agent_investigator', ('router',), "Agente Investigatore",
+     "Errore nell'analisi delle fonti"),
+    ('methodologist', 'agent_methodologist', ('investigator',), "Agente Metodologo",
+     "Errore nella valutazione metodologica"),
+    ('fact_checker', 'agent_fact_checker', ('investigator',), "Agente Verificatore",
+     "Errore nella verifica dei fatti"),
+    ('bias_analyzer', 'agent_bias_analyzer', ('investigator', 'methodologist'), "Agente Giudice",
+     "Errore nell'analisi dei bias"),
+    ('consensus_analyzer', 'agent_consensus_analyzer', ('investigator', 'methodologist'), "Agente Consenso",
+     "Errore nell'analisi del consenso"),
+    ('synthesizer', 'agent_synthesizer',
+     ('investigator', 'methodologist', 'fact_checker', 'bias_analyzer', 'consensus_analyzer'),
+     "Agente Sintetizzatore", None),
+]
+
+# Semafori per provider: limitano le chiamate contemporanee verso lo stesso backend
+_provider_slots = weakref.WeakKeyDictionary()
+_provider_slots_lock = threading.Lock()
+
+def _provider_slot(ai_provider, limit):
+    with _provider_slots_lock:
+        slot = _provider_slots.get(ai_provider)
+        if slot is None or slot[0] != limit:
+            slot = _provider_slots[ai_provider] = (limit, threading.BoundedSemaphore(limit))
+        return slot[1]
+
 class MultiAgentVerificationSystem:
-    """Sistema di verifica multi-agente specializzato"""
+    """Sistema di verifica multi-agente specializzato.
     
-    def __init__(self, ai_provider):
+    Gli agenti sono dichiarati in AGENT_GRAPH e vengono eseguiti da uno scheduler
+    che lancia in parallelo quelli le cui dipendenze sono già pronte, con un limite
+    di chiamate contemporanee per provider.
+    """
+    
+    def __init__(self, ai_provider, max_concurrency: int = 3):
         self.ai_provider = ai_provider
+        self.max_concurrency = max(1, max_concurrency)
         self.results = {}
     
+    def _prompt(self, agent, article, verification_data, *parts):
+        """Prefisso condiviso (notizia e fonti) seguito dalle parti proprie dell'agente.
+        
+        Tutti gli agenti, e la verifica standard di ripiego, aprono il prompt con
+        lo stesso prefisso: i provider con cache del prompt lo elaborano una volta.
+        Le parti sono testo fisso oppure coppie (etichetta, risultato di un altro
+        agente); queste ultime vengono accorciate se il prompt supera il budget.
+        """
+        builder = PromptBuilder(self.ai_provider, agent=f"multi_{agent}")
+        add_verification_prefix(builder, article, verification_data)
+        for part in parts:
+            if isinstance(part, tuple):
+                label, text = part
+                builder.add(text, priority=2, prefix=label, suffix="\n")
+            else:
+                builder.fixed(part)
+        return builder.build()
+    
+    def _generate(self, prompt, max_tokens):
+        with _provider_slot(self.ai_provider, self.max_concurrency):
+            return self.ai_provider.generate(prompt, max_tokens=max_tokens)
+    
     def agent_router(self, article, verification_data):
         """🎯 Agente Router: Decide automaticamente il tipo di analisi"""
         print("🎯 Agente Router: Analizzando contenuto per scegliere metodo...")
         
-        title = article.get('title', '')
-        summary = article.get('summary', '')
-        content = verification_data.get('full_content', '')
-        
-        prompt = f"""
-        Sei l'Agente Router. Analizza il contenuto e scegli il metodo di verifica più appropriato.
-
-        CONTENUTO DA ANALIZZARE:
-        Titolo: {title}
-        Riassunto: {summary}
-        Contenuto: {content[:1000]}...
+        prompt = self._prompt(
+            'router', article, verification_data,
+            """
+        Sei l'Agente Router. Analizza la notizia e le fonti riportate sopra e scegli il metodo di verifica più appropriato.
 
         TIPI DI ANALISI DISPONIBILI:
         1. SCIENTIFICA: Per studi, ricerche, scoperte, dati statistici
@@ -47,9 +106,10 @@ class MultiAgentVerificationSystem:
         MOTIVAZIONE: [spiega perché hai scelto questo tipo]
         APPROCCIO: [metodo specifico da usare]
         """
+        )
         
         try:
-            result = self.ai_provider.generate(prompt, max_tokens=200)
+            result = self._generate(prompt, max_tokens=200)
             return result
         except Exception as e:
             print(f"⚠️ Errore Agente Router: {e}")
@@ -59,52 +119,8 @@ class MultiAgentVerificationSystem:
         """Esegue la verifica completa usando tutti gli agenti"""
         print("🤖 Avvio sistema multi-agente di verifica...")
         
-        # Prima determina il tipo di analisi
         try:
-            self.results['router'] = self.agent_router(article, verification_data)
-            print(f"🎯 Tipo di analisi scelto: {self.results['router']}")
-        except Exception as e:
-            print(f"⚠️ Errore Agente Router: {e}")
-            self.results['router'] = "TIPO: NARRATIVA\nMOTIVAZIONE: Fallback\nAPPROCCIO: Analisi generale"
-        
-        try:
-            try:
-                self.results['investigator'] = self.agent_investigator(article, verification_data)
-            except Exception as e:
-                print(f"⚠️ Errore Agente Investigatore: {e}")
-                self.results['investigator'] = "Errore nell'analisi delle fonti"
-            
-            try:
-                self.results['methodologist'] = self.agent_methodologist(article, verification_data)
-            except Exception as e:
-                print(f"⚠️ Errore Agente Metodologo: {e}")
-                self.results['methodologist'] = "Errore nella valutazione metodologica"
-            
-            try:
-                self.results['fact_checker'] = self.agent_fact_checker(article, verification_data)
-            except Exception as e:
-                print(f"⚠️ Errore Agente Verificatore: {e}")
-                self.results['fact_checker'] = "Errore nella verifica dei fatti"
-            
-            try:
-                self.results['bias_analyzer'] = self.agent_bias_analyzer(article, verification_data)
-            except Exception as e:
-                print(f"⚠️ Errore Agente Giudice: {e}")
-                self.results['bias_analyzer'] = "Errore nell'analisi dei bias"
-            
-            try:
-                self.results['consensus_analyzer'] = self.agent_consensus_analyzer(article, verification_data)
-            except Exception as e:
-                print(f"⚠️ Errore Agente Consenso: {e}")
-                self.results['consensus_analyzer'] = "Errore nell'analisi del consenso"
-            
-            try:
-                self.results['synthesizer'] = self.agent_synthesizer(article, verification_data)
-            except Exception as e:
-                print(f"⚠️ Errore Agente Sintetizzatore: {e}")
-                # Se il sintetizzatore fallisce, usa una sintesi semplificata
-                self.results['synthesizer'] = self.create_simple_synthesis(article, verification_data)
-            
+            self._run_graph(article, verification_data)
             return self.results['synthesizer']
             
         except Exception as e:
@@ -114,30 +130,51 @@ class MultiAgentVerificationSystem:
             from .agents import agent_verifica
             return agent_verifica(article, verification_data, self.ai_provider)
     
+    def _run_agent(self, name, method, label, fallback, article, verification_data):
+        """Esegue un singolo agente, applicando il suo fallback in caso di errore"""
+        try:
+            result = getattr(self, method)(article, verification_data)
+            if name == 'router':
+                print(f"🎯 Tipo di analisi scelto: {result}")
+            return result
+        except Exception as e:
+            print(f"⚠️ Errore {label}: {e}")
+            if fallback is None:
+                # Se il sintetizzatore fallisce, usa una sintesi semplificata
+                return self.create_simple_synthesis(article, verification_data)
+            return fallback
+    
+    def _run_graph(self, article, verification_data):
+        """Scheduler: esegue gli agenti appena le loro dipendenze sono completate"""
+        nodes = {name: (method, set(deps), label, fallback) for name, method, deps, label, fallback in AGENT_GRAPH}
+        pending = dict(nodes)
+        running = {}
+        done = set()
+        
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            while pending or running:
+                ready = [name for name, (_, deps, _, _) in pending.items() if deps <= done]
+                for name in ready:
+                    method, _, label, fallback = pending.pop(name)
+                    future = executor.submit(self._run_agent, name, method, label, fallback,
+                                             article, verification_data)
+                    running[future] = name
+                
+                if not running:
+                    raise RuntimeError(f"Dipendenze non risolvibili: {', '.join(pending)}")
+                
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    self.results[name] = future.result()
+                    done.add(name)
+    
     def agent_investigator(self, article, verification_data):
         """🔍 Agente Investigatore: Cerca e raccoglie informazioni chiave"""
         print("🔍 Agente Investigatore: Analizzando fonti e informazioni...")
         
-        fact_check_results = verification_data.get('fact_check_results', [])
-        reliable_results = verification_data.get('reliable_sources_results', [])
         analysis_type = self.results.get('router', 'TIPO: NARRATIVA')
         
-        sources_info = ""
-        if fact_check_results and not fact_check_results[0].get('error'):
-            for result in fact_check_results[:3]:
-                title = result.get('title', '')
-                source = result.get('source', '')
-                search_query = result.get('search_query', '')
-                sources_info += f"- {title} ({source}) - Query: {search_query}\n"
-        
-        reliable_info = ""
-        if reliable_results and not reliable_results[0].get('error'):
-            for result in reliable_results[:3]:
-                title = result.get('title', '')
-                source = result.get('source', '')
-                search_query = result.get('search_query', '')
-                reliable_info += f"- {title} ({source}) - Query: {search_query}\n"
-        
         # Adatta l'analisi al tipo scelto
         type_specific_tasks = {
             'SCIENTIFICA': "1. Identifica studi scientifici e metodologie\n2. Controlla peer review e riviste\n3. Verifica dati statistici e campioni\n4. Cerca critiche metodologiche",
@@ -152,14 +189,13 @@ class MultiAgentVerificationSystem:
         default_tasks = type_specific_tasks.get('NARRATIVA', type_specific_tasks['NARRATIVA'])
         tasks = type_specific_tasks.get(analysis_type.split(':')[1].strip(), default_tasks)
         
-        prompt = f"""
+        prompt = self._prompt(
+            'investigatore', article, verification_data,
+            f"""
         Sei l'Agente Investigatore specializzato in analisi {analysis_type}.
-        Analizza le fonti disponibili per identificare le informazioni chiave.
+        Analizza le fonti riportate sopra per identificare le informazioni chiave.
 
-        NOTIZIA: {article.get('title', '')}
         TIPO ANALISI: {analysis_type}
-        FONTI FACT-CHECKING: {sources_info}
-        FONTI AFFIDABILI: {reliable_info}
 
         COMPITI SPECIALIZZATI:
         {tasks}
@@ -170,8 +206,9 @@ class MultiAgentVerificationSystem:
         - Affermazioni da verificare
         - Fonti sospette o di parte
         """
+        )
         
-        return self.ai_provider.generate(prompt, max_tokens=300)
+        return self._generate(prompt, max_tokens=300)
     
     def agent_methodologist(self, article, verification_data):
         """📊 Agente Analista Metodologico: Valuta studi scientifici"""
@@ -179,12 +216,14 @@ class MultiAgentVerificationSystem:
         
         investigator_result = self.results.get('investigator', '')
         
-        prompt = f"""
+        prompt = self._prompt(
+            'metodologo', article, verification_data,
+            """
         Sei l'Agente Analista Metodologico. Valuta la qualità degli studi scientifici identificati.
 
-        NOTIZIA: {article.get('title', '')}
-        STUDI IDENTIFICATI: {investigator_result}
-
+""",
+            ("        STUDI IDENTIFICATI: ", investigator_result),
+            """
         COMPITI:
         1. Per ogni studio scientifico menzionato:
            - Valuta la metodologia (campione, controlli, design)
@@ -204,8 +243,9 @@ class MultiAgentVerificationSystem:
         - Critiche metodologiche trovate
         - Raccomandazioni
         """
+        )
         
-        return self.ai_provider.generate(prompt, max_tokens=500)
+        return self._generate(prompt, max_tokens=500)
     
     def agent_fact_checker(self, article, verification_data):
         """🎯 Agente Verificatore: Controlla fatti specifici"""
@@ -213,12 +253,14 @@ class MultiAgentVerificationSystem:
         
         investigator_result = self.results.get('investigator', '')
         
-        prompt = f"""
+        prompt = self._prompt(
+            'verificatore', article, verification_data,
+            """
         Sei l'Agente Verificatore. Controlla la veridicità dei fatti specifici.
 
-        NOTIZIA: {article.get('title', '')}
-        AFFERMAZIONI IDENTIFICATE: {investigator_result}
-
+""",
+            ("        AFFERMAZIONI IDENTIFICATE: ", investigator_result),
+            """
         COMPITI:
         1. Per ogni affermazione specifica:
            - Verifica se è supportata da evidenze
@@ -238,8 +280,9 @@ class MultiAgentVerificationSystem:
         - Contraddizioni trovate
         - Gap informativi identificati
         """
+        )
         
-        return self.ai_provider.generate(prompt, max_tokens=400)
+        return self._generate(prompt, max_tokens=400)
     
     def agent_bias_analyzer(self, article, verification_data):
         """⚖️ Agente Giudice: Analizza bias e conflitti di interesse"""
@@ -248,13 +291,15 @@ class MultiAgentVerificationSystem:
         investigator_result = self.results.get('investigator', '')
         methodologist_result = self.results.get('methodologist', '')
         
-        prompt = f"""
+        prompt = self._prompt(
+            'giudice', article, verification_data,
+            """
         Sei l'Agente Giudice. Analizza bias, conflitti di interesse e manipolazioni.
 
-        NOTIZIA: {article.get('title', '')}
-        FONTI IDENTIFICATE: {investigator_result}
-        VALUTAZIONE METODOLOGICA: {methodologist_result}
-
+""",
+            ("        FONTI IDENTIFICATE: ", investigator_result),
+            ("        VALUTAZIONE METODOLOGICA: ", methodologist_result),
+            """
         COMPITI:
         1. Analizza conflitti di interesse:
            - Chi ha finanziato gli studi?
@@ -279,8 +324,9 @@ class MultiAgentVerificationSystem:
         - Manipolazioni sospette
         - Livello di affidabilità delle fonti
         """
+        )
         
-        return self.ai_provider.generate(prompt, max_tokens=500)
+        return self._generate(prompt, max_tokens=500)
     
     def agent_consensus_analyzer(self, article, verification_data):
         """🌐 Agente Consenso: Analizza il consenso scientifico"""
@@ -289,13 +335,15 @@ class MultiAgentVerificationSystem:
         investigator_result = self.results.get('investigator', '')
         methodologist_result = self.results.get('methodologist', '')
         
-        prompt = f"""
+        prompt = self._prompt(
+            'consenso', article, verification_data,
+            """
         Sei l'Agente Consenso. Analizza il consenso scientifico sul tema.
 
-        NOTIZIA: {article.get('title', '')}
-        STUDI IDENTIFICATI: {investigator_result}
-        VALUTAZIONE METODOLOGICA: {methodologist_result}
-
+""",
+            ("        STUDI IDENTIFICATI: ", investigator_result),
+            ("        VALUTAZIONE METODOLOGICA: ", methodologist_result),
+            """
         COMPITI:
         1. Valuta il consenso scientifico:
            - Quanti studi concordano?
@@ -320,8 +368,9 @@ class MultiAgentVerificationSystem:
         - Controversie esistenti
         - Studi outlier e loro affidabilità
         """
+        )
         
-        return self.ai_provider.generate(prompt, max_tokens=400)
+        return self._generate(prompt, max_tokens=400)
     
     def agent_synthesizer(self, article, verification_data):
         """🧠 Agente Sintetizzatore: Combina tutti i risultati"""
@@ -333,18 +382,19 @@ class MultiAgentVerificationSystem:
         bias_analyzer = self.results.get('bias_analyzer', '')
         consensus_analyzer = self.results.get('consensus_analyzer', '')
         
-        prompt = f"""
+        prompt = self._prompt(
+            'sintetizzatore', article, verification_data,
+            """
         Sei l'Agente Sintetizzatore. Combina tutti i risultati per il verdetto finale.
 
-        NOTIZIA: {article.get('title', '')}
-        
         RISULTATI DEGLI AGENTI:
-        🔍 INVESTIGATORE: {investigator}
-        📊 METODOLOGO: {methodologist}
-        🎯 VERIFICATORE: {fact_checker}
-        ⚖️ GIUDICE: {bias_analyzer}
-        🌐 CONSENSO: {consensus_analyzer}
-
+""",
+            ("        🔍 INVESTIGATORE: ", investigator),
+            ("        📊 METODOLOGO: ", methodologist),
+            ("        🎯 VERIFICATORE: ", fact_checker),
+            ("        ⚖️ GIUDICE: ", bias_analyzer),
+            ("        🌐 CONSENSO: ", consensus_analyzer),
+            """
         COMPITI:
         1. Analizza tutti i risultati degli agenti
         2. Pesa le evidenze in base alla qualità
@@ -363,8 +413,9 @@ class MultiAgentVerificationSystem:
 
         Rispondi in italiano con un'analisi strutturata e dettagliata.
         """
+        )
         
-        return self.ai_provider.generate(prompt, max_tokens=500)
+        return self._generate(prompt, max_tokens=500)
     
     def create_simple_synthesis(self, article, verification_data):
         """Crea una sintesi semplificata se il sintetizzatore fallisce"""
@@ -392,7 +443,7 @@ class MultiAgentVerificationSystem:
         
         return synthesis
 
-def run_multi_agent_verification(article, verification_data, ai_provider):
+def run_multi_agent_verification(article, verification_data, ai_provider, max_concurrency=3):
     """Funzione wrapper per eseguire la verifica multi-agente"""
-    system = MultiAgentVerificationSystem(ai_provider)
+    system = MultiAgentVerificationSystem(ai_provider, max_concurrency=max_concurrency)
     return system.run_verification(article, verification_data) 
\ No newline at end of file
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+
+"""Catena di agenti riassunto → implicazioni → teoria in modalità asincrona.
+
+Il contenuto dell'articolo viene scaricato una sola volta e passato a tutte le
+fasi; mentre i modelli generano, il contenuto dell'articolo successivo viene
+scaricato in background, così la rete e l'inferenza si sovrappongono.
+"""
+
+import asyncio
+import queue
+import threading
+import time
+
+from .agents import get_article_full_content, prompt_riassunto, prompt_implicazioni, prompt_teoria, AGENT_MAX_TOKENS
+from .prefetch import Prefetcher
+from .transport import async_transport
+
+STAGES = ('riassunto', 'implicazioni', 'teoria')
+
+class AgentPipeline:
+    """Esegue la catena dei tre agenti su un articolo con asyncio.
+
+    Ogni fase riceve in streaming i token del modello e parte appena la
+    precedente ha finito, con il suo testo nel prompt. timings raccoglie per
+    fase il tempo al primo token e il tempo totale dell'ultima esecuzione.
+    """
+
+    def __init__(self, ai_provider, prefetcher: Prefetcher = None):
+        self.ai_provider = ai_provider
+        self.prefetcher = prefetcher or Prefetcher(max_workers=1)
+        self.timings = {}
+
+    async def arun(self, article, next_article=None, on_token=None) -> dict:
+        """Esegue le tre fasi e restituisce il dict fase -> testo.
+
+        on_token(fase, token) viene chiamata per ogni token; a fine fase riceve
+        token=None. next_article, se indicato, viene scaricato in background.
+        """
+        if next_article is not None:
+            self.prefetcher.add([next_article])
+        self.timings = {}
+        start = time.perf_counter()
+        content = await asyncio.to_thread(get_article_full_content, article)
+        self.timings['contenuto'] = {'total': time.perf_counter() - start}
+
+        results = {}
+        results['riassunto'] = await self._stage(
+            'riassunto', prompt_riassunto(article, content, self.ai_provider), on_token)
+        results['implicazioni'] = await self._stage(
+            'implicazioni', prompt_implicazioni(article, content, results['riassunto'], self.ai_provider), on_token)
+        results['teoria'] = await self._stage(
+            'teoria', prompt_teoria(article, content, results['riassunto'], results['implicazioni'], self.ai_provider), on_token)
+        return results
+
+    async def _stage(self, stage: str, prompt: str, on_token) -> str:
+        parts = []
+        start = time.perf_counter()
+        first_token = None
+        async for token in self.ai_provider.astream(prompt, AGENT_MAX_TOKENS[stage]):
+            if first_token is None:
+                first_token = time.perf_counter() - start
+            parts.append(token)
+            if on_token:
+                on_token(stage, token)
+        if on_token:
+            on_token(stage, None)
+        self.timings[stage] = {'first_token': first_token, 'total': time.perf_counter() - start}
+        return ''.join(parts)
+
+    def run(self, article, next_article=None) -> dict:
+        """Versione sincrona di arun, per chi non ha un event loop"""
+        return asyncio.run(self._in_loop(self.arun(article, next_article)))
+
+    @staticmethod
+    async def _in_loop(coro):
+        """Esegue coro e chiude il client HTTP asincrono legato all'event loop.
+
+        run e stream_stages creano un event loop per articolo: senza aclose ogni
+        loop lascerebbe aperto il suo AsyncClient con le connessioni del pool.
+        """
+        try:
+            return await coro
+        finally:
+            await async_transport.aclose()
+
+    def stream_stages(self, article, next_article=None):
+        """Esegue arun in un thread e restituisce, fase per fase, (nome, generatore di token).
+
+        Ogni generatore va consumato prima di passare alla fase successiva.
+        Chiuderlo prima della fine (per esempio con Ctrl+C in stream_to_panel)
+        annulla l'intera catena.
+        """
+        events = queue.Queue()
+        state = {}
+
+        async def runner():
+            state['loop'] = asyncio.get_running_loop()
+            state['task'] = asyncio.current_task()
+            try:
+                events.put((None, await self.arun(
+                    article, next_article, on_token=lambda stage, token: events.put((stage, token)))))
+            except asyncio.CancelledError:
+                events.put((None, None))
+            except Exception as e:
+                events.put((None, e))
+
+        threading.Thread(target=asyncio.run, args=(self._in_loop(runner()),), daemon=True).start()
+
+        def tokens(stage):
+            finished = False
+            try:
+                while True:
+                    event_stage, value = events.get()
+                    if event_stage is None:
+                        # Catena conclusa, annullata o fallita: non ci sono altre fasi
+                        finished = True
+                        state['done'] = True
+                        if isinstance(value, Exception):
+                            raise value
+                        return
+                    if value is None:
+                        finished = True
+                        return
+                    yield value
+            finally:
+                if not finished:
+                    state['cancelled'] = True
+                    self._cancel(state)
+
+        try:
+            for stage in STAGES:
+                yield stage, tokens(stage)
+                if state.get('cancelled') or state.get('done'):
+                    return
+        finally:
+            self._cancel(state)
+
+    @staticmethod
+    def _cancel(state):
+        loop, task = state.get('loop'), state.get('task')
+        if loop is not None and not task.done():
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                pass
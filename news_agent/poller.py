@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from .fetcher import iter_feed, canonical_link, build_feed_url
+from .transport import transport
+
+DEFAULT_POLLER_PATH = Path.home() / ".news_agent" / "poller.sqlite"
+
+class FeedPoller:
+    """Polling incrementale dei feed RSS.
+
+    Ogni feed viene richiesto con If-None-Match/If-Modified-Since: un 304 costa
+    una sola richiesta senza corpo. Gli elementi già visti (per GUID o link
+    canonico) sono salvati su disco e non vengono restituiti di nuovo, anche
+    dopo un riavvio.
+
+    ETag e Last-Modified di una risposta con articoli nuovi vengono salvati solo
+    in mark_seen, insieme agli articoli: se l'elaborazione si interrompe prima,
+    il poll successivo scarica di nuovo il feed invece di ricevere un 304.
+    """
+
+    def __init__(self, path=None, default_interval: float = 300, max_seen_age: float = 30 * 86400,
+                 user_agent: str = "Mozilla/5.0"):
+        self.path = Path(path) if path else DEFAULT_POLLER_PATH
+        self.default_interval = default_interval
+        self.max_seen_age = max_seen_age
+        self.user_agent = user_agent
+        self._intervals = {}
+        self._next_due = {}
+        # feed -> (etag, last_modified) in attesa di mark_seen
+        self._pending_validators = {}
+        self._conn = None
+        self._lock = threading.Lock()
+        self.stats = {'polls': 0, 'not_modified': 0, 'new_items': 0, 'errors': 0}
+
+    def _connect(self):
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS feeds ("
+                " url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, polled_at REAL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS seen ("
+                " key TEXT PRIMARY KEY, feed TEXT, seen_at REAL NOT NULL)"
+            )
+            conn.execute("DELETE FROM seen WHERE seen_at < ?", (time.time() - self.max_seen_age,))
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def add(self, feed_url: str, interval: float = None):
+        """Registra un feed da controllare ogni `interval` secondi"""
+        self._intervals[feed_url] = interval or self.default_interval
+        self._next_due.setdefault(feed_url, 0.0)
+
+    def due(self):
+        """Feed il cui intervallo è scaduto"""
+        now = time.monotonic()
+        return [url for url, due_at in self._next_due.items() if due_at <= now]
+
+    def seconds_to_next(self) -> float:
+        if not self._next_due:
+            return self.default_interval
+        return max(0.0, min(self._next_due.values()) - time.monotonic())
+
+    @staticmethod
+    def item_key(article: dict) -> str:
+        return article.get('guid') or canonical_link(article.get('link', ''))
+
+    def poll(self, feed_url: str, mark: bool = True):
+        """Scarica il feed se è cambiato e restituisce solo gli articoli nuovi.
+
+        Con mark=False gli articoli non vengono segnati come visti: il chiamante
+        lo fa con mark_seen dopo averli elaborati, così un'interruzione non li perde.
+        """
+        self._next_due[feed_url] = time.monotonic() + self._intervals.get(feed_url, self.default_interval)
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT etag, last_modified FROM feeds WHERE url = ?", (feed_url,)).fetchone()
+        headers = {"User-Agent": self.user_agent}
+        if row is not None:
+            etag, last_modified = row
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        self._count('polls')
+        try:
+            res = transport.get(feed_url, timeout=10, headers=headers, stream=True)
+            try:
+                if res.status_code == 304:
+                    self._count('not_modified')
+                    self._stage_validators(feed_url, row[0] if row else None, row[1] if row else None, [])
+                    return []
+                res.raise_for_status()
+                res.raw.decode_content = True
+                articles = list(iter_feed(res.raw))
+            finally:
+                res.close()
+        except Exception as e:
+            self._count('errors')
+            print(f"⚠️ Polling fallito ({feed_url}): {e}")
+            return []
+        new = self._unseen(articles)
+        self._count('new_items', len(new))
+        self._stage_validators(feed_url, res.headers.get('ETag'), res.headers.get('Last-Modified'), new)
+        if mark:
+            self.mark_seen(feed_url, new)
+        return new
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def _stage_validators(self, feed_url: str, etag, last_modified, new):
+        """Salva subito i validatori se non c'è nulla da elaborare, altrimenti li tiene per mark_seen"""
+        with self._lock:
+            if new:
+                self._pending_validators[feed_url] = (etag, last_modified)
+                return
+            self._pending_validators.pop(feed_url, None)
+            conn = self._connect()
+            self._save_validators(conn, feed_url, etag, last_modified)
+            conn.commit()
+
+    @staticmethod
+    def _save_validators(conn, feed_url: str, etag, last_modified):
+        conn.execute(
+            "INSERT OR REPLACE INTO feeds (url, etag, last_modified, polled_at) VALUES (?, ?, ?, ?)",
+            (feed_url, etag, last_modified, time.time())
+        )
+
+    def _unseen(self, articles):
+        keys = [self.item_key(a) for a in articles]
+        with self._lock:
+            conn = self._connect()
+            seen = set()
+            # Interrogazioni a blocchi per restare sotto il limite di parametri di SQLite
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                seen.update(r[0] for r in conn.execute(f"SELECT key FROM seen WHERE key IN ({placeholders})", chunk))
+        new = []
+        for key, article in zip(keys, articles):
+            if key not in seen:
+                seen.add(key)
+                new.append(article)
+        return new
+
+    def mark_seen(self, feed_url: str, articles, complete: bool = True):
+        """Segna gli articoli come visti e salva i validatori dell'ultimo poll del feed.
+
+        Con complete=False alcuni articoli del poll restano da elaborare: i
+        validatori vengono azzerati, così il poll successivo scarica di nuovo il
+        feed e restituisce gli articoli non segnati.
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO seen (key, feed, seen_at) VALUES (?, ?, ?)",
+                [(self.item_key(a), feed_url, now) for a in articles]
+            )
+            validators = self._pending_validators.pop(feed_url, None)
+            if not complete:
+                self._save_validators(conn, feed_url, None, None)
+            elif validators is not None:
+                self._save_validators(conn, feed_url, *validators)
+            conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+def poll_intervals_from_settings(settings) -> dict:
+    """Intervalli per feed da `poll_intervals` (feed=secondi, separati da virgole)"""
+    lang = settings.get("lang", "it")
+    intervals = {}
+    for entry in settings.get("poll_intervals", "").split(','):
+        feed, _, seconds = entry.strip().rpartition('=')
+        if feed and seconds.strip():
+            intervals[build_feed_url(lang, feed.strip())] = float(seconds)
+    return intervals
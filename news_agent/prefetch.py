@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .agents import scrape_article_content
+from .cache import content_cache
+from .settings import get_bool
+
+class Prefetcher:
+    """Scarica in background il contenuto degli articoli visibili nella lista.
+
+    Ogni chiamata a schedule apre una nuova generazione: i lavori della pagina
+    precedente ancora in coda vengono annullati e quelli che partono dopo il
+    cambio pagina si fermano subito. Le richieste già avviate non si possono
+    interrompere, ma finiscono comunque nella cache. Il testo scaricato per
+    ogni generazione è limitato a max_bytes; superato il limite gli altri
+    articoli restano da scaricare su richiesta. Ogni download prenota la sua
+    dimensione stimata (la media di quelli già fatti) prima di partire, così i
+    thread che partono insieme non superano il limite tutti assieme.
+    """
+
+    ESTIMATED_BYTES = 16 * 1024  # Stima della dimensione di un articolo prima dei primi download
+
+    def __init__(self, max_workers: int = 4, max_bytes: int = 1024 * 1024, fetch=None):
+        self.max_workers = max_workers
+        self.max_bytes = max_bytes
+        self.fetch = fetch or scrape_article_content
+        self._executor = None
+        self._futures = []
+        self._generation = 0
+        self._spent = 0
+        self._lock = threading.Lock()
+        self.stats = {'scheduled': 0, 'fetched': 0, 'cached': 0, 'cancelled': 0,
+                      'over_budget': 0, 'errors': 0, 'bytes': 0}
+
+    def schedule(self, articles):
+        """Annulla il prefetch in corso e avvia quello dei link indicati, nell'ordine dato"""
+        with self._lock:
+            generation = self._cancel_pending()
+            self._spent = 0
+            self._submit(articles, generation)
+
+    def add(self, articles):
+        """Aggiunge articoli al prefetch corrente senza annullare quelli in coda"""
+        with self._lock:
+            self._submit(articles, self._generation)
+
+    def _submit(self, articles, generation: int):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="prefetch")
+        for article in articles:
+            link = article.get('link')
+            if not link:
+                continue
+            if link in content_cache:
+                self.stats['cached'] += 1
+                continue
+            self.stats['scheduled'] += 1
+            self._futures.append(self._executor.submit(self._prefetch, link, generation))
+
+    def cancel(self):
+        """Annulla il prefetch della pagina corrente"""
+        with self._lock:
+            self._cancel_pending()
+
+    def _cancel_pending(self) -> int:
+        self._generation += 1
+        for future in self._futures:
+            if future.cancel():
+                self.stats['cancelled'] += 1
+        self._futures = []
+        return self._generation
+
+    def _estimate(self) -> int:
+        fetched = self.stats['fetched']
+        return self.stats['bytes'] // fetched if fetched else self.ESTIMATED_BYTES
+
+    def _prefetch(self, link: str, generation: int):
+        with self._lock:
+            if generation != self._generation:
+                self.stats['cancelled'] += 1
+                return
+            reserved = self._estimate()
+            # Il primo download della generazione parte anche con un limite più piccolo della stima
+            if self._spent and self._spent + reserved > self.max_bytes:
+                self.stats['over_budget'] += 1
+                return
+            self._spent += reserved
+        try:
+            content = self.fetch(link)
+        except Exception:
+            content = None
+        size = len(content.encode('utf-8')) if content else 0
+        with self._lock:
+            # La prenotazione viene sostituita dalla dimensione reale
+            if generation == self._generation:
+                self._spent += size - reserved
+            if content:
+                self.stats['fetched'] += 1
+                self.stats['bytes'] += size
+            else:
+                self.stats['errors'] += 1
+
+    def close(self):
+        with self._lock:
+            self._cancel_pending()
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+def create_prefetcher(settings):
+    """Crea il prefetcher dalle impostazioni, None se disattivato"""
+    if not get_bool(settings, 'prefetch_enabled', True):
+        return None
+    return Prefetcher(
+        max_workers=int(settings.get('prefetch_workers', 4)),
+        max_bytes=int(float(settings.get('prefetch_max_kb', 1024)) * 1024),
+    )
@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+
+"""Costruzione dei prompt entro un budget di token.
+
+Un prompt è una sequenza di sezioni: quelle fisse (istruzioni, titolo) non
+vengono mai toccate, le altre hanno una priorità e, se il prompt supera il
+budget, vengono accorciate a partire dalla priorità più bassa. Il taglio
+dipende solo dal testo in ingresso, quindi lo stesso articolo produce sempre
+lo stesso prompt e la cache delle risposte continua a funzionare.
+"""
+
+import math
+import threading
+
+try:
+    import tiktoken
+except ImportError:  # Conteggio esatto per OpenAI opzionale: pip install tiktoken
+    tiktoken = None
+
+# Caratteri per token stimati per provider, prudenti per testi in italiano
+CHARS_PER_TOKEN = {'OpenAIProvider': 3.5, 'ClaudeProvider': 3.2, 'OllamaProvider': 3.0}
+DEFAULT_CHARS_PER_TOKEN = 3.0
+
+TRUNCATION_MARK = " [...]"
+
+class TokenCounter:
+    """Conta i token di un testo: esatto con un encoding tiktoken, altrimenti stimato dai caratteri"""
+
+    def __init__(self, chars_per_token: float = DEFAULT_CHARS_PER_TOKEN, encoding=None):
+        self.chars_per_token = chars_per_token
+        self.encoding = encoding
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.encoding is not None:
+            return len(self.encoding.encode(text))
+        return math.ceil(len(text) / self.chars_per_token)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Taglia il testo a max_tokens token, all'ultimo spazio, segnando il taglio"""
+        if self.count(text) <= max_tokens:
+            return text
+        keep = max_tokens - self.count(TRUNCATION_MARK)
+        if keep <= 0:
+            return ''
+        if self.encoding is not None:
+            head = self.encoding.decode(self.encoding.encode(text)[:keep])
+        else:
+            head = text[:int(keep * self.chars_per_token)]
+        cut = head.rfind(' ')
+        if cut > len(head) // 2:
+            head = head[:cut]
+        return head.rstrip() + TRUNCATION_MARK
+
+_counters = {}
+_counters_lock = threading.Lock()
+
+def _base_providers(ai_provider):
+    """Provider reali dietro cache e fallback"""
+    inner = getattr(ai_provider, 'provider', None)
+    if inner is not None:
+        return _base_providers(inner)
+    if hasattr(ai_provider, 'providers'):
+        return [base for provider in ai_provider.providers for base in _base_providers(provider)]
+    return [ai_provider]
+
+def _openai_encoding(model):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding('o200k_base')
+
+def token_counter(ai_provider) -> TokenCounter:
+    """Contatore adatto al provider; con il fallback usa la stima più prudente tra i provider"""
+    providers = _base_providers(ai_provider)
+    key = tuple((provider.__class__.__name__, getattr(provider, 'model', None)) for provider in providers)
+    with _counters_lock:
+        counter = _counters.get(key)
+        if counter is not None:
+            return counter
+    names = [name for name, _ in key]
+    counter = None
+    if tiktoken is not None and names and all(name == 'OpenAIProvider' for name in names):
+        try:
+            counter = TokenCounter(encoding=_openai_encoding(key[0][1] or 'gpt-4o'))
+        except Exception:
+            # L'encoding si scarica al primo uso: senza rete si torna alla stima
+            counter = None
+    if counter is None:
+        counter = TokenCounter(min(
+            (CHARS_PER_TOKEN.get(name, DEFAULT_CHARS_PER_TOKEN) for name in names),
+            default=DEFAULT_CHARS_PER_TOKEN
+        ))
+    with _counters_lock:
+        _counters[key] = counter
+    return counter
+
+class PromptStats:
+    """Token dei prompt per agente: chiamate, media, massimo e token tagliati, thread-safe"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, agent: str, tokens: int, trimmed: int, prefix_tokens: int = 0):
+        with self._lock:
+            entry = self._stats.setdefault(agent, {'calls': 0, 'tokens': 0, 'max_tokens': 0, 'trimmed': 0,
+                                                   'trimmed_calls': 0, 'prefix_tokens': 0})
+            entry['calls'] += 1
+            entry['tokens'] += tokens
+            entry['prefix_tokens'] += prefix_tokens
+            entry['max_tokens'] = max(entry['max_tokens'], tokens)
+            entry['trimmed'] += trimmed
+            entry['trimmed_calls'] += int(trimmed > 0)
+
+    def stats(self) -> dict:
+        """Statistiche per agente, dalla media più alta"""
+        with self._lock:
+            result = {agent: dict(entry, avg_tokens=entry['tokens'] / entry['calls'],
+                                  prefix_share=entry['prefix_tokens'] / entry['tokens'] if entry['tokens'] else 0.0)
+                      for agent, entry in self._stats.items()}
+        return dict(sorted(result.items(), key=lambda item: -item[1]['avg_tokens']))
+
+prompt_stats = PromptStats()
+
+class PrefixedPrompt(str):
+    """Prompt che inizia con un prefisso condiviso da più chiamate.
+
+    Per il resto del codice (cache delle risposte, fallback, stream) è una
+    stringa qualsiasi; i provider con cache del prompt leggono `prefix` per
+    marcarne la fine.
+    """
+
+    def __new__(cls, prefix: str, rest: str):
+        prompt = super().__new__(cls, prefix + rest)
+        prompt.prefix = prefix
+        return prompt
+
+class _Section:
+    __slots__ = ('text', 'priority', 'min_tokens', 'prefix', 'suffix')
+
+    def __init__(self, text, priority, min_tokens, prefix, suffix):
+        self.text = text
+        self.priority = priority
+        self.min_tokens = min_tokens
+        self.prefix = prefix
+        self.suffix = suffix
+
+class PromptBuilder:
+    """Compone un prompt per sezioni rispettando un budget di token.
+
+    fixed() aggiunge testo che non viene mai tagliato; add() aggiunge una
+    sezione con priorità: più è alta, più a lungo viene conservata. A parità
+    di priorità si taglia prima la sezione che compare più in basso. Le
+    sezioni scendono prima fino a min_tokens e solo se non basta oltre, così
+    il budget viene sempre rispettato. Una sezione ridotta a zero sparisce
+    insieme a prefix e suffix.
+
+    Con end_prefix() le sezioni precedenti diventano un prefisso condiviso:
+    viene adattato da solo a prefix_share del budget e build() restituisce un
+    PrefixedPrompt, così i provider possono riusarne la cache.
+    """
+
+    default_budget = 4000
+    # Quota del budget riservata al prefisso condiviso
+    prefix_share = 0.6
+
+    def __init__(self, ai_provider=None, agent: str = 'prompt', budget: int = None):
+        self.counter = token_counter(ai_provider) if ai_provider is not None else TokenCounter()
+        self.agent = agent
+        self.budget = budget or self.default_budget
+        self.tokens = 0
+        self._sections = []
+        self._prefix_end = None
+
+    def fixed(self, text: str) -> 'PromptBuilder':
+        self._sections.append(_Section(text, None, 0, '', ''))
+        return self
+
+    def add(self, text: str, priority: float = 1, min_tokens: int = 0,
+            prefix: str = '', suffix: str = '') -> 'PromptBuilder':
+        self._sections.append(_Section(text or '', priority, min_tokens, prefix, suffix))
+        return self
+
+    def end_prefix(self) -> 'PromptBuilder':
+        """Chiude il prefisso condiviso: le sezioni aggiunte finora aprono allo stesso modo i prompt di più agenti"""
+        self._prefix_end = len(self._sections)
+        return self
+
+    def build(self) -> str:
+        sections = self._sections
+        texts = [s.text for s in sections]
+        overhead = [self.counter.count(s.prefix) + self.counter.count(s.suffix) for s in sections]
+        counts = [self.counter.count(text) + (extra if text else 0) for text, extra in zip(texts, overhead)]
+        if self._prefix_end is None:
+            trimmed = self._fit(range(len(sections)), self.budget, texts, counts, overhead)
+        else:
+            # Il prefisso si adatta alla sua quota di budget senza guardare il
+            # resto del prompt, così resta identico per tutti gli agenti
+            head = range(self._prefix_end)
+            tail = range(self._prefix_end, len(sections))
+            trimmed = self._fit(head, int(self.budget * self.prefix_share), texts, counts, overhead)
+            trimmed += self._fit(tail, self.budget - sum(counts[i] for i in head), texts, counts, overhead)
+        parts = [
+            (s.prefix + text + s.suffix if s.priority is not None else text) if text else ''
+            for s, text in zip(sections, texts)
+        ]
+        if self._prefix_end is None:
+            prompt = ''.join(parts)
+            prefix_tokens = 0
+        else:
+            prompt = PrefixedPrompt(''.join(parts[:self._prefix_end]), ''.join(parts[self._prefix_end:]))
+            prefix_tokens = self.counter.count(prompt.prefix)
+        self.tokens = self.counter.count(prompt)
+        prompt_stats.record(self.agent, self.tokens, trimmed, prefix_tokens)
+        return prompt
+
+    def _fit(self, indices, budget: int, texts, counts, overhead) -> int:
+        """Accorcia le sezioni indicate finché non rientrano in budget; restituisce i token tagliati"""
+        sections = self._sections
+        excess = sum(counts[i] for i in indices) - budget
+        trimmed = 0
+        order = sorted(
+            (i for i in indices if sections[i].priority is not None and texts[i]),
+            key=lambda i: (sections[i].priority, -i)
+        )
+        # Primo passaggio rispettando min_tokens; il secondo solo se non è bastato
+        for respect_minimum in (True, False):
+            for i in order:
+                if excess <= 0:
+                    return trimmed
+                if not texts[i]:
+                    continue
+                minimum = sections[i].min_tokens if respect_minimum else 0
+                target = max(minimum, counts[i] - excess - overhead[i])
+                text = self.counter.truncate(texts[i], target)
+                count = self.counter.count(text) + overhead[i] if text else 0
+                excess -= counts[i] - count
+                trimmed += counts[i] - count
+                texts[i], counts[i] = text, count
+        return trimmed
+
+def configure_prompting(settings):
+    """Applica il budget dei prompt definito in settings.ini"""
+    PromptBuilder.default_budget = int(settings.get('prompt_budget_tokens', 4000))
+    PromptBuilder.prefix_share = float(settings.get('prompt_prefix_share', 0.6))
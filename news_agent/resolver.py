@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+
+import html
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from bs4 import BeautifulSoup
+
+from .cache import TTLCache
+from .scrape_store import scrape_store
+from .transport import transport
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# Primo <link> con un URL come testo, come nella risposta XML di /rss/articles
+_LINK = re.compile(rb'<link[^>]*>\s*(?:<!\[CDATA\[)?\s*(https?://[^<\s\]]+)', re.I)
+
+# Selettori dei link all'editore nella pagina HTML di Google News
+PAGE_SELECTORS = [
+    'a[href*="http"]:not([href*="google.com"])', 'a[data-n-tid]', 'a[jslog]',
+    'article a[href*="http"]', '.VDXfz a[href*="http"]', 'a[href*="repubblica"]',
+    'a[href*="corriere"]', 'a[href*="ansa"]', 'a[href*="ilfatto"]',
+    'a[href*="lastampa"]', 'a[href*="ilsole24ore"]', 'a[href*="ilpost"]',
+    'a[href*="ilmanifesto"]'
+]
+
+def is_google_news(url: str) -> bool:
+    return 'news.google.com' in url
+
+class GoogleNewsResolver:
+    """Risolve i link di Google News nell'URL dell'editore.
+
+    La corrispondenza link -> editore non cambia: viene tenuta in memoria e
+    salvata nell'archivio su disco, così un articolo già visto non costa più
+    nessuna richiesta. resolve_many risolve i link di un intero feed in
+    parallelo sulla sessione condivisa. I link non risolti vengono riprovati
+    solo dopo failure_ttl secondi.
+    """
+
+    def __init__(self, max_workers: int = 8, failure_ttl: float = 300):
+        self.max_workers = max_workers
+        self._memory = TTLCache(max_entries=4096, ttl=7 * 86400)
+        self._failed = TTLCache(max_entries=1024, ttl=failure_ttl)
+        self._lock = threading.Lock()
+        self.stats = {'memory_hits': 0, 'store_hits': 0, 'resolved': 0, 'failed': 0}
+
+    def configure(self, max_workers: int = None):
+        if max_workers is not None:
+            self.max_workers = max_workers
+
+    def resolve(self, url: str):
+        """URL dell'editore per un link di Google News (il link stesso se non lo è), None se fallisce"""
+        if not is_google_news(url):
+            return url
+        target = self._cached(url)
+        if target is not None:
+            return target
+        target = scrape_store.get_redirect(url)
+        if target:
+            self._remember(url, target, 'store_hits')
+            return target
+        return self._fetch(url)
+
+    def resolve_many(self, urls, max_workers: int = None) -> dict:
+        """Risolve più link insieme e restituisce il dict link -> URL dell'editore.
+
+        I link già noti vengono letti dalla memoria e dall'archivio con una sola
+        interrogazione; gli altri vengono richiesti in parallelo. I link non
+        risolti sono assenti dal risultato.
+        """
+        resolved = {}
+        pending = []
+        for url in dict.fromkeys(u for u in urls if u):
+            if not is_google_news(url):
+                resolved[url] = url
+                continue
+            target = self._cached(url)
+            if target is not None:
+                resolved[url] = target
+            elif url not in self._failed:
+                pending.append(url)
+        stored = scrape_store.get_redirects(pending)
+        for url, target in stored.items():
+            self._remember(url, target, 'store_hits')
+            resolved[url] = target
+        pending = [url for url in pending if url not in stored]
+        if pending:
+            workers = max(1, min(len(pending), max_workers or self.max_workers))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for url, target in zip(pending, executor.map(self._fetch, pending)):
+                    if target:
+                        resolved[url] = target
+        return resolved
+
+    def _cached(self, url: str):
+        target = self._memory.get(url)
+        if target is not None:
+            self._count('memory_hits')
+        return target
+
+    def _remember(self, url: str, target: str, counter: str):
+        self._memory.set(url, target)
+        self._count(counter)
+
+    def _fetch(self, url: str):
+        if url in self._failed:
+            return None
+        try:
+            target = _resolve_google_news(url, dict(HEADERS))
+        except Exception:
+            target = None
+        if not target:
+            self._failed.set(url, True)
+            self._count('failed')
+            return None
+        scrape_store.set_redirect(url, target)
+        self._remember(url, target, 'resolved')
+        return target
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+def _resolve_google_news(url, headers):
+    if 'news.google.com/rss/articles' in url:
+        response = transport.get(url, headers=headers, timeout=10, allow_redirects=True)
+        response.raise_for_status()
+        if 'consent.google.com' in response.url:
+            headers['Accept'] = 'application/rss+xml, application/xml, text/xml'
+            headers['Accept-Language'] = 'en-US,en;q=0.9'
+            response = transport.get(url, headers=headers, timeout=10, allow_redirects=False)
+        return parse_link(response.content)
+
+    response = transport.get(url, headers=headers, timeout=10)
+    response.raise_for_status()
+    soup = BeautifulSoup(response.content, 'html.parser')
+    for selector in PAGE_SELECTORS:
+        for link in soup.select(selector):
+            href = link.get('href')
+            if href and 'google.com' not in href and href.startswith('http'):
+                return href
+    return None
+
+def parse_link(content: bytes):
+    """URL contenuto nel primo <link> della risposta, senza costruire un albero"""
+    match = _LINK.search(content)
+    if not match:
+        return None
+    return html.unescape(match.group(1).decode('utf-8', 'replace'))
+
+# Risolutore condiviso da scraper, prefetch e modalità batch
+google_resolver = GoogleNewsResolver()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_STORE_PATH = Path.home() / ".news_agent" / "scrape_cache.sqlite"
+
+class ScrapeStore:
+    """Archivio su disco (SQLite) dei contenuti scaricati e dei redirect di Google News.
+
+    Le pagine conservano ETag/Last-Modified per essere rivalidate con GET
+    condizionali; la dimensione totale è limitata e l'archivio viene compattato
+    periodicamente, così può girare per settimane senza crescere all'infinito.
+    Lo spazio delle voci eliminate torna al disco solo quando è una parte
+    rilevante del file, a blocchi, senza riscrivere tutto il database.
+    I redirect non scadono (il link di Google News punta sempre allo stesso
+    articolo): oltre max_redirects vengono eliminati i più vecchi.
+    """
+
+    COMPACT_EVERY = 200  # Scritture tra due compattazioni automatiche
+    RECLAIM_MIN_BYTES = 4 * 1024 * 1024  # Spazio libero minimo prima di restituirlo al disco
+    RECLAIM_MIN_RATIO = 0.25  # ...e quota minima del file che deve occupare
+    RECLAIM_PAGES = 2048  # Pagine restituite al massimo per compattazione
+
+    def __init__(self, path=None, max_bytes: int = 50 * 1024 * 1024,
+                 fresh_for: float = 3600, max_age: float = 30 * 86400,
+                 max_redirects: int = 50000, enabled: bool = True):
+        self.path = Path(path) if path else DEFAULT_STORE_PATH
+        self.max_bytes = max_bytes
+        self.fresh_for = fresh_for
+        self.max_age = max_age
+        self.max_redirects = max_redirects
+        self.enabled = enabled
+        self._conn = None
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def configure(self, path=None, max_bytes: int = None, fresh_for: float = None,
+                  enabled: bool = None):
+        with self._lock:
+            if path and Path(path) != self.path:
+                self._close()
+                self.path = Path(path)
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            if fresh_for is not None:
+                self.fresh_for = fresh_for
+            if enabled is not None:
+                self.enabled = enabled
+                if not enabled:
+                    self._close()
+
+    def _connect(self):
+        """Apre il database alla prima richiesta; se fallisce disabilita l'archivio"""
+        if self._conn is not None or not self.enabled:
+            return self._conn
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            # Vale solo per un database nuovo; uno esistente passa alla modalità
+            # incrementale con il primo VACUUM completo (vedi _reclaim)
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                " url TEXT PRIMARY KEY, content TEXT NOT NULL,"
+                " etag TEXT, last_modified TEXT,"
+                " fetched_at REAL NOT NULL, accessed_at REAL NOT NULL,"
+                " size INTEGER NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS redirects ("
+                " url TEXT PRIMARY KEY, target TEXT NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS pages_accessed ON pages(accessed_at)")
+            conn.commit()
+            self._conn = conn
+            self._compact()
+        except (sqlite3.Error, OSError) as e:
+            print(f"⚠️ Archivio scraping non disponibile ({self.path}): {e}")
+            self.enabled = False
+            self._conn = None
+        return self._conn
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def get_page(self, url: str):
+        """Restituisce la pagina salvata come dict, oppure None"""
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return None
+            row = conn.execute(
+                "SELECT content, etag, last_modified, fetched_at FROM pages WHERE url = ?",
+                (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE pages SET accessed_at = ? WHERE url = ?", (time.time(), url))
+            conn.commit()
+            content, etag, last_modified, fetched_at = row
+            return {
+                'content': content,
+                'etag': etag,
+                'last_modified': last_modified,
+                'fetched_at': fetched_at,
+                'fresh': time.time() - fetched_at < self.fresh_for,
+            }
+
+    def set_page(self, url: str, content: str, etag: str = None, last_modified: str = None):
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            now = time.time()
+            conn.execute(
+                "INSERT OR REPLACE INTO pages"
+                " (url, content, etag, last_modified, fetched_at, accessed_at, size)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, content, etag, last_modified, now, now, len(content.encode('utf-8')))
+            )
+            conn.commit()
+            self._after_write()
+
+    def revalidated(self, url: str):
+        """Segna come fresca una pagina confermata dal server con un 304"""
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            now = time.time()
+            conn.execute("UPDATE pages SET fetched_at = ?, accessed_at = ? WHERE url = ?", (now, now, url))
+            conn.commit()
+
+    def get_redirect(self, url: str):
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return None
+            row = conn.execute("SELECT target FROM redirects WHERE url = ?", (url,)).fetchone()
+            return row[0] if row else None
+
+    def set_redirect(self, url: str, target: str):
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            conn.execute(
+                "INSERT OR REPLACE INTO redirects (url, target, created_at) VALUES (?, ?, ?)",
+                (url, target, time.time())
+            )
+            conn.commit()
+            self._after_write()
+
+    def get_redirects(self, urls) -> dict:
+        """Redirect salvati per più link con poche query, come dict link -> destinazione"""
+        urls = list(urls)
+        found = {}
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return found
+            # Interrogazioni a blocchi per restare sotto il limite di parametri di SQLite
+            for i in range(0, len(urls), 500):
+                chunk = urls[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                found.update(conn.execute(
+                    f"SELECT url, target FROM redirects WHERE url IN ({placeholders})", chunk
+                ))
+        return found
+
+    def compact(self):
+        with self._lock:
+            if self._connect() is not None:
+                self._compact()
+
+    def _after_write(self):
+        self._writes += 1
+        if self._writes >= self.COMPACT_EVERY:
+            self._compact()
+
+    def _compact(self):
+        """Elimina voci vecchie, rispetta il limite di spazio e, se serve, recupera lo spazio libero"""
+        conn = self._conn
+        self._writes = 0
+        try:
+            changes = conn.total_changes
+            cutoff = time.time() - self.max_age
+            conn.execute("DELETE FROM pages WHERE accessed_at < ?", (cutoff,))
+            # I redirect non hanno scadenza, solo un numero massimo
+            conn.execute(
+                "DELETE FROM redirects WHERE url NOT IN"
+                " (SELECT url FROM redirects ORDER BY created_at DESC LIMIT ?)",
+                (self.max_redirects,)
+            )
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+            if total > self.max_bytes:
+                # Scende al 90% del limite eliminando le pagine usate meno di recente
+                excess = total - int(self.max_bytes * 0.9)
+                freed = 0
+                stale = []
+                for url, size in conn.execute("SELECT url, size FROM pages ORDER BY accessed_at"):
+                    stale.append((url,))
+                    freed += size
+                    if freed >= excess:
+                        break
+                conn.executemany("DELETE FROM pages WHERE url = ?", stale)
+            conn.commit()
+            if conn.total_changes != changes:
+                self._reclaim(conn)
+        except sqlite3.Error as e:
+            print(f"⚠️ Errore compattazione archivio scraping: {e}")
+
+    def _reclaim(self, conn):
+        """Restituisce al disco le pagine libere, solo se sono una parte rilevante del file.
+
+        Con auto_vacuum incrementale si liberano al più RECLAIM_PAGES pagine per
+        volta, così il lock resta occupato per poco. Un archivio creato prima
+        dell'auto_vacuum riceve un VACUUM completo, una sola volta, che lo
+        converte alla modalità incrementale.
+        """
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        pages = conn.execute("PRAGMA page_count").fetchone()[0]
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if free * page_size < self.RECLAIM_MIN_BYTES or free < pages * self.RECLAIM_MIN_RATIO:
+            return
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            # execute() farebbe un solo passo della pragma, cioè una pagina;
+            # executescript la esegue fino in fondo
+            conn.executescript(f"PRAGMA incremental_vacuum({self.RECLAIM_PAGES});")
+        else:
+            conn.execute("VACUUM")
+
+    def stats(self) -> dict:
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return {'enabled': False}
+            pages, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+            redirects = conn.execute("SELECT COUNT(*) FROM redirects").fetchone()[0]
+            return {'enabled': True, 'pages': pages, 'bytes': size, 'redirects': redirects}
+
+# Archivio condiviso dallo scraper degli agenti
+scrape_store = ScrapeStore()
@@ -32,6 +32,13 @@ def load_settings(config_file=None):
     cp.read(config_file)
     return cp['DEFAULT']
 
+def get_bool(settings, key, default=False):
+    """Legge un valore booleano (true/false, yes/no, on/off, 1/0) dalle impostazioni"""
+    value = settings.get(key, '')
+    if not value or not value.strip():
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
 def save_settings(settings, config_file=None):
     config_file = config_file or Path(__file__).parent / "settings.ini"
     cp = configparser.ConfigParser()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+
+"""Normalizzazione del testo di feed e pagine scaricate.
+
+I pattern sono compilati una volta sola e ogni passaggio viene saltato quando
+il testo non contiene il carattere che lo attiva ('<' per i tag, '&' per le
+entità): sulla maggior parte dei titoli resta solo il compattamento degli spazi.
+"""
+
+import html
+import re
+
+_TAG = re.compile(r'<[^<]+?>')
+# Entità rimaste dopo html.unescape (malformate o sconosciute)
+_LEFTOVER_ENTITY = re.compile(r'&[a-zA-Z0-9#]+;')
+# Tutto ciò che non è lettera, cifra, spazio o punteggiatura comune; esclude
+# anche i caratteri di controllo, che non sono né \w né spazi dopo il compattamento
+_SCRAPE_DISALLOWED = re.compile(r'[^\w\s\.\,\!\?\:\;\-\(\)\[\]\'\"]')
+
+def collapse_spaces(text: str) -> str:
+    """Sostituisce ogni sequenza di spazi con uno spazio singolo e toglie quelli esterni"""
+    return ' '.join(text.split())
+
+def normalize_field(text: str, strip_tags: bool = False) -> str:
+    """Pulisce un campo del feed: tag HTML (opzionale), entità e spazi"""
+    if not text:
+        return ''
+    if strip_tags and '<' in text:
+        text = _TAG.sub('', text)
+    if '&' in text:
+        text = html.unescape(text)
+        if '&' in text:
+            text = _LEFTOVER_ENTITY.sub('', text)
+    return collapse_spaces(text)
+
+def clean_scraped_text(text: str, max_chars: int = None) -> str:
+    """Pulisce il testo estratto da una pagina e lo tronca a max_chars caratteri"""
+    return truncate_text(_SCRAPE_DISALLOWED.sub('', collapse_spaces(text)), max_chars)
+
+def truncate_text(text: str, max_chars: int = None) -> str:
+    """Tronca a max_chars caratteri aggiungendo i puntini di sospensione"""
+    if not text or max_chars is None or len(text) <= max_chars:
+        return text
+    return text[:max_chars] + "..."
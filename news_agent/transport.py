@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+
+import asyncio
+import threading
+import time
+import weakref
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import httpx
+except ImportError:  # Client asincrono opzionale: pip install news_agent[async]
+    httpx = None
+
+class HTTPTransport:
+    """Livello di trasporto HTTP condiviso: sessione con pool di connessioni per host,
+    keep-alive, retry con backoff e contatori di latenza per host."""
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 10,
+                 retries: int = 2, backoff_factor: float = 0.5):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self._session = None
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._host_slots = {}
+
+    def configure(self, pool_connections: int = None, pool_maxsize: int = None,
+                  retries: int = None, backoff_factor: float = None):
+        """Aggiorna la configurazione; la sessione viene ricreata alla prossima richiesta"""
+        with self._lock:
+            if pool_connections is not None:
+                self.pool_connections = pool_connections
+            if pool_maxsize is not None:
+                self.pool_maxsize = pool_maxsize
+            if retries is not None:
+                self.retries = retries
+            if backoff_factor is not None:
+                self.backoff_factor = backoff_factor
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def set_host_limit(self, host: str, limit: int):
+        """Limita le richieste contemporanee verso un host (None o 0 per rimuovere il limite)"""
+        with self._lock:
+            if limit:
+                self._host_slots[host] = threading.BoundedSemaphore(limit)
+            else:
+                self._host_slots.pop(host, None)
+
+    @property
+    def session(self) -> requests.Session:
+        with self._lock:
+            if self._session is None:
+                self._session = self._build_session()
+            return self._session
+
+    def _build_session(self) -> requests.Session:
+        # I POST verso i modelli non vengono ripetuti sugli errori di stato:
+        # sono costosi e non sempre idempotenti. Gli errori di connessione sì.
+        retry = Retry(
+            total=self.retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=frozenset(['GET', 'HEAD', 'OPTIONS']),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        host = urlsplit(url).netloc
+        slot = self._host_slots.get(host)
+        if slot is not None:
+            with slot:
+                return self._timed_request(host, method, url, **kwargs)
+        return self._timed_request(host, method, url, **kwargs)
+
+    def _timed_request(self, host: str, method: str, url: str, **kwargs) -> requests.Response:
+        start = time.perf_counter()
+        error = False
+        try:
+            return self.session.request(method, url, **kwargs)
+        except Exception:
+            error = True
+            raise
+        finally:
+            self._record(host, time.perf_counter() - start, error)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def _record(self, host: str, elapsed: float, error: bool):
+        with self._lock:
+            entry = self._stats.get(host)
+            if entry is None:
+                entry = self._stats[host] = {'requests': 0, 'errors': 0, 'total_time': 0.0, 'max_time': 0.0}
+            entry['requests'] += 1
+            entry['errors'] += int(error)
+            entry['total_time'] += elapsed
+            entry['max_time'] = max(entry['max_time'], elapsed)
+
+    def stats(self) -> dict:
+        """Contatori di latenza per host, ordinati per tempo totale"""
+        with self._lock:
+            result = {}
+            for host, entry in sorted(self._stats.items(), key=lambda item: -item[1]['total_time']):
+                result[host] = dict(entry, avg_time=entry['total_time'] / entry['requests'])
+            return result
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats.clear()
+
+class AsyncHTTPTransport:
+    """Controparte asincrona di HTTPTransport.
+
+    Con httpx installato usa un AsyncClient condiviso per event loop (pool e
+    keep-alive nativi); altrimenti esegue le richieste del trasporto sincrono in
+    un thread. Le latenze finiscono negli stessi contatori per host.
+    """
+
+    def __init__(self, sync_transport: HTTPTransport):
+        self.sync = sync_transport
+        self._clients = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    @property
+    def native(self) -> bool:
+        return httpx is not None
+
+    def _client(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._clients.get(loop)
+            if client is None:
+                limits = httpx.Limits(
+                    max_connections=self.sync.pool_connections * self.sync.pool_maxsize,
+                    max_keepalive_connections=self.sync.pool_maxsize,
+                )
+                transport = httpx.AsyncHTTPTransport(retries=self.sync.retries, limits=limits)
+                client = self._clients[loop] = httpx.AsyncClient(transport=transport)
+            return client
+
+    async def request(self, method: str, url: str, **kwargs):
+        if not self.native:
+            return await asyncio.to_thread(self.sync.request, method, url, **kwargs)
+        host = urlsplit(url).netloc
+        start = time.perf_counter()
+        error = False
+        try:
+            return await self._client().request(method, url, **kwargs)
+        except Exception:
+            error = True
+            raise
+        finally:
+            self.sync._record(host, time.perf_counter() - start, error)
+
+    async def get(self, url: str, **kwargs):
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url: str, **kwargs):
+        return await self.request('POST', url, **kwargs)
+
+    async def aclose(self):
+        """Chiude il client dell'event loop corrente"""
+        if not self.native:
+            return
+        with self._lock:
+            client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+# Trasporto condiviso da fetcher, scraper, verifier e provider AI
+transport = HTTPTransport()
+async_transport = AsyncHTTPTransport(transport)
+
+def configure_transport(settings):
+    """Applica le impostazioni di rete definite in settings.ini"""
+    transport.configure(
+        pool_connections=int(settings.get('http_pool_connections', 10)),
+        pool_maxsize=int(settings.get('http_pool_maxsize', 10)),
+        retries=int(settings.get('http_retries', 2)),
+        backoff_factor=float(settings.get('http_backoff', 0.5)),
+    )
@@ -4,12 +4,14 @@ import os
 import webbrowser
 import sys
 import select
+import threading
 import tty
 import termios
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 from rich.text import Text
+from rich.live import Live
 
 def get_arrow_input():
     """Gestisce l'input con supporto per le frecce su macOS/Linux"""
@@ -69,6 +71,48 @@ def show_table(articles, page, per_page, selected_idx=None, has_serpapi=False):
     commands += ", q=esci"
     console.print(f"[i]{commands}[/i]")
 
+class LoadingTable:
+    """Tabella provvisoria con i primi articoli ricevuti mentre i feed vengono scaricati.
+    
+    add() è pensata come on_article di fetch_many e può essere chiamata da più
+    thread; le righe sono in ordine di arrivo, quelle definitive (senza
+    duplicati, dalla più recente) arrivano con show_table a download finito.
+    """
+    
+    def __init__(self, limit):
+        self.limit = limit
+        self.count = 0
+        self._rows = []
+        self._lock = threading.Lock()
+        self._live = None
+    
+    def add(self, article):
+        with self._lock:
+            self.count += 1
+            if len(self._rows) < self.limit:
+                self._rows.append((article['date'][:16], article['author'], article['title']))
+    
+    def __rich__(self):
+        with self._lock:
+            rows = list(self._rows)
+            count = self.count
+        table = Table(title=f"📰 Caricamento notizie... ({count} ricevute)", border_style="yellow")
+        table.add_column("Data", style="yellow", no_wrap=True)
+        table.add_column("Fonte", style="cyan", no_wrap=True)
+        table.add_column("Titolo", style="white")
+        for row in rows:
+            table.add_row(*row, style="dim")
+        return table
+    
+    def __enter__(self):
+        self._live = Live(self, console=Console(), refresh_per_second=8, transient=True)
+        self._live.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self._live.stop()
+        return False
+
 def show_article(article):
     from .agents import get_article_full_content
     
@@ -86,6 +130,41 @@ def show_article(article):
     )
     Console().print(article_panel)
 
+def stream_to_panel(tokens, title, border_style="white"):
+    """Mostra i token in un pannello che si aggiorna mentre arrivano.
+    
+    Restituisce (testo, esito), con esito 'completo', 'interrotto' o 'errore'.
+    Ctrl+C interrompe la generazione: il generatore viene chiuso (annullando la
+    richiesta al provider) e si restituisce il testo ricevuto fin lì. Lo stesso
+    vale per un errore del provider a risposta iniziata. Gli avvisi compaiono
+    solo nel pannello, il testo restituito contiene soltanto i token.
+    """
+    console = Console()
+    text = Text()
+    panel = Panel(text, title=title, border_style=border_style)
+    parts = []
+    status = 'completo'
+    try:
+        with Live(panel, console=console, refresh_per_second=12, vertical_overflow="visible") as live:
+            try:
+                for token in tokens:
+                    parts.append(token)
+                    text.append(token)
+                    live.update(panel)
+            except KeyboardInterrupt:
+                status = 'interrotto'
+                text.append("\n[interrotto]", style="red")
+                live.update(panel)
+            except Exception as e:
+                # Errore a risposta iniziata: si tiene il testo ricevuto fin lì
+                status = 'errore'
+                text.append(f"\n[errore: {e}]", style="red")
+                live.update(panel)
+    finally:
+        if hasattr(tokens, 'close'):
+            tokens.close()
+    return ''.join(parts), status
+
 def show_verification_menu():
     """Mostra il menu di verifica"""
     console = Console()
@@ -238,6 +317,8 @@ def show_settings_menu():
         "4. Configura SerpAPI (verifica notizie)\n"
         "5. Modifica impostazioni generali\n"
         "6. Visualizza configurazione attuale\n"
+        "7. Statistiche di rete e cache\n"
+        "8. Cache risposte AI: usa / ignora (rigenera sempre)\n"
         "0. Torna indietro\n\n"
         "[dim]Seleziona un'opzione:[/dim]",
         title="Menu Configurazione",
@@ -461,6 +542,114 @@ def show_current_settings():
     console.print(Panel.fit(settings_text, title="Configurazione Attuale", border_style="green"))
     console.input("\nPremi invio per tornare indietro")
 
+def show_performance_stats(ai_provider=None, prefetcher=None):
+    """Mostra latenze per host, stato delle cache, prefetch, token dei prompt e salute dei provider AI"""
+    from .transport import transport
+    from .cache import content_cache, search_cache, prompt_cache
+    from .scrape_store import scrape_store
+    from .resolver import google_resolver
+    from .prompting import prompt_stats
+    
+    console = Console()
+    console.clear()
+    
+    table = Table(title="🌐 Latenza per host", border_style="cyan")
+    table.add_column("Host", style="cyan")
+    table.add_column("Richieste", justify="right")
+    table.add_column("Errori", justify="right", style="red")
+    table.add_column("Media (s)", justify="right")
+    table.add_column("Max (s)", justify="right")
+    table.add_column("Totale (s)", justify="right", style="yellow")
+    for host, entry in transport.stats().items():
+        table.add_row(
+            host, str(entry['requests']), str(entry['errors']),
+            f"{entry['avg_time']:.2f}", f"{entry['max_time']:.2f}", f"{entry['total_time']:.2f}"
+        )
+    console.print(table)
+    
+    content = content_cache.stats()
+    store = scrape_store.stats()
+    cache_text = (
+        f"[bold]Cache contenuti:[/bold] {content['entries']} articoli, "
+        f"{content['hits']} hit / {content['misses']} miss\n"
+    )
+    if store.get('enabled'):
+        cache_text += (
+            f"[bold]Archivio su disco:[/bold] {store['pages']} pagine "
+            f"({store['bytes'] / 1024 / 1024:.1f} MB), {store['redirects']} redirect"
+        )
+    else:
+        cache_text += "[bold]Archivio su disco:[/bold] disattivato"
+    redirects = google_resolver.stats
+    cache_text += (
+        f"\n[bold]Link Google News:[/bold] {redirects['resolved']} risolti, "
+        f"{redirects['memory_hits']} dalla memoria / {redirects['store_hits']} dall'archivio, "
+        f"{redirects['failed']} non risolti"
+    )
+    search = search_cache.stats()
+    cache_text += (
+        f"\n[bold]Cache SerpAPI:[/bold] {search['entries']} ricerche, "
+        f"{search['memory_hits']} hit memoria / {search['disk_hits']} hit disco / "
+        f"{search['misses']} miss ({search['hit_rate']:.0%})"
+    )
+    prompts = prompt_cache.stats()
+    cache_text += (
+        f"\n[bold]Cache risposte AI:[/bold] {prompts['entries']} risposte, "
+        f"{prompts['memory_hits']} hit memoria / {prompts['disk_hits']} hit disco / "
+        f"{prompts['misses']} miss ({prompts['hit_rate']:.0%}), "
+        f"{prompts['bytes_saved'] / 1024:.1f} KB risparmiati"
+    )
+    if prefetcher is not None:
+        prefetch = prefetcher.stats
+        cache_text += (
+            f"\n[bold]Prefetch:[/bold] {prefetch['fetched']} articoli scaricati in anticipo "
+            f"({prefetch['bytes'] / 1024:.1f} KB), {prefetch['cached']} già in cache, "
+            f"{prefetch['cancelled']} annullati, {prefetch['over_budget']} oltre il limite, "
+            f"{prefetch['errors']} non riusciti"
+        )
+    console.print(Panel.fit(cache_text, title="Cache", border_style="green"))
+    
+    prompts_by_agent = prompt_stats.stats()
+    if prompts_by_agent:
+        prompt_table = Table(title="📏 Token dei prompt per agente", border_style="yellow")
+        prompt_table.add_column("Agente", style="cyan")
+        prompt_table.add_column("Chiamate", justify="right")
+        prompt_table.add_column("Media", justify="right", style="yellow")
+        prompt_table.add_column("Max", justify="right")
+        prompt_table.add_column("Prefisso", justify="right", style="green")
+        prompt_table.add_column("Tagliati", justify="right", style="red")
+        for agent, entry in prompts_by_agent.items():
+            prompt_table.add_row(
+                agent, str(entry['calls']), f"{entry['avg_tokens']:.0f}", str(entry['max_tokens']),
+                f"{entry['prefix_share']:.0%}" if entry['prefix_tokens'] else "-",
+                f"{entry['trimmed']} in {entry['trimmed_calls']} chiamate" if entry['trimmed'] else "-"
+            )
+        console.print(prompt_table)
+    
+    # Il provider con fallback può essere avvolto dalla cache delle risposte
+    fallback = getattr(ai_provider, 'provider', ai_provider)
+    if hasattr(fallback, 'health_stats'):
+        health_table = Table(title="🩺 Salute provider AI", border_style="magenta")
+        health_table.add_column("Provider", style="cyan")
+        health_table.add_column("Circuito")
+        health_table.add_column("Chiamate", justify="right")
+        health_table.add_column("Successo", justify="right")
+        health_table.add_column("p50 (s)", justify="right")
+        for name, entry in fallback.health_stats().items():
+            p50 = f"{entry['p50']:.2f}" if entry['p50'] is not None else "-"
+            health_table.add_row(
+                name, entry['state'], str(entry['calls']),
+                f"{entry['success_rate']:.0%}", p50
+            )
+        console.print(health_table)
+        hedge = fallback.hedge_stats()
+        if hedge['enabled']:
+            console.print(
+                f"[bold]Richieste duplicate:[/bold] {hedge['hedged']} su {hedge['calls']} "
+                f"({hedge['hedge_rate']:.0%}), vinte dal provider di riserva: {hedge['hedge_wins']}"
+            )
+    console.input("\nPremi invio per tornare indietro")
+
 def save_settings_change(key, value):
     """Salva una modifica nelle impostazioni"""
     from .settings import load_settings
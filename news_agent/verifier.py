@@ -1,73 +1,39 @@
 #!/usr/bin/env python
 
-import requests
 import json
 from typing import Dict, List, Optional
-from bs4 import BeautifulSoup
 import re
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .transport import transport
+from .cache import TTLCache, search_cache
+from .settings import get_bool
+from .textnorm import truncate_text
+from .agents import scrape_article_content
 
 class NewsVerifier:
-    def __init__(self, serpapi_key: str):
+    def __init__(self, serpapi_key: str, concurrent: bool = True, max_workers: int = 8,
+                 max_per_host: int = 4, ai_provider=None, multi_query: bool = True):
         self.serpapi_key = serpapi_key
         self.base_url = "https://serpapi.com/search"
+        # Provider AI per le query intelligenti: se non iniettato viene creato una sola volta
+        self.ai_provider = ai_provider
+        self._ai_provider_lock = threading.Lock()
+        # Query generate, memorizzate per hash di (titolo, riassunto)
+        self._query_cache = TTLCache(max_entries=512, ttl=6 * 3600)
+        # Ricerca concorrente: tutte le coppie (lingua, query) partono insieme
+        self.concurrent = concurrent
+        self.max_workers = max_workers
+        # Multi-query: usa tutte le query generate dall'LLM, non solo la prima
+        self.multi_query = multi_query
+        self.max_per_host = max_per_host
+        transport.set_host_limit('serpapi.com', max_per_host)
     
     def scrape_article_content(self, url: str) -> str:
-        """Scarica e estrae il contenuto dell'articolo dal link"""
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            # Gestione encoding migliorata
-            if response.encoding == 'ISO-8859-1':
-                response.encoding = 'utf-8'
-            
-            soup = BeautifulSoup(response.content, 'html.parser', from_encoding=response.encoding)
-            
-            for tag in soup(['script', 'style', 'nav', 'header', 'footer', 'aside']):
-                tag.decompose()
-            
-            # Cerca il contenuto principale
-            content_selectors = [
-                'article',
-                '[class*="content"]',
-                '[class*="article"]',
-                '[class*="post"]',
-                '.entry-content',
-                '.post-content',
-                '.article-content',
-                'main'
-            ]
-            
-            content = ""
-            for selector in content_selectors:
-                elements = soup.select(selector)
-                if elements:
-                    content = ' '.join([elem.get_text(strip=True) for elem in elements])
-                    if len(content) > 200:
-                        break
-            
-            if not content or len(content) < 200:
-                body = soup.find('body')
-                if body:
-                    content = body.get_text(strip=True)
-            
-            content = re.sub(r'\s+', ' ', content)
-            # Pulizia più robusta dei caratteri problematici
-            content = re.sub(r'[^\w\s\.\,\!\?\:\;\-\(\)\[\]\'\"àèéìòùÀÈÉÌÒÙ]', '', content)
-            # Rimuovi caratteri di controllo
-            content = ''.join(char for char in content if ord(char) >= 32 or char in '\n\t')
-            
-            if len(content) > 3000:
-                content = content[:3000] + "..."
-            
-            return content
-            
-        except Exception as e:
-            return None
+        """Scarica e estrae il contenuto dell'articolo dal link (con cache condivisa)"""
+        # Stesso motore e stessa cache degli agenti; al verificatore bastano 3000 caratteri
+        return truncate_text(scrape_article_content(url), 3000)
     
     def analyze_content_for_languages(self, content: str) -> list:
         """Analizza il contenuto per determinare le lingue più appropriate per la ricerca"""
@@ -145,15 +111,34 @@ class NewsVerifier:
         
         return [supported_languages[lang] for lang in languages_to_search if lang in supported_languages]
     
+    def _get_ai_provider(self):
+        """Restituisce il provider AI, creandolo dalle impostazioni solo la prima volta"""
+        with self._ai_provider_lock:
+            if self.ai_provider is None:
+                from .ai_providers import create_ai_provider
+                from .settings import load_settings
+                
+                settings = load_settings()
+                provider = settings.get('provider', 'auto')
+                self.ai_provider = create_ai_provider(provider, settings)
+            return self.ai_provider
+    
     def _create_smart_query(self, title: str, summary: str) -> str:
-        """Crea una query intelligente usando un LLM"""
+        """Crea una query intelligente usando un LLM (la prima delle tre generate)"""
+        return self._create_smart_queries(title, summary)[0]
+    
+    def _create_smart_queries(self, title: str, summary: str) -> List[str]:
+        """Crea fino a 3 query intelligenti con una sola chiamata LLM (memorizzate per titolo e riassunto)"""
+        key = hashlib.sha256(f"{title}\x00{summary}".encode('utf-8')).hexdigest()
+        queries = self._query_cache.get(key)
+        if queries is None:
+            queries = self._generate_smart_queries(title, summary)
+            self._query_cache.set(key, queries)
+        return queries
+    
+    def _generate_smart_queries(self, title: str, summary: str) -> List[str]:
         try:
-            from .ai_providers import create_ai_provider
-            from .settings import load_settings
-            
-            settings = load_settings()
-            provider = settings.get('provider', 'auto')
-            ai_provider = create_ai_provider(provider, settings)
+            ai_provider = self._get_ai_provider()
             
             prompt = f"""
             Crea 3 query di ricerca Google ottimali per verificare questa notizia.
@@ -181,21 +166,22 @@ class NewsVerifier:
             
             response = ai_provider.generate(prompt, max_tokens=100)
             
-            # Estrai la prima query
-            lines = response.split('\n')
-            for line in lines:
-                if line.startswith('QUERY1:'):
-                    query = line.replace('QUERY1:', '').strip()
+            # Estrai QUERY1..QUERY3 nell'ordine
+            queries = []
+            for line in response.split('\n'):
+                match = re.match(r'\s*QUERY[123]:\s*(.+)', line)
+                if match:
                     # Rimuovi le virgolette se presenti
-                    query = query.strip('"').strip("'")
-                    return query
+                    query = match.group(1).strip().strip('"').strip("'").strip()
+                    if query and query.lower() not in [q.lower() for q in queries]:
+                        queries.append(query)
             
             # Fallback se non riesce a estrarre
-            return self._create_simple_query(title, summary)
+            return queries or [self._create_simple_query(title, summary)]
             
         except Exception as e:
             print(f"⚠️ Errore creazione query LLM: {e}")
-            return self._create_simple_query(title, summary)
+            return [self._create_simple_query(title, summary)]
     
     def _create_simple_query(self, title: str, summary: str) -> str:
         """Fallback: crea query semplice senza LLM"""
@@ -234,8 +220,183 @@ class NewsVerifier:
         
         return query
     
+    def _mode_limits(self, mode: str):
+        """Restituisce (query per lingua, risultati massimi, lingue massime) per la modalità"""
+        if mode == "veloce":
+            return 2, 5, 2
+        elif mode == "grande":
+            return 5, 15, 4
+        # "media" e modalità sconosciute
+        return 3, 10, 3
+    
+    def _lang_code(self, lang_config: Dict) -> str:
+        """Lingua dei modelli di query e delle fonti; le lingue senza modelli usano quelli inglesi.
+        
+        Vale solo per costruire le ricerche: i risultati conservano la lingua originale.
+        """
+        hl = lang_config['hl']
+        return hl if hl in ('it', 'en', 'fr', 'de', 'es') else 'en'
+    
+    def _normalize_search_params(self, params: Dict) -> Dict:
+        """Normalizza i parametri di ricerca per la chiave di cache (senza api_key)"""
+        normalized = {}
+        for key, value in params.items():
+            if key == 'api_key':
+                continue
+            if isinstance(value, str):
+                value = ' '.join(value.lower().split())
+            normalized[key] = value
+        return normalized
+    
+    def _serpapi_search(self, search_query: str, lang_config: Dict, mode: str, label: str) -> List[Dict]:
+        """Esegue una singola ricerca SerpAPI (passando dalla cache) e restituisce i risultati organici"""
+        # Si chiedono sempre 5 risultati: la ricerca costa uguale e la stessa risposta
+        # in cache serve a tutte le modalità (veloce ne usa solo 3)
+        params = {
+            'api_key': self.serpapi_key,
+            'engine': 'google',
+            'q': search_query,
+            'num': 5,
+            'gl': lang_config['gl'],
+            'hl': lang_config['hl']
+        }
+        limit = 3 if mode == "veloce" else 5
+        
+        cache_key = search_cache.make_key(self._normalize_search_params(params))
+        organic_results = search_cache.get(cache_key)
+        if organic_results is not None:
+            print(f"💾 SerpAPI {label} '{search_query}' ({lang_config['name']}): {len(organic_results)} risultati in cache")
+            return organic_results[:limit]
+        
+        response = transport.get(self.base_url, params=params, timeout=10)
+        data = response.json()
+        
+        print(f"🔍 SerpAPI {label} '{search_query}' ({lang_config['name']}): {len(data.get('organic_results', []))} risultati")
+        
+        organic_results = data.get('organic_results', [])
+        # Le risposte con errore (quota, chiave non valida...) non vanno in cache
+        if response.ok and 'error' not in data:
+            search_cache.set(cache_key, organic_results)
+        return organic_results[:limit]
+    
+    def _run_searches(self, tasks: list, max_results: int, rank: bool = False) -> List[Dict]:
+        """Esegue i task di ricerca e restituisce i risultati unici (per URL).
+        
+        In modalità concorrente le richieste girano su un pool grande quanto il
+        limite di connessioni verso SerpAPI: quelle in più restano nella coda del
+        pool, non bloccate in un thread sul limite dell'host. Appena sono arrivati
+        abbastanza risultati le richieste in coda vengono annullate, quelle già
+        prese da un thread ma non ancora inviate si fermano e quelle in corso
+        vengono ignorate. Con rank=True i risultati vengono ordinati per rilevanza
+        invece che per ordine dei task.
+        """
+        if not tasks:
+            return []
+        
+        results_by_task = {}
+        seen_links = set()
+        
+        if not self.concurrent:
+            for i, task in enumerate(tasks):
+                # Se abbiamo già abbastanza risultati, fermati
+                if len(seen_links) >= max_results:
+                    break
+                results_by_task[i] = task()
+                seen_links.update(self._normalize_link(r['link']) for r in results_by_task[i])
+        else:
+            stop = threading.Event()
+            lock = threading.Lock()
+            found_by_task = {}
+            
+            def run(i, task):
+                # Il controllo avviene nel thread, così una ricerca già presa dal
+                # pool non parte se nel frattempo i risultati sono bastati
+                if stop.is_set():
+                    return
+                found = task()
+                with lock:
+                    found_by_task[i] = found
+                    seen_links.update(self._normalize_link(r['link']) for r in found)
+                    if len(seen_links) >= max_results:
+                        stop.set()
+            
+            executor = ThreadPoolExecutor(max_workers=min(self.max_workers, self.max_per_host, len(tasks)))
+            try:
+                futures = [executor.submit(run, i, task) for i, task in enumerate(tasks)]
+                for future in as_completed(futures):
+                    future.result()
+                    if stop.is_set():
+                        break
+            finally:
+                stop.set()
+                executor.shutdown(wait=False, cancel_futures=True)
+            # Le ricerche ancora in corso non entrano più nel risultato
+            with lock:
+                results_by_task.update(found_by_task)
+        
+        merged = self._merge_results([results_by_task[i] for i in sorted(results_by_task)], rank)
+        return merged[:max_results]
+    
+    def _normalize_link(self, link: str) -> str:
+        """Forma canonica di un URL per il confronto tra risultati"""
+        link = link.strip().lower().split('#', 1)[0].rstrip('/')
+        for prefix in ('https://', 'http://'):
+            if link.startswith(prefix):
+                link = link[len(prefix):]
+        if link.startswith('www.'):
+            link = link[4:]
+        return link
+    
+    def _merge_results(self, result_lists: List[List[Dict]], rank: bool) -> List[Dict]:
+        """Unisce le liste di risultati eliminando i duplicati per URL.
+        
+        Il punteggio di un URL è la somma di 1/posizione su tutte le ricerche che lo
+        hanno restituito: compare in più query → sale in classifica.
+        """
+        merged = {}
+        scores = {}
+        for results in result_lists:
+            for position, result in enumerate(results, 1):
+                key = self._normalize_link(result['link'])
+                if key not in merged:
+                    merged[key] = dict(result, matched_queries=[result['search_query']])
+                    scores[key] = 0.0
+                elif result['search_query'] not in merged[key]['matched_queries']:
+                    merged[key]['matched_queries'].append(result['search_query'])
+                scores[key] += 1.0 / position
+        
+        if not rank:
+            return list(merged.values())
+        # sorted è stabile: a parità di punteggio resta l'ordine dei task
+        ranked = sorted(merged, key=lambda key: -scores[key])
+        for key in ranked:
+            merged[key]['relevance'] = round(scores[key], 3)
+        return [merged[key] for key in ranked]
+    
+    def _add_full_content(self, results: List[Dict], mode: str) -> List[Dict]:
+        """Scarica il contenuto completo dei soli risultati selezionati"""
+        if mode == "veloce" or not results:
+            for result in results:
+                result['full_content'] = ""
+            return results
+        
+        if self.concurrent:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(results))) as executor:
+                contents = list(executor.map(self.scrape_article_content, [r['link'] for r in results]))
+        else:
+            contents = [self.scrape_article_content(r['link']) for r in results]
+        
+        for result, full_content in zip(results, contents):
+            result['full_content'] = full_content
+        return results
+    
     def search_fact_check(self, query, mode="media", content=""):
-        """Cerca articoli di fact-checking sulla query con ricerca intelligente multilingue"""
+        """Cerca articoli di fact-checking sulla query con ricerca intelligente multilingue.
+        
+        `query` può essere una stringa o una lista di query: in quel caso tutte vengono
+        cercate insieme e i risultati uniti, senza duplicati e ordinati per rilevanza.
+        """
+        queries = [query] if isinstance(query, str) else list(query)
         # Determina le lingue da usare
         languages_to_search = self.analyze_content_for_languages(content) if content else [
             {'name': 'Italiano', 'gl': 'it', 'hl': 'it'},
@@ -245,22 +406,7 @@ class NewsVerifier:
         print(f"🌐 Ricerca intelligente in: {', '.join([lang['name'] for lang in languages_to_search])}")
         
         # Configurazione basata sulla modalità
-        if mode == "veloce":
-            max_queries_per_lang = 2
-            max_results = 5
-            max_languages = 2
-        elif mode == "media":
-            max_queries_per_lang = 3
-            max_results = 10
-            max_languages = 3
-        elif mode == "grande":
-            max_queries_per_lang = 5
-            max_results = 15
-            max_languages = 4
-        else:
-            max_queries_per_lang = 3
-            max_results = 10
-            max_languages = 3
+        max_queries_per_lang, max_results, max_languages = self._mode_limits(mode)
         
         # Limita il numero di lingue per efficienza
         languages_to_search = languages_to_search[:max_languages]
@@ -268,81 +414,58 @@ class NewsVerifier:
         # Query per fact-checking in diverse lingue (ridotte)
         fact_check_queries = {
             'it': [
-                f'"{query}" fact check',
-                f'"{query}" fake news'
+                '"{query}" fact check',
+                '"{query}" fake news'
             ],
             'en': [
-                f'"{query}" fact check',
-                f'"{query}" fake news'
+                '"{query}" fact check',
+                '"{query}" fake news'
             ],
             'fr': [
-                f'"{query}" fact check',
-                f'"{query}" fake news'
+                '"{query}" fact check',
+                '"{query}" fake news'
             ],
             'de': [
-                f'"{query}" fact check',
-                f'"{query}" fake news'
+                '"{query}" fact check',
+                '"{query}" fake news'
             ],
             'es': [
-                f'"{query}" fact check',
-                f'"{query}" fake news'
+                '"{query}" fact check',
+                '"{query}" fake news'
             ]
         }
         
-        all_results = []
-        
-        # Esegue ricerche in tutte le lingue determinate
-        for lang_config in languages_to_search:
-            # Se abbiamo già abbastanza risultati, fermati
-            if len(all_results) >= max_results:
-                break
-                
-            lang_code = next(k for k, v in {'it': 'it', 'en': 'en', 'fr': 'fr', 'de': 'de', 'es': 'es'}.items() 
-                           if v == lang_config['hl'])
-            
-            queries = fact_check_queries.get(lang_code, fact_check_queries['en'])[:max_queries_per_lang]
-            
-            for search_query in queries:
-                # Se abbiamo già abbastanza risultati, fermati
-                if len(all_results) >= max_results:
-                    break
+        def make_task(search_query, lang_config):
+            def task():
                 try:
-                    params = {
-                        'api_key': self.serpapi_key,
-                        'engine': 'google',
-                        'q': search_query,
-                        'num': 3 if mode == "veloce" else 5,
-                        'gl': lang_config['gl'],
-                        'hl': lang_config['hl']
-                    }
-                    
-                    response = requests.get('https://serpapi.com/search', params=params, timeout=10)
-                    data = response.json()
-                    
-                    print(f"🔍 SerpAPI fact-check '{search_query}' ({lang_config['name']}): {len(data.get('organic_results', []))} risultati")
-                    
-                    if 'organic_results' in data:
-                        for result in data['organic_results']:
-                            full_content = self.scrape_article_content(result.get('link', '')) if mode != "veloce" else ""
-                            
-                            all_results.append({
-                                'title': result.get('title', ''),
-                                'link': result.get('link', ''),
-                                'snippet': result.get('snippet', ''),
-                                'source': result.get('source', ''),
-                                'full_content': full_content,
-                                'search_query': search_query,
-                                'language': lang_code
-                            })
-                            
+                    return [{
+                        'title': result.get('title', ''),
+                        'link': result.get('link', ''),
+                        'snippet': result.get('snippet', ''),
+                        'source': result.get('source', ''),
+                        'search_query': search_query,
+                        'language': lang_config['hl']
+                    } for result in self._serpapi_search(search_query, lang_config, mode, "fact-check")]
                 except Exception as e:
                     print(f"Errore ricerca fact-check {lang_config['name']}: {e}")
-                    continue
+                    return []
+            return task
         
-        return all_results[:max_results]
+        # Una ricerca per ogni combinazione (lingua, modello di query, query)
+        tasks = []
+        for lang_config in languages_to_search:
+            lang_code = self._lang_code(lang_config)
+            templates = fact_check_queries.get(lang_code, fact_check_queries['en'])[:max_queries_per_lang]
+            for template in templates:
+                for q in queries:
+                    tasks.append(make_task(template.format(query=q), lang_config))
+        
+        results = self._run_searches(tasks, max_results, rank=len(queries) > 1)
+        return self._add_full_content(results, mode)
 
     def search_reliable_sources(self, query, mode="media", content=""):
-        """Cerca fonti affidabili sulla query con ricerca intelligente multilingue"""
+        """Cerca fonti affidabili sulla query con ricerca intelligente multilingue (una o più query)"""
+        queries = [query] if isinstance(query, str) else list(query)
         # Determina le lingue da usare
         languages_to_search = self.analyze_content_for_languages(content) if content else [
             {'name': 'Italiano', 'gl': 'it', 'hl': 'it'},
@@ -352,22 +475,7 @@ class NewsVerifier:
         print(f"🌐 Ricerca fonti affidabili in: {', '.join([lang['name'] for lang in languages_to_search])}")
         
         # Configurazione basata sulla modalità
-        if mode == "veloce":
-            max_queries_per_lang = 2
-            max_results = 5
-            max_languages = 2
-        elif mode == "media":
-            max_queries_per_lang = 3
-            max_results = 10
-            max_languages = 3
-        elif mode == "grande":
-            max_queries_per_lang = 5
-            max_results = 15
-            max_languages = 4
-        else:
-            max_queries_per_lang = 3
-            max_results = 10
-            max_languages = 3
+        max_queries_per_lang, max_results, max_languages = self._mode_limits(mode)
         
         # Limita il numero di lingue per efficienza
         languages_to_search = languages_to_search[:max_languages]
@@ -375,24 +483,24 @@ class NewsVerifier:
         # Query per fonti affidabili in diverse lingue (ridotte)
         reliable_queries = {
             'it': [
-                f'"{query}"',
-                f'"{query}" inchiesta'
+                '"{query}"',
+                '"{query}" inchiesta'
             ],
             'en': [
-                f'"{query}"',
-                f'"{query}" investigation'
+                '"{query}"',
+                '"{query}" investigation'
             ],
             'fr': [
-                f'"{query}"',
-                f'"{query}" enquête'
+                '"{query}"',
+                '"{query}" enquête'
             ],
             'de': [
-                f'"{query}"',
-                f'"{query}" untersuchung'
+                '"{query}"',
+                '"{query}" untersuchung'
             ],
             'es': [
-                f'"{query}"',
-                f'"{query}" investigación'
+                '"{query}"',
+                '"{query}" investigación'
             ]
         }
         
@@ -426,53 +534,49 @@ class NewsVerifier:
             ]
         }
         
-        all_results = []
-        
-        # Esegue ricerche in tutte le lingue determinate
-        for lang_config in languages_to_search:
-            lang_code = next(k for k, v in {'it': 'it', 'en': 'en', 'fr': 'fr', 'de': 'de', 'es': 'es'}.items() 
-                           if v == lang_config['hl'])
-            
-            queries = reliable_queries.get(lang_code, reliable_queries['en'])[:max_queries_per_lang]
-            sources = reliable_sources.get(lang_code, reliable_sources['en'])
-            
-            for search_query in queries:
+        def make_task(search_query, lang_config, sources):
+            def task():
                 try:
-                    params = {
-                        'api_key': self.serpapi_key,
-                        'engine': 'google',
-                        'q': search_query,
-                        'num': 3 if mode == "veloce" else 5,
-                        'gl': lang_config['gl'],
-                        'hl': lang_config['hl']
-                    }
-                    
-                    response = requests.get('https://serpapi.com/search', params=params, timeout=10)
-                    data = response.json()
-                    
-                    print(f"🔍 SerpAPI fonti affidabili '{search_query}' ({lang_config['name']}): {len(data.get('organic_results', []))} risultati")
-                    
-                    if 'organic_results' in data:
-                        for result in data['organic_results']:
-                            link = result.get('link', '').lower()
-                            if any(source in link for source in sources):
-                                full_content = self.scrape_article_content(result.get('link', '')) if mode != "veloce" else ""
-                                
-                                all_results.append({
-                                    'title': result.get('title', ''),
-                                    'link': result.get('link', ''),
-                                    'snippet': result.get('snippet', ''),
-                                    'source': result.get('source', ''),
-                                    'full_content': full_content,
-                                    'search_query': search_query,
-                                    'language': lang_code
-                                })
-                                
+                    return [{
+                        'title': result.get('title', ''),
+                        'link': result.get('link', ''),
+                        'snippet': result.get('snippet', ''),
+                        'source': result.get('source', ''),
+                        'search_query': search_query,
+                        'language': lang_config['hl']
+                    } for result in self._serpapi_search(search_query, lang_config, mode, "fonti affidabili")
+                      if any(source in result.get('link', '').lower() for source in sources)]
                 except Exception as e:
                     print(f"Errore ricerca fonti affidabili {lang_config['name']}: {e}")
-                    continue
+                    return []
+            return task
+        
+        # Una ricerca per ogni combinazione (lingua, modello di query, query)
+        tasks = []
+        for lang_config in languages_to_search:
+            lang_code = self._lang_code(lang_config)
+            templates = reliable_queries.get(lang_code, reliable_queries['en'])[:max_queries_per_lang]
+            sources = reliable_sources.get(lang_code, reliable_sources['en'])
+            for template in templates:
+                for q in queries:
+                    tasks.append(make_task(template.format(query=q), lang_config, sources))
         
-        return all_results[:max_results]
+        results = self._run_searches(tasks, max_results, rank=len(queries) > 1)
+        return self._add_full_content(results, mode)
+    
+    def _select_queries(self, title: str, summary: str) -> List[str]:
+        queries = self._create_smart_queries(title, summary)
+        return queries if self.multi_query else queries[:1]
+    
+    def _search_all(self, query, mode, content):
+        """Esegue fact-check e ricerca fonti affidabili, in parallelo se abilitato"""
+        if not self.concurrent:
+            return (self.search_fact_check(query, mode, content),
+                    self.search_reliable_sources(query, mode, content))
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            fact_check = executor.submit(self.search_fact_check, query, mode, content)
+            reliable = executor.submit(self.search_reliable_sources, query, mode, content)
+            return fact_check.result(), reliable.result()
     
     def verify_article(self, article: Dict, mode: str = "media") -> Dict:
         """Verifica un articolo completo"""
@@ -480,17 +584,16 @@ class NewsVerifier:
         summary = article.get('summary', '')
         content = article.get('content', '') or summary
         
-        # Crea query più intelligenti
-        query = self._create_smart_query(title, summary)
+        # Crea query più intelligenti (tutte e tre in modalità multi-query)
+        query = self._select_queries(title, summary)
         
-        print(f"🔍 Query di ricerca: {query}")
+        print(f"🔍 Query di ricerca: {' | '.join(query)}")
         print(f"📄 Contenuto analizzato: {content[:200]}...")
         
         # Analizza titolo + contenuto per le lingue
         full_content_for_languages = f"{title} {content}"
         
-        fact_check_results = self.search_fact_check(query, mode, full_content_for_languages)
-        reliable_results = self.search_reliable_sources(query, mode, full_content_for_languages)
+        fact_check_results, reliable_results = self._search_all(query, mode, full_content_for_languages)
         
         print(f"📊 Risultati fact-check: {len(fact_check_results)}")
         print(f"📰 Risultati fonti affidabili: {len(reliable_results)}")
@@ -506,11 +609,10 @@ class NewsVerifier:
     
     def verify_text(self, text: str, mode: str = "media") -> Dict:
         """Verifica un testo personalizzato"""
-        # Crea query intelligente dal testo
-        query = self._create_smart_query(text, "")
+        # Crea query intelligenti dal testo
+        query = self._select_queries(text, "")
         
-        fact_check_results = self.search_fact_check(query, mode, text)
-        reliable_results = self.search_reliable_sources(query, mode, text)
+        fact_check_results, reliable_results = self._search_all(query, mode, text)
         
         return {
             'text': text,
@@ -568,4 +670,18 @@ class NewsVerifier:
         else:
             summary_parts.append("⚠️ Poche fonti affidabili trovate")
         
-        return "\n".join(summary_parts) 
\ No newline at end of file
+        return "\n".join(summary_parts) 
+
+def create_verifier(settings, ai_provider=None) -> NewsVerifier:
+    """Crea il verificatore con le impostazioni di concorrenza di settings.ini"""
+    serpapi_key = settings.get("serpapi_key", "").strip()
+    if not serpapi_key:
+        raise ValueError("SerpAPI key non configurata")
+    return NewsVerifier(
+        serpapi_key,
+        concurrent=get_bool(settings, 'serpapi_concurrent', True),
+        max_workers=int(settings.get('serpapi_workers', 8)),
+        max_per_host=int(settings.get('serpapi_max_per_host', 4)),
+        ai_provider=ai_provider,
+        multi_query=get_bool(settings, 'serpapi_multi_query', True),
+    )
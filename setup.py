@@ -13,11 +13,17 @@ setup(
         'rich',
         'beautifulsoup4',
     ],
+    extras_require={
+        'async': ['httpx'],
+        'fast': ['lxml'],
+        'tokens': ['tiktoken'],
+    },
     include_package_data=True,
     package_data={'': ['settings.ini']},
     entry_points={
         'console_scripts': [
             'news-agent=news_agent.main:main',
+            'news-agent-batch=news_agent.batch:main',
         ],
     },
 )
@@ -0,0 +1,48 @@
+import pickle
+
+import pytest
+
+from news_agent.article import Article
+
+
+def test_article_reads_like_a_dict():
+    article = Article(title="Titolo", link="https://a/1", author="ANSA")
+    assert article["title"] == "Titolo"
+    assert article.get("content", "x") == ""
+    assert article.get("sconosciuto", "default") == "default"
+    assert "link" in article and "sconosciuto" not in article
+    assert dict(article)["author"] == "ANSA"
+    assert len(article) == len(Article.FIELDS)
+
+
+def test_article_set_known_fields_only():
+    article = Article()
+    article["content"] = "testo"
+    assert article.content == "testo"
+    with pytest.raises(KeyError):
+        article["sconosciuto"] = 1
+    with pytest.raises(KeyError):
+        article["sconosciuto"]
+
+
+def test_article_has_no_instance_dict():
+    with pytest.raises(AttributeError):
+        Article().extra = 1
+
+
+def test_author_is_interned():
+    a = Article(author="".join(["Corriere", " della Sera"]))
+    b = Article(author="".join(["Corriere della", " Sera"]))
+    assert a.author is b.author
+
+
+def test_from_dict_ignores_unknown_keys_and_returns_articles_unchanged():
+    article = Article.from_dict({"title": "T", "link": "L", "extra": 1})
+    assert article.title == "T" and article.summary == ""
+    assert Article.from_dict(article) is article
+
+
+def test_article_pickles_and_converts_to_dict():
+    article = Article(title="T", link="L", content="C")
+    copy = pickle.loads(pickle.dumps(article))
+    assert copy.to_dict() == article.to_dict()
@@ -0,0 +1,20 @@
+import json
+
+from news_agent.batch import load_processed
+
+
+def test_load_processed_missing_file(tmp_path):
+    assert load_processed(tmp_path / "assente.jsonl") == set()
+
+
+def test_load_processed_skips_errors_and_truncated_lines(tmp_path):
+    path = tmp_path / "out.jsonl"
+    lines = [
+        json.dumps({"link": "https://a/1", "errors": {}}),
+        json.dumps({"link": "https://a/2", "errors": {"verifica": "timeout"}}),
+        json.dumps({"title": "senza link"}),
+        json.dumps({"link": "https://a/3"}),
+        '{"link": "https://a/4", "err',
+    ]
+    path.write_text("\n".join(lines), encoding="utf-8")
+    assert load_processed(path) == {"https://a/1", "https://a/3"}
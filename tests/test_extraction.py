@@ -0,0 +1,40 @@
+from news_agent.extraction import extract
+
+PAGE = """<html><head><title>Titolo pagina</title>
+<meta property="og:url" content="https://example.com/a">
+<script>var html = "<article>finto</article>";</script><style>p { color: red }</style></head>
+<body><header><span class="byline">di Mario Rossi</span></header>
+<nav>menu</nav>
+<div class="article-body"><p>%s</p></div>
+<script type="text/javascript">document.write("<p>pubblicità</p>")</script>
+<footer>piede</footer></body></html>""" % ("Testo dell'articolo. " * 20)
+
+
+def test_extract_fields_and_main_text():
+    result = extract(PAGE.encode("utf-8"))
+    assert result["title"] == "Titolo pagina"
+    assert result["canonical_url"] == "https://example.com/a"
+    assert result["byline"] == "di Mario Rossi"
+    assert result["text"].startswith("Testo dell'articolo.")
+    for noise in ("finto", "pubblicità", "menu", "piede", "color"):
+        assert noise not in result["text"]
+
+
+def test_meta_author_wins_over_page_byline():
+    page = PAGE.replace("<title>", '<meta name="author" content="Redazione"><title>')
+    assert extract(page)["byline"] == "Redazione"
+
+
+def test_specific_selector_wins_over_generic():
+    page = ('<html><body><div class="entry-content">' + "Contenuto vero. " * 20 + '</div>'
+            '<div class="post-comments">' + "Commento. " * 20 + '</div></body></html>')
+    text = extract(page)["text"]
+    assert "Contenuto vero." in text and "Commento." not in text
+
+
+def test_falls_back_to_body_text():
+    assert extract("<html><body><p>Breve</p></body></html>")["text"] == "Breve"
+
+
+def test_max_chars_truncates():
+    assert extract(PAGE, max_chars=30)["text"].endswith("...")
@@ -0,0 +1,42 @@
+import io
+
+from news_agent.article import Article
+from news_agent.fetcher import iter_feed, parse_feed
+
+RSS = """<?xml version="1.0" encoding="ISO-8859-1"?>
+<rss version="2.0"><channel><title>Feed</title>
+<item><title>Caff\xe8 &amp; cornetto</title><link> https://example.com/1 </link>
+<pubDate>Mon, 01 Jan 2024 10:00:00 GMT</pubDate><guid>g1</guid>
+<description>&lt;b&gt;Prima&lt;/b&gt;   notizia</description><source url="https://ansa.it">ANSA</source></item>
+<item><title>Seconda</title><link>https://example.com/2</link></item>
+</channel></rss>""".encode("iso-8859-1")
+
+
+def test_iter_feed_reads_declared_encoding_and_normalizes_fields():
+    articles = list(iter_feed(io.BytesIO(RSS)))
+    assert len(articles) == 2
+    first = articles[0]
+    assert isinstance(first, Article)
+    assert first["title"] == "Caffè & cornetto"
+    assert first["link"] == "https://example.com/1"
+    assert first["summary"] == "Prima notizia"
+    assert first["author"] == "ANSA"
+    assert first["guid"] == "g1"
+    assert articles[1]["author"] == "" and articles[1]["date"] == ""
+
+
+def test_iter_feed_is_lazy_and_detaches_items():
+    items = iter_feed(io.BytesIO(RSS))
+    assert next(items)["guid"] == "g1"
+    assert next(items)["title"] == "Seconda"
+
+
+def test_iter_feed_handles_namespaced_items():
+    rdf = (b'<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" xmlns="http://purl.org/rss/1.0/">'
+           b'<item><title>Senza namespace nei campi</title></item></rdf:RDF>')
+    assert len(list(iter_feed(io.BytesIO(rdf)))) == 1
+
+
+def test_parse_feed_accepts_str_with_prologue():
+    text = RSS.decode("iso-8859-1")
+    assert parse_feed(text)[0]["title"] == "Caffè & cornetto"
@@ -0,0 +1,89 @@
+from news_agent import fetcher
+from news_agent.fetcher import canonical_link, dedupe_articles, fetch_many, title_words
+
+
+def test_canonical_link_ignores_scheme_www_fragment_and_trailing_slash():
+    assert canonical_link("https://www.Example.com/news/1/#top") == "example.com/news/1"
+    assert canonical_link("http://example.com/news/1") == "example.com/news/1"
+
+
+def test_canonical_link_drops_tracking_params_only():
+    link = "https://example.com/a?utm_source=x&id=7&fbclid=abc&utm_campaign=y&ref=home"
+    assert canonical_link(link) == "example.com/a?id=7"
+
+
+def test_canonical_link_keeps_param_order():
+    assert canonical_link("https://example.com/a?b=2&a=1") == "example.com/a?b=2&a=1"
+
+
+def test_title_words_strips_source_suffix_and_short_words():
+    assert title_words("Il governo approva la manovra - Corriere della Sera") == {"governo", "approva", "manovra"}
+
+
+def test_dedupe_by_canonical_link_keeps_first():
+    articles = [
+        {"title": "Primo titolo", "link": "https://www.example.com/a?utm_source=rss"},
+        {"title": "Titolo del tutto diverso", "link": "http://example.com/a"},
+    ]
+    assert dedupe_articles(articles) == articles[:1]
+
+
+def test_dedupe_by_similar_titles():
+    articles = [
+        {"title": "Terremoto in Giappone, scossa di magnitudo 7 - ANSA", "link": "https://ansa.it/1"},
+        {"title": "Terremoto in Giappone: scossa di magnitudo 7 - Il Post", "link": "https://ilpost.it/2"},
+        {"title": "Elezioni regionali, affluenza in calo", "link": "https://ansa.it/3"},
+    ]
+    assert [a["link"] for a in dedupe_articles(articles)] == ["https://ansa.it/1", "https://ansa.it/3"]
+
+
+def test_dedupe_similarity_threshold():
+    articles = [
+        {"title": "alpha beta gamma delta", "link": "https://a/1"},
+        {"title": "alpha beta gamma epsilon", "link": "https://a/2"},
+    ]
+    # Jaccard 3/5 = 0.6
+    assert len(dedupe_articles(articles, similarity=0.8)) == 2
+    assert len(dedupe_articles(articles, similarity=0.6)) == 1
+
+
+def test_dedupe_keeps_articles_without_title_words():
+    articles = [{"title": "", "link": "https://a/1"}, {"title": "", "link": "https://a/2"}]
+    assert dedupe_articles(articles) == articles
+
+
+def test_fetch_many_single_feed_is_deduped_and_sorted(monkeypatch):
+    feed = [
+        {"title": "Notizia vecchia", "link": "https://a/1", "date": "Mon, 01 Jan 2024 10:00:00 GMT"},
+        {"title": "Notizia nuova", "link": "https://a/2", "date": "Tue, 02 Jan 2024 10:00:00 GMT"},
+        {"title": "Notizia vecchia", "link": "https://a/1?utm_source=rss", "date": "Mon, 01 Jan 2024 10:00:00 GMT"},
+    ]
+    monkeypatch.setattr(fetcher, "fetch_articles", lambda url, user_agent: list(feed))
+    single = fetch_many(["https://feed/1"])
+    assert [a["link"] for a in single] == ["https://a/2", "https://a/1"]
+    # Lo stesso feed ripetuto dà lo stesso risultato di un feed solo
+    assert fetch_many(["https://feed/1", "https://feed/1"]) == single
+
+
+def test_fetch_many_skips_failing_feeds(monkeypatch):
+    def fetch(url, user_agent):
+        if url.endswith("rotto"):
+            raise OSError("timeout")
+        return [{"title": "Unica notizia", "link": "https://a/1", "date": ""}]
+
+    monkeypatch.setattr(fetcher, "fetch_articles", fetch)
+    assert [a["link"] for a in fetch_many(["https://feed/rotto", "https://feed/ok"])] == ["https://a/1"]
+    assert fetch_many(["https://feed/rotto"]) == []
+
+
+def test_fetch_many_reports_articles_as_they_are_parsed(monkeypatch):
+    feed = [
+        {"title": "Prima notizia", "link": "https://a/1", "date": ""},
+        {"title": "Prima notizia", "link": "https://a/1", "date": ""},
+    ]
+    monkeypatch.setattr(fetcher, "iter_articles", lambda url, user_agent: iter(feed))
+    seen = []
+    articles = fetch_many(["https://feed/1"], on_article=seen.append)
+    # on_article riceve gli articoli grezzi, il risultato è deduplicato
+    assert seen == feed
+    assert articles == feed[:1]
@@ -0,0 +1,58 @@
+import io
+
+from news_agent import poller as poller_module
+from news_agent.poller import FeedPoller
+
+RSS = (b'<rss><channel>'
+       b'<item><title>Uno</title><link>https://a/1</link><guid>g1</guid></item>'
+       b'<item><title>Due</title><link>https://a/2</link><guid>g2</guid></item>'
+       b'</channel></rss>')
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=b""):
+        self.status_code = status_code
+        self.raw = io.BytesIO(body)
+        self.headers = {"ETag": '"v1"'}
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def fake_feed(monkeypatch):
+    requests = []
+
+    def get(url, timeout, headers, stream):
+        requests.append(headers)
+        if headers.get("If-None-Match") == '"v1"':
+            return FakeResponse(304)
+        return FakeResponse(200, RSS)
+
+    monkeypatch.setattr(poller_module.transport, "get", get)
+    return requests
+
+
+def test_mark_seen_saves_validators_after_processing(tmp_path, monkeypatch):
+    requests = fake_feed(monkeypatch)
+    poller = FeedPoller(tmp_path / "poller.sqlite")
+    new = poller.poll("https://feed", mark=False)
+    assert [a["guid"] for a in new] == ["g1", "g2"]
+    poller.mark_seen("https://feed", new)
+    assert poller.poll("https://feed", mark=False) == []
+    assert requests[-1]["If-None-Match"] == '"v1"'
+
+
+def test_incomplete_mark_seen_returns_failed_items_on_next_poll(tmp_path, monkeypatch):
+    requests = fake_feed(monkeypatch)
+    poller = FeedPoller(tmp_path / "poller.sqlite")
+    new = poller.poll("https://feed", mark=False)
+    poller.mark_seen("https://feed", new[:1], complete=False)
+    # Niente 304: il feed viene riscaricato e torna solo l'articolo fallito
+    retry = poller.poll("https://feed", mark=False)
+    assert "If-None-Match" not in requests[-1]
+    assert [a["guid"] for a in retry] == ["g2"]
+    poller.mark_seen("https://feed", retry)
+    assert poller.poll("https://feed", mark=False) == []
@@ -0,0 +1,48 @@
+import threading
+import time
+
+from news_agent import prefetch
+from news_agent.prefetch import Prefetcher
+
+
+def articles(n):
+    return [{"link": f"https://example.com/{i}"} for i in range(n)]
+
+
+def test_concurrent_downloads_reserve_the_budget_before_starting(monkeypatch):
+    monkeypatch.setattr(prefetch, "content_cache", {})
+    release = threading.Event()
+    started = []
+
+    def fetch(link):
+        started.append(link)
+        release.wait(2)
+        return "x" * 30 * 1024
+
+    prefetcher = Prefetcher(max_workers=4, max_bytes=50 * 1024, fetch=fetch)
+    prefetcher.schedule(articles(10))
+    futures = list(prefetcher._futures)
+    # Con la stima di 16 KB per articolo ne partono tre, non quattro
+    deadline = time.monotonic() + 2
+    while prefetcher.stats["over_budget"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for future in futures:
+        future.result()
+    assert len(started) == 3
+    assert prefetcher.stats["fetched"] == 3
+    assert prefetcher.stats["over_budget"] == 7
+    assert prefetcher._spent == 90 * 1024
+    prefetcher.close()
+
+
+def test_reservation_follows_the_average_size(monkeypatch):
+    monkeypatch.setattr(prefetch, "content_cache", {})
+    prefetcher = Prefetcher(max_workers=1, max_bytes=100 * 1024, fetch=lambda link: "x" * 40 * 1024)
+    prefetcher.schedule(articles(5))
+    for future in list(prefetcher._futures):
+        future.result()
+    # Dopo il primo download la stima è 40 KB: il terzo supererebbe il limite
+    assert prefetcher.stats["fetched"] == 2
+    assert prefetcher._spent == 80 * 1024
+    prefetcher.close()
@@ -0,0 +1,121 @@
+from news_agent.prompting import PrefixedPrompt, PromptBuilder, PromptStats, TokenCounter, TRUNCATION_MARK
+
+
+def counter():
+    return TokenCounter(chars_per_token=1)
+
+
+def builder(budget, agent="test"):
+    b = PromptBuilder(budget=budget, agent=agent)
+    b.counter = counter()
+    return b
+
+
+def test_token_counter_estimate_rounds_up():
+    assert TokenCounter(chars_per_token=3).count("abcd") == 2
+    assert TokenCounter().count("") == 0
+
+
+def test_truncate_marks_cut_and_respects_limit():
+    c = counter()
+    text = "uno due tre quattro cinque sei sette otto"
+    cut = c.truncate(text, 20)
+    assert cut.endswith(TRUNCATION_MARK)
+    assert c.count(cut) <= 20
+    assert text.startswith(cut[:-len(TRUNCATION_MARK)])
+    assert c.truncate(text, 1000) == text
+
+
+def test_truncate_to_less_than_the_mark_gives_empty_text():
+    assert counter().truncate("a" * 50, 3) == ""
+
+
+def test_under_budget_prompt_is_unchanged():
+    b = builder(1000)
+    b.fixed("ISTRUZIONI\n").add("testo", prefix="T: ", suffix="\n").add("", prefix="VUOTO: ")
+    assert b.build() == "ISTRUZIONI\nT: testo\n"
+
+
+def test_lowest_priority_is_trimmed_first_and_fixed_text_is_kept():
+    b = builder(60)
+    b.fixed("F" * 20)
+    b.add("a " * 20, priority=2)
+    b.add("b " * 20, priority=1)
+    prompt = b.build()
+    assert prompt.startswith("F" * 20 + "a " * 20)
+    assert len(prompt) <= 60
+    assert b.tokens <= 60
+
+
+def test_equal_priority_trims_the_later_section_first():
+    b = builder(60)
+    b.add("a " * 20, priority=1)
+    b.add("b " * 20, priority=1)
+    prompt = b.build()
+    assert prompt.startswith("a " * 20)
+    assert "b" in prompt and prompt.endswith(TRUNCATION_MARK)
+
+
+def test_min_tokens_is_kept_while_other_sections_can_shrink():
+    b = builder(80)
+    b.add("a " * 40, priority=1, min_tokens=40)
+    b.add("b " * 40, priority=2)
+    prompt = b.build()
+    assert prompt.startswith("a " * 16)
+    assert len(prompt) <= 80
+
+
+def test_budget_is_a_hard_cap_even_below_min_tokens():
+    b = builder(30)
+    b.fixed("F" * 10)
+    b.add("a " * 40, priority=1, min_tokens=30)
+    prompt = b.build()
+    assert len(prompt) <= 30
+    assert prompt.startswith("F" * 10)
+
+
+def test_section_trimmed_to_nothing_drops_prefix_and_suffix():
+    b = builder(12)
+    b.fixed("F" * 10)
+    b.add("a " * 20, priority=1, prefix="PREFISSO: ", suffix="\n")
+    assert b.build() == "F" * 10
+
+
+def test_trimming_is_deterministic():
+    def build():
+        b = builder(50)
+        b.add("x " * 40, priority=1).add("y " * 40, priority=3, min_tokens=5)
+        return b.build()
+    assert build() == build()
+
+
+def test_shared_prefix_is_identical_for_different_tails():
+    def build(tail):
+        b = builder(100)
+        b.fixed("NOTIZIA\n").add("testo " * 30, priority=1)
+        b.end_prefix()
+        b.fixed(tail)
+        return b.build()
+    first, second = build("Riassumi."), build("Implicazioni: " + "z" * 60)
+    assert isinstance(first, PrefixedPrompt)
+    assert first.prefix == second.prefix
+    assert first.startswith(first.prefix) and first.endswith("Riassumi.")
+    assert len(first.prefix) <= 60  # prefix_share = 0.6
+
+
+def test_prefixed_prompt_behaves_like_str():
+    prompt = PrefixedPrompt("abc", "def")
+    assert prompt == "abcdef" and hash(prompt) == hash("abcdef") and prompt.prefix == "abc"
+
+
+def test_prompt_stats_per_agent():
+    stats = PromptStats()
+    stats.record("a", 100, 0)
+    stats.record("a", 300, 50, prefix_tokens=150)
+    stats.record("b", 10, 0)
+    result = stats.stats()
+    assert list(result) == ["a", "b"]
+    assert result["a"]["avg_tokens"] == 200
+    assert result["a"]["max_tokens"] == 300
+    assert result["a"]["trimmed"] == 50 and result["a"]["trimmed_calls"] == 1
+    assert result["a"]["prefix_share"] == 150 / 400
@@ -0,0 +1,113 @@
+import threading
+import time
+
+import pytest
+
+from news_agent import ai_providers
+from news_agent.ai_providers import ProviderHealth
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ai_providers.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_circuit_opens_after_threshold_and_probes_after_cooldown(clock):
+    health = ProviderHealth(failure_threshold=2, cooldown=60)
+    health.record_failure()
+    assert health.allow()
+    health.record_failure()
+    assert health.state == ProviderHealth.OPEN and not health.allow()
+    clock[0] += 61
+    assert health.allow()
+    assert health.state == ProviderHealth.HALF_OPEN
+    # Una sola richiesta di prova alla volta
+    assert not health.allow()
+
+
+def test_successful_probe_closes_the_circuit(clock):
+    health = ProviderHealth(failure_threshold=1, cooldown=10)
+    health.record_failure()
+    clock[0] += 11
+    assert health.allow()
+    health.record_success(0.5)
+    assert health.state == ProviderHealth.CLOSED and health.failures == 0
+    assert health.allow() and health.allow()
+
+
+def test_failed_probe_reopens_the_circuit(clock):
+    health = ProviderHealth(failure_threshold=3, cooldown=10)
+    for _ in range(3):
+        health.record_failure()
+    clock[0] += 11
+    assert health.allow()
+    health.record_failure()
+    assert health.state == ProviderHealth.OPEN and not health.allow()
+
+
+def test_success_rate_latency_and_horizon(clock):
+    health = ProviderHealth(horizon=100)
+    assert health.success_rate == 1.0 and health.p50 is None
+    for latency in (1.0, 2.0, 3.0):
+        health.record_success(latency)
+    health.record_failure()
+    assert health.success_rate == 0.75
+    assert health.p50 == 2.0
+    clock[0] += 101
+    assert health.success_rate == 1.0
+    assert health.stats()["calls"] == 0
+
+
+def test_release_frees_an_unfinished_probe(clock):
+    health = ProviderHealth(failure_threshold=1, cooldown=10)
+    health.record_failure()
+    clock[0] += 11
+    assert health.allow()
+    health.release()
+    assert health.allow()
+
+
+def test_percentile_needs_min_samples(clock):
+    health = ProviderHealth()
+    for latency in (1, 2, 3, 4, 5):
+        health.record_success(latency)
+    assert health.percentile(90, min_samples=6) is None
+    assert health.percentile(90, min_samples=5) == 5
+    assert health.percentile(50) == 3
+
+
+class SlowStream(ai_providers.AIProvider):
+    """Stream che produce un pezzo ogni 50 ms finché non viene annullato"""
+
+    def __init__(self):
+        self.cancelled = threading.Event()
+
+    def generate(self, prompt, max_tokens=2048):
+        raise AssertionError("nella gara si usa stream")
+
+    def stream(self, prompt, max_tokens=2048, cancel=None):
+        for _ in range(100):
+            if cancel is not None and cancel.is_set():
+                self.cancelled.set()
+                return
+            time.sleep(0.05)
+            yield "lento "
+
+
+class Fast(ai_providers.AIProvider):
+    def generate(self, prompt, max_tokens=2048):
+        return "veloce"
+
+
+def test_hedged_generate_cancels_the_losing_request():
+    slow = SlowStream()
+    fallback = ai_providers.FallbackAIProvider([slow, Fast()], hedge=True, hedge_max_rate=1.0)
+    for _ in range(ai_providers.FallbackAIProvider.HEDGE_MIN_SAMPLES):
+        fallback.health[0].record_success(0.05)
+    start = time.perf_counter()
+    assert fallback.generate("prompt") == "veloce"
+    assert time.perf_counter() - start < 1
+    assert slow.cancelled.wait(1)
+    assert fallback.hedge_stats()["hedge_wins"] == 1
@@ -0,0 +1,11 @@
+from news_agent.resolver import parse_link
+
+
+def test_parse_link_plain_cdata_and_entities():
+    assert parse_link(b"<rss><item><link>https://a.it/x?a=1&amp;b=2</link></item></rss>") == "https://a.it/x?a=1&b=2"
+    assert parse_link(b"<link rel='x'><![CDATA[ https://b.it/y ]]></link>") == "https://b.it/y"
+
+
+def test_parse_link_skips_links_without_url_and_returns_none():
+    assert parse_link(b'<link rel="stylesheet" href="s.css"/><link>https://c.it/</link>') == "https://c.it/"
+    assert parse_link(b"<html><body>nessun link</body></html>") is None
@@ -0,0 +1,81 @@
+import sqlite3
+import time
+
+from news_agent.scrape_store import ScrapeStore
+
+
+def test_redirects_survive_age_based_compaction(tmp_path):
+    store = ScrapeStore(tmp_path / "store.sqlite", max_age=10)
+    store.set_redirect("https://news.google.com/rss/articles/a", "https://example.com/a")
+    store.set_page("https://example.com/a", "testo")
+    old = time.time() - 3600
+    store._conn.execute("UPDATE redirects SET created_at = ?", (old,))
+    store._conn.execute("UPDATE pages SET accessed_at = ?", (old,))
+    store._conn.commit()
+    store.compact()
+    assert store.get_redirect("https://news.google.com/rss/articles/a") == "https://example.com/a"
+    assert store.get_page("https://example.com/a") is None
+
+
+def test_redirect_cap_drops_oldest(tmp_path):
+    store = ScrapeStore(tmp_path / "store.sqlite", max_redirects=2)
+    for i in range(3):
+        store.set_redirect(f"g{i}", f"t{i}")
+        store._conn.execute("UPDATE redirects SET created_at = ? WHERE url = ?", (i, f"g{i}"))
+    store._conn.commit()
+    store.compact()
+    assert store.get_redirects(["g0", "g1", "g2"]) == {"g1": "t1", "g2": "t2"}
+
+
+def pragma(store, name):
+    return store._conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+
+def filled_store(path, pages=100):
+    store = ScrapeStore(path, max_age=10)
+    for i in range(pages):
+        store.set_page(f"https://example.com/{i:03}", "x" * 40000)
+    return store
+
+
+def expire(store, below):
+    store._conn.execute("UPDATE pages SET accessed_at = 0 WHERE url < ?", (f"https://example.com/{below:03}",))
+    store._conn.commit()
+
+
+def test_compact_keeps_small_free_space(tmp_path):
+    store = filled_store(tmp_path / "store.sqlite")
+    expire(store, 5)
+    store.compact()
+    assert pragma(store, "freelist_count") > 0
+
+
+def test_compact_returns_large_free_space_incrementally(tmp_path, monkeypatch):
+    monkeypatch.setattr(ScrapeStore, "RECLAIM_MIN_BYTES", 1024 * 1024)
+    store = filled_store(tmp_path / "store.sqlite")
+    assert pragma(store, "auto_vacuum") == 2
+    pages = pragma(store, "page_count")
+    expire(store, 60)
+    store.compact()
+    assert pragma(store, "freelist_count") == 0
+    assert pragma(store, "page_count") < pages / 2
+
+
+def test_store_without_auto_vacuum_is_converted_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(ScrapeStore, "RECLAIM_MIN_BYTES", 1024 * 1024)
+    path = tmp_path / "store.sqlite"
+    conn = sqlite3.connect(str(path))
+    conn.execute(
+        "CREATE TABLE pages (url TEXT PRIMARY KEY, content TEXT NOT NULL, etag TEXT, last_modified TEXT,"
+        " fetched_at REAL NOT NULL, accessed_at REAL NOT NULL, size INTEGER NOT NULL)"
+    )
+    conn.executemany(
+        "INSERT INTO pages VALUES (?, ?, NULL, NULL, 0, 0, 40000)",
+        [(f"https://example.com/{i:03}", "x" * 40000) for i in range(100)]
+    )
+    conn.commit()
+    conn.close()
+    store = ScrapeStore(path, max_age=10)
+    assert store.stats()["pages"] == 0
+    assert pragma(store, "auto_vacuum") == 2
+    assert pragma(store, "freelist_count") == 0
@@ -0,0 +1,72 @@
+import time
+
+from news_agent.verifier import NewsVerifier
+
+
+def verifier():
+    return NewsVerifier("chiave", ai_provider=object())
+
+
+def result(link, query):
+    return {"link": link, "title": link, "search_query": query}
+
+
+def test_merge_dedupes_by_normalized_link_and_records_queries():
+    lists = [
+        [result("https://www.a.it/1/", "q1"), result("https://b.it/2", "q1")],
+        [result("http://a.it/1#commenti", "q2"), result("https://a.it/1", "q2")],
+    ]
+    merged = verifier()._merge_results(lists, rank=False)
+    assert [r["link"] for r in merged] == ["https://www.a.it/1/", "https://b.it/2"]
+    assert merged[0]["matched_queries"] == ["q1", "q2"]
+    assert "relevance" not in merged[0]
+
+
+def test_merge_ranks_by_reciprocal_position():
+    lists = [
+        [result("https://a/1", "q1"), result("https://a/2", "q1"), result("https://a/3", "q1")],
+        [result("https://a/3", "q2"), result("https://a/4", "q2")],
+    ]
+    merged = verifier()._merge_results(lists, rank=True)
+    assert [r["link"] for r in merged] == ["https://a/3", "https://a/1", "https://a/2", "https://a/4"]
+    assert merged[0]["relevance"] == round(1 / 3 + 1, 3)
+
+
+def test_merge_keeps_task_order_on_ties():
+    lists = [[result("https://a/1", "q1")], [result("https://a/2", "q2")]]
+    assert [r["link"] for r in verifier()._merge_results(lists, rank=True)] == ["https://a/1", "https://a/2"]
+
+
+def test_languages_without_templates_keep_their_code(monkeypatch):
+    v = verifier()
+    portuguese = {"name": "Portoghese", "gl": "pt", "hl": "pt"}
+    searched = []
+
+    def search(query, lang_config, mode, label):
+        searched.append(query)
+        return [{"title": "t", "link": f"https://publico.pt/{len(searched)}"}]
+
+    monkeypatch.setattr(v, "analyze_content_for_languages", lambda content: [portuguese])
+    monkeypatch.setattr(v, "_serpapi_search", search)
+    results = v.search_fact_check("vacina", mode="veloce", content="texto em português")
+    assert results and all(r["language"] == "pt" for r in results)
+    # I modelli di query inglesi fanno da ripiego
+    assert any("fact check" in query for query in searched)
+
+
+def test_run_searches_stops_sending_once_enough_results_arrived():
+    started = []
+
+    def search(n):
+        def task():
+            started.append(n)
+            time.sleep(0.05)
+            return [result(f"https://a/{n}/{k}", f"q{n}") for k in range(5)]
+        return task
+
+    v = NewsVerifier("chiave", max_workers=8, max_per_host=2, ai_provider=object())
+    merged = v._run_searches([search(n) for n in range(8)], max_results=5)
+    assert len(merged) == 5
+    time.sleep(0.2)
+    # Solo le ricerche già prese dai due thread del pool partono davvero
+    assert len(started) <= 2